@@ -3,7 +3,8 @@ AEON AI twin endpoints - Phase 1 and Phase 2 capabilities
 """
 
 from typing import List, Optional, Dict, Any
-from fastapi import APIRouter, HTTPException, Depends, status, Query
+from fastapi import APIRouter, HTTPException, Depends, status, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from app.core.logging import get_logger
@@ -20,6 +21,50 @@ router = APIRouter()
 logger = get_logger(__name__)
 
 
+# Phase 2 service dependencies. These resolve to None when a backend is
+# unavailable so the enhanced service can fall back to Phase 1 behaviour.
+async def get_rag_service_dep():
+    """Resolve the RAG service for the current request"""
+    try:
+        from app.services.rag_service import get_rag_service
+        return await get_rag_service()
+    except Exception as e:
+        logger.error(f"RAG service unavailable: {str(e)}")
+        return None
+
+
+async def get_graph_service_dep():
+    """Resolve the graph service for the current request"""
+    try:
+        from app.services.graph_service import get_graph_service
+        return await get_graph_service()
+    except Exception as e:
+        logger.error(f"Graph service unavailable: {str(e)}")
+        return None
+
+
+async def get_vector_service_dep():
+    """Resolve the vector service for the current request"""
+    try:
+        from app.services.vector_service import get_vector_service
+        return await get_vector_service()
+    except Exception as e:
+        logger.error(f"Vector service unavailable: {str(e)}")
+        return None
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak If-None-Match comparison; the header may list several tags or be *"""
+    if not if_none_match:
+        return False
+    opaque_tag = etag.removeprefix("W/")
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == opaque_tag:
+            return True
+    return False
+
+
 @router.get("/status", response_model=AEONStatus)
 async def get_aeon_status(
     current_user: User = Depends(get_current_active_user),
@@ -149,16 +194,21 @@ async def get_memories(
 async def chat_with_aeon_enhanced(
     chat_request: ChatRequest,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    rag_service=Depends(get_rag_service_dep)
 ):
     """Chat with AEON using Phase 2 RAG capabilities"""
     try:
         from app.services.enhanced_aeon_service import get_enhanced_aeon_service
         
         enhanced_service = await get_enhanced_aeon_service()
-        response = await enhanced_service.chat_with_aeon_enhanced(db, current_user.id, chat_request)
+        response = await enhanced_service.chat_with_aeon_enhanced(
+            db, current_user.id, chat_request, rag_service
+        )
         logger.info(f"Enhanced chat completed for user {current_user.username}")
         return response
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Enhanced chat failed for user {current_user.username}: {str(e)}")
         raise HTTPException(
@@ -167,17 +217,63 @@ async def chat_with_aeon_enhanced(
         )
 
 
+@router.post("/chat/enhanced/stream")
+async def chat_with_aeon_enhanced_stream(
+    chat_request: ChatRequest,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db),
+    rag_service=Depends(get_rag_service_dep)
+):
+    """Chat with AEON using Phase 2 RAG capabilities, streamed as server-sent events"""
+    try:
+        from app.services.enhanced_aeon_service import get_enhanced_aeon_service
+        
+        enhanced_service = await get_enhanced_aeon_service()
+        stream = await enhanced_service.chat_with_aeon_enhanced_stream(
+            db, current_user.id, chat_request, rag_service
+        )
+        return StreamingResponse(stream, media_type="text/event-stream")
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Enhanced chat stream failed for user {current_user.username}: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Enhanced chat service temporarily unavailable"
+        )
+
+
 @router.get("/status/enhanced")
 async def get_enhanced_aeon_status(
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    vector_service=Depends(get_vector_service_dep),
+    graph_service=Depends(get_graph_service_dep)
 ):
     """Get enhanced AEON status with Phase 2 hybrid memory system info"""
     try:
         from app.services.enhanced_aeon_service import get_enhanced_aeon_service
         
         enhanced_service = await get_enhanced_aeon_service()
-        status_info = await enhanced_service.get_enhanced_aeon_status(db, current_user.id)
+        
+        status_info = await enhanced_service.get_enhanced_aeon_status(
+            db, current_user.id, vector_service, graph_service
+        )
+        
+        # Dashboards poll this endpoint; answer 304 when the client's copy is
+        # still current. Degraded fallback bodies carry no ETag at all.
+        etag = enhanced_service.get_status_etag(status_info)
+        if etag is None:
+            response.headers["Cache-Control"] = "no-store"
+            return status_info
+        
+        cache_headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers)
+        
+        response.headers.update(cache_headers)
         return status_info
     except Exception as e:
         logger.error(f"Enhanced status retrieval failed for user {current_user.username}: {str(e)}")
@@ -191,7 +287,9 @@ async def get_enhanced_aeon_status(
 async def create_memory_enhanced(
     memory_data: MemoryEntryCreate,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    rag_service=Depends(get_rag_service_dep),
+    graph_service=Depends(get_graph_service_dep)
 ):
     """Create memory with Phase 2 vector and graph storage"""
     try:
@@ -199,7 +297,7 @@ async def create_memory_enhanced(
         
         enhanced_service = await get_enhanced_aeon_service()
         result = await enhanced_service.create_memory_entry_enhanced(
-            db, current_user.id, memory_data
+            db, current_user.id, memory_data, rag_service, graph_service
         )
         return result
     except Exception as e:
@@ -257,14 +355,17 @@ async def search_memories(
 @router.post("/graph/initialize")
 async def initialize_user_graph(
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    graph_service=Depends(get_graph_service_dep)
 ):
     """Initialize user in the Phase 2 graph database"""
     try:
         from app.services.enhanced_aeon_service import get_enhanced_aeon_service
         
         enhanced_service = await get_enhanced_aeon_service()
-        result = await enhanced_service.initialize_user_graph(db, current_user.id)
+        result = await enhanced_service.initialize_user_graph(
+            db, current_user.id, graph_service
+        )
         return result
     except Exception as e:
         logger.error(f"Graph initialization failed for user {current_user.username}: {str(e)}")
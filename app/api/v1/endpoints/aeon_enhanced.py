@@ -9,6 +9,7 @@ from datetime import datetime
 
 from app.core.logging import get_logger
 from app.database import get_db
+from app.database.session import SessionLocal
 from app.services.email_service import email_service, EmailMessage
 from app.services.web_activity_service import web_activity_tracker, WebActivity, WebSession
 from app.services.enhanced_realtime_service import enhanced_realtime_service
@@ -326,20 +327,20 @@ async def track_web_activity(
 @router.websocket("/ws/enhanced/{user_id}")
 async def enhanced_websocket_endpoint(
     websocket: WebSocket,
-    user_id: int,
-    db: Session = Depends(get_db)
+    user_id: int
 ):
     """Enhanced WebSocket endpoint with email and web activity integration"""
     try:
-        # Get user information
-        user = db.query(User).filter(User.id == user_id).first()
+        # Get user information in a short-lived session so the socket does not pin a pooled connection
+        with SessionLocal() as db:
+            user = db.query(User).filter(User.id == user_id).first()
         if not user:
             await websocket.close(code=4004, reason="User not found")
             return
         
         # Handle enhanced WebSocket connection
         await enhanced_realtime_service.handle_websocket_connection(
-            websocket, user_id, user.username, db
+            websocket, user_id, user.username
         )
     except Exception as e:
         logger.error(f"Enhanced WebSocket error: {e}")
@@ -9,6 +9,7 @@ from sqlalchemy import and_
 
 from app.core.logging import get_logger
 from app.database import get_db
+from app.database.session import SessionLocal
 from app.models.aeon import (
     ChatRoomCreate, ChatRoomResponse, UserPresence, RealTimeMessageCreate,
     UserRelationshipCreate, SharedKnowledgeCreate, AEONInteractionCreate,
@@ -27,20 +28,20 @@ logger = get_logger(__name__)
 @router.websocket("/ws/{user_id}")
 async def websocket_endpoint(
     websocket: WebSocket,
-    user_id: int,
-    db: Session = Depends(get_db)
+    user_id: int
 ):
     """WebSocket endpoint for real-time messaging"""
     try:
-        # Get user information
-        user = db.query(User).filter(User.id == user_id).first()
+        # Get user information in a short-lived session so the socket does not pin a pooled connection
+        with SessionLocal() as db:
+            user = db.query(User).filter(User.id == user_id).first()
         if not user:
             await websocket.close(code=4004, reason="User not found")
             return
         
         # Handle WebSocket connection
         await realtime_service.handle_websocket_connection(
-            websocket, user_id, user.username, db
+            websocket, user_id, user.username
         )
     except Exception as e:
         logger.error(f"WebSocket error: {e}")
@@ -426,12 +427,13 @@ async def respond_to_aeon_interaction(
 # Social Network
 @router.get("/social/network")
 async def get_social_network(
+    include_details: bool = Query(False, description="Include connection, knowledge and interaction lists"),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Get user's social network information"""
     try:
-        network = SocialService.get_social_network(db, current_user.id)
+        network = SocialService.get_social_network(db, current_user.id, include_details)
         return network
         
     except Exception as e:
@@ -2,6 +2,7 @@
 Configuration settings for AEON
 """
 
+import os
 from pydantic_settings import BaseSettings
 from typing import Optional
 
@@ -13,17 +14,28 @@ class Settings(BaseSettings):
     openai_api_key: str
     openai_model: str = "gpt-4"
     openai_embedding_model: str = "text-embedding-ada-002"
+    concept_extractor: str = "local"  # "local" (YAKE) or "openai"
     
     # Database Configuration
     database_url: str = "sqlite:///./aeon.db"
+    db_pool_size: int = 20
+    db_max_overflow: int = 40
+    db_pool_recycle: int = 30 * 60
     neo4j_uri: str = "bolt://localhost:7687"
     neo4j_user: str = "neo4j"
     neo4j_password: str = "aeon123456"
     neo4j_database: str = "neo4j"
+    neo4j_pool_size: int = max(32, 2 * (os.cpu_count() or 1))
+    neo4j_acq_timeout: float = 30.0
+    neo4j_max_connection_lifetime: int = 30 * 60
+    neo4j_connection_timeout: float = 15.0
     
     chroma_host: str = "localhost"
     chroma_port: int = 8001
     
+    # Persistent cache for embeddings and concepts; disabled when unset
+    redis_url: Optional[str] = None
+    
     # Application Configuration
     app_name: str = "AEON"
     app_version: str = "0.1.0"
@@ -39,6 +51,9 @@ class Settings(BaseSettings):
     host: str = "0.0.0.0"
     port: int = 8000
     reload: bool = True
+    # Broadcasts send the same pre-encoded bytes to every recipient; per-message
+    # deflate would recompress them once per connection
+    ws_per_message_deflate: bool = False
     
     # Development
     environment: str = "development"
@@ -2,11 +2,18 @@
 Logging configuration for AEON
 """
 
+import queue
 import structlog
 import logging
+import logging.handlers
+from typing import Optional
 from app.core.config import settings
 
 
+# Background listener that drains queued log records to the real handlers
+_queue_listener: Optional[logging.handlers.QueueListener] = None
+
+
 def setup_logging():
     """Setup structured logging"""
     
@@ -34,6 +41,30 @@ def setup_logging():
         format="%(message)s",
         level=getattr(logging, settings.log_level.upper()),
     )
+    
+    # Route records through a queue so request handlers never block on I/O;
+    # the listener thread formats and writes them with the original handlers
+    global _queue_listener
+    root_logger = logging.getLogger()
+    if _queue_listener is None:
+        log_queue: queue.Queue = queue.Queue(-1)
+        handlers = root_logger.handlers[:]
+        for handler in handlers:
+            root_logger.removeHandler(handler)
+        root_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+        
+        _queue_listener = logging.handlers.QueueListener(
+            log_queue, *handlers, respect_handler_level=True
+        )
+        _queue_listener.start()
+
+
+def shutdown_logging():
+    """Stop the background log listener, flushing any queued records"""
+    global _queue_listener
+    if _queue_listener is not None:
+        _queue_listener.stop()
+        _queue_listener = None
 
 
 def get_logger(name: str = __name__):
@@ -2,7 +2,7 @@
 SQLAlchemy database models for AEON
 """
 
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, JSON, Float
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, JSON, Float, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -149,6 +149,10 @@ class RealTimeMessage(Base):
 class RoomParticipant(Base):
     """Room participant database model for tracking who's in which room"""
     __tablename__ = "room_participants"
+    __table_args__ = (
+        # Active participant listings filter on is_active and join users on user_id
+        Index("ix_room_participants_active_user", "is_active", "user_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     room_id = Column(String(50), ForeignKey("chat_rooms.id"), nullable=False)
@@ -181,6 +185,12 @@ class UserPresence(Base):
 class UserRelationship(Base):
     """User relationship database model for social intelligence"""
     __tablename__ = "user_relationships"
+    __table_args__ = (
+        # One row per directed pair; create_user_relationship upserts against it.
+        # A unique index rather than a constraint so existing databases can gain
+        # it at startup (see ensure_user_relationship_pair_index)
+        Index("uq_user_relationships_pair", "user_id", "related_user_id", unique=True),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
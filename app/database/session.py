@@ -2,9 +2,10 @@
 Database session management for AEON
 """
 
-from sqlalchemy import create_engine
+from typing import Any, Dict
+from sqlalchemy import create_engine, event, inspect, make_url, text
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.pool import StaticPool
 from app.core.config import settings
 from app.core.logging import get_logger
 
@@ -13,13 +14,52 @@ logger = get_logger(__name__)
 # Database URL - Using SQLite for Phase 1, can be upgraded to PostgreSQL later
 DATABASE_URL = "sqlite:///./aeon.db"
 
-# Create engine
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False},  # Needed for SQLite
-    poolclass=StaticPool,
-    echo=settings.debug,  # Log SQL queries in debug mode
-)
+# SQLite allows a single writer at a time, so its pool stays small and a
+# blocked writer waits up to this long (milliseconds) instead of failing
+# with "database is locked"
+SQLITE_POOL_SIZE = 5
+SQLITE_BUSY_TIMEOUT_MS = 5000
+
+
+def _configure_sqlite_connection(dbapi_connection, connection_record):
+    """Enable WAL, so readers are not blocked by the writer, and set the busy timeout"""
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    finally:
+        cursor.close()
+
+
+def create_database_engine(url: str) -> Engine:
+    """Create the engine, sizing the pool for the database behind the URL
+    
+    WebSocket handlers check out a connection per operation, so a modest pool
+    serves many idle sockets on a server database.
+    """
+    is_sqlite = make_url(url).get_backend_name() == "sqlite"
+    options: Dict[str, Any] = {"echo": settings.debug}  # Log SQL queries in debug mode
+    if is_sqlite:
+        options.update(
+            connect_args={"check_same_thread": False},  # Needed for SQLite
+            pool_size=SQLITE_POOL_SIZE,
+            max_overflow=0
+        )
+    else:
+        options.update(
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_pre_ping=True,
+            pool_recycle=settings.db_pool_recycle
+        )
+    
+    engine = create_engine(url, **options)
+    if is_sqlite:
+        event.listen(engine, "connect", _configure_sqlite_connection)
+    return engine
+
+
+engine = create_database_engine(DATABASE_URL)
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -38,9 +78,42 @@ def create_tables():
     """Create all database tables"""
     from .models import Base
     Base.metadata.create_all(bind=engine)
+    ensure_user_relationship_pair_index(engine)
+    ensure_room_participant_active_index(engine)
     logger.info("Database tables created successfully")
 
 
+def ensure_user_relationship_pair_index(bind: Engine):
+    """Add the (user_id, related_user_id) unique index to databases created before it existed
+    
+    create_all never alters existing tables, and the relationship upsert needs the
+    index as its conflict target. Duplicate pairs are collapsed to their newest row first.
+    """
+    with bind.begin() as conn:
+        indexes = {index["name"] for index in inspect(conn).get_indexes("user_relationships")}
+        if "uq_user_relationships_pair" in indexes:
+            return
+        
+        removed = conn.execute(text(
+            "DELETE FROM user_relationships WHERE id NOT IN ("
+            "SELECT MAX(id) FROM user_relationships GROUP BY user_id, related_user_id)"
+        )).rowcount
+        conn.execute(text(
+            "CREATE UNIQUE INDEX IF NOT EXISTS uq_user_relationships_pair "
+            "ON user_relationships (user_id, related_user_id)"
+        ))
+    logger.info(f"Added user relationship pair index, removed {removed} duplicate rows")
+
+
+def ensure_room_participant_active_index(bind: Engine):
+    """Add the active participant index to databases created before it existed"""
+    with bind.begin() as conn:
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_room_participants_active_user "
+            "ON room_participants (is_active, user_id)"
+        ))
+
+
 def drop_tables():
     """Drop all database tables (for development)"""
     from .models import Base
@@ -8,7 +8,7 @@ from contextlib import asynccontextmanager
 
 from app.core.config import settings
 from app.api.v1.api import api_router
-from app.core.logging import setup_logging
+from app.core.logging import setup_logging, shutdown_logging
 
 
 @asynccontextmanager
@@ -26,6 +26,13 @@ async def lifespan(app: FastAPI):
     yield
     # Shutdown
     print("🛑 AEON shutting down...")
+    
+    # Write chat messages still waiting in the background persistence queues
+    from app.services.realtime_service import realtime_service
+    from app.services.enhanced_realtime_service import enhanced_realtime_service
+    await realtime_service.flush_pending_messages()
+    await enhanced_realtime_service.flush_pending_messages()
+    shutdown_logging()
 
 
 def create_application() -> FastAPI:
@@ -85,5 +92,6 @@ if __name__ == "__main__":
         host=settings.host,
         port=settings.port,
         reload=settings.reload,
+        ws_per_message_deflate=settings.ws_per_message_deflate,
         log_level=settings.log_level.lower()
     ) 
\ No newline at end of file
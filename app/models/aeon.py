@@ -150,6 +150,25 @@ class RealTimeMessageCreate(BaseModel):
     meta_data: Optional[Dict[str, Any]] = None
 
 
+class ChatMessageEvent(BaseModel):
+    """Incoming WebSocket chat message"""
+    content: str = ""
+    room_id: Optional[str] = None
+    message_type: str = "text"
+    meta_data: Optional[Dict[str, Any]] = None
+
+
+class RoomEvent(BaseModel):
+    """Incoming WebSocket join/leave room request"""
+    room_id: Optional[str] = None
+
+
+class TypingEvent(BaseModel):
+    """Incoming WebSocket typing indicator"""
+    room_id: Optional[str] = None
+    is_typing: bool = False
+
+
 class UserPresence(BaseModel):
     """User presence model for real-time status"""
     user_id: int
@@ -203,6 +222,8 @@ class UserRelationship(BaseModel):
     interaction_count: int = 0
     shared_interests: Optional[List[str]] = []
     meta_data: Optional[Dict[str, Any]] = None
+    
+    model_config = {"from_attributes": True}
 
 
 class UserRelationshipCreate(BaseModel):
@@ -228,6 +249,8 @@ class SharedKnowledge(BaseModel):
     downvotes: int = 0
     share_count: int = 0
     meta_data: Optional[Dict[str, Any]] = None
+    
+    model_config = {"from_attributes": True}
 
 
 class SharedKnowledgeCreate(BaseModel):
@@ -259,6 +282,8 @@ class AEONInteraction(BaseModel):
     response_at: Optional[datetime] = None
     is_public: bool = False
     meta_data: Optional[Dict[str, Any]] = None
+    
+    model_config = {"from_attributes": True}
 
 
 class AEONInteractionCreate(BaseModel):
@@ -4,7 +4,8 @@ AEON service layer for chat and AI functionality
 
 import time
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterator, Tuple
+from sqlalchemy import insert, update
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 
@@ -18,6 +19,9 @@ from app.core.logging import get_logger
 
 logger = get_logger(__name__)
 
+# OpenAI chat roles for stored message roles; anything else is the assistant
+_ROLE_MAP = {"user": "user", MessageRole.USER: "user"}
+
 
 class AEONService:
     """AEON service class"""
@@ -60,7 +64,7 @@ class AEONService:
         role: MessageRole,
         message_type: MessageType = MessageType.TEXT,
         metadata: Optional[Dict[str, Any]] = None
-    ) -> ChatMessage:
+    ) -> ChatMessageResponse:
         """Add a message to a conversation"""
         # Convert string role to enum if needed
         if isinstance(role, str):
@@ -70,26 +74,39 @@ class AEONService:
         if isinstance(message_type, str):
             message_type = MessageType(message_type)
         
-        message = ChatMessage(
+        # Insert and read back server defaults (id, timestamp) in one round trip
+        stmt = insert(ChatMessage).values(
             conversation_id=conversation_id,
             user_id=user_id,
             role=role.value,
             content=content,
             message_type=message_type.value,
-            metadata=metadata
-        )
-        db.add(message)
+            meta_data=metadata
+        ).returning(ChatMessage.id, ChatMessage.timestamp)
+        row = db.execute(stmt).one()
         
         # Update conversation message count and timestamp
-        conversation = db.query(Conversation).filter(Conversation.id == conversation_id).first()
-        if conversation:
-            conversation.message_count += 1
-            conversation.updated_at = datetime.utcnow()
+        db.execute(
+            update(Conversation)
+            .where(Conversation.id == conversation_id)
+            .values(
+                message_count=Conversation.message_count + 1,
+                updated_at=datetime.utcnow()
+            )
+        )
         
         db.commit()
-        db.refresh(message)
         
-        return message
+        # Values come straight from the database, so skip re-validation
+        return ChatMessageResponse.model_construct(
+            id=row.id,
+            user_id=user_id,
+            role=role,
+            content=content,
+            message_type=message_type,
+            timestamp=row.timestamp,
+            meta_data=metadata
+        )
     
     @staticmethod
     def get_conversation_messages(db: Session, conversation_id: int, limit: int = 100) -> List[ChatMessage]:
@@ -99,14 +116,44 @@ class AEONService:
         ).order_by(ChatMessage.timestamp.asc()).limit(limit).all()
     
     @staticmethod
-    def generate_aeon_response(db: Session, user_id: int, user_message: str, conversation_id: int) -> str:
+    def get_recent_history_tuples(
+        db: Session,
+        conversation_id: int,
+        limit: int = 10
+    ) -> Iterator[Tuple[str, str]]:
+        """Yield (role, content) pairs for the latest messages, oldest first"""
+        rows = db.query(ChatMessage.role, ChatMessage.content).filter(
+            ChatMessage.conversation_id == conversation_id
+        ).order_by(ChatMessage.timestamp.desc(), ChatMessage.id.desc()).limit(limit).all()
+        return ((_ROLE_MAP.get(role, "assistant"), content) for role, content in reversed(rows))
+    
+    @staticmethod
+    def build_conversation_history(messages: List[ChatMessage], limit: int = 10) -> List[Dict[str, str]]:
+        """Convert stored messages into OpenAI chat history entries"""
+        return [
+            {"role": _ROLE_MAP.get(msg.role, "assistant"), "content": msg.content}
+            for msg in messages[-limit:]
+        ]
+    
+    @staticmethod
+    def generate_aeon_response(
+        db: Session,
+        user_id: int,
+        user_message: str,
+        conversation_id: int,
+        conversation_history: Optional[List[Dict[str, str]]] = None
+    ) -> str:
         """Generate AEON's response using OpenAI"""
         try:
-            # Get conversation context
-            messages = AEONService.get_conversation_messages(db, conversation_id, limit=20)
+            # Get conversation context unless the caller already built it
+            if conversation_history is None:
+                messages = AEONService.get_conversation_messages(db, conversation_id, limit=20)
+                history = AEONService.build_conversation_history(messages)
+            else:
+                history = conversation_history
             
-            # Build conversation history for OpenAI
-            conversation_history = []
+            # Build message list for OpenAI
+            openai_messages = []
             
             # Add system message to establish AEON's personality
             system_message = {
@@ -116,18 +163,13 @@ class AEONService:
                 personality, preferences, and experiences. Always respond as if you're having a natural conversation 
                 with someone you know intimately well."""
             }
-            conversation_history.append(system_message)
+            openai_messages.append(system_message)
             
-            # Add conversation history
-            for msg in messages[-10:]:  # Last 10 messages for context
-                role = "user" if msg.role == "user" else "assistant"
-                conversation_history.append({
-                    "role": role,
-                    "content": msg.content
-                })
+            # Add conversation history (last 10 messages for context)
+            openai_messages.extend(history)
             
             # Add current user message
-            conversation_history.append({
+            openai_messages.append({
                 "role": "user",
                 "content": user_message
             })
@@ -138,7 +180,7 @@ class AEONService:
             
             response = client.chat.completions.create(
                 model=settings.openai_model,
-                messages=conversation_history,
+                messages=openai_messages,
                 max_tokens=500,
                 temperature=0.7,
                 presence_penalty=0.1,
@@ -158,8 +200,17 @@ class AEONService:
             return "I'm sorry, I'm having trouble processing that right now. Could you try again?"
     
     @staticmethod
-    def chat_with_aeon(db: Session, user_id: int, chat_request: ChatRequest) -> ChatResponse:
-        """Main chat function with AEON"""
+    def chat_with_aeon(
+        db: Session,
+        user_id: int,
+        chat_request: ChatRequest,
+        conversation_history: Optional[List[Dict[str, str]]] = None
+    ) -> ChatResponse:
+        """Main chat function with AEON
+        
+        When conversation_history is given, the user message is assumed to be
+        stored already and the prebuilt history is used instead of re-reading it.
+        """
         start_time = time.time()
         
         # Get or create conversation
@@ -177,13 +228,14 @@ class AEONService:
             )
         
         # Add user message
-        user_message = AEONService.add_message_to_conversation(
-            db, conversation_id, user_id, chat_request.message, MessageRole.USER
-        )
+        if conversation_history is None:
+            AEONService.add_message_to_conversation(
+                db, conversation_id, user_id, chat_request.message, MessageRole.USER
+            )
         
         # Generate AEON response
         aeon_response_content = AEONService.generate_aeon_response(
-            db, user_id, chat_request.message, conversation_id
+            db, user_id, chat_request.message, conversation_id, conversation_history
         )
         
         # Add AEON response
@@ -194,12 +246,8 @@ class AEONService:
         # Calculate response time
         response_time = time.time() - start_time
         
-        # Convert to response models
-        user_message_response = ChatMessageResponse.model_validate(user_message)
-        aeon_message_response = ChatMessageResponse.model_validate(aeon_message)
-        
         return ChatResponse(
-            message=aeon_message_response,
+            message=aeon_message,
             conversation_id=conversation_id,
             response_time=response_time
         )
@@ -212,7 +260,7 @@ class AEONService:
             content=memory_data.content,
             memory_type=memory_data.memory_type,
             importance=memory_data.importance,
-            metadata=memory_data.metadata
+            meta_data=memory_data.meta_data
         )
         db.add(memory)
         db.commit()
@@ -222,12 +270,20 @@ class AEONService:
         return memory
     
     @staticmethod
-    def get_user_memories(db: Session, user_id: int, memory_type: Optional[str] = None) -> List[MemoryEntry]:
+    def get_user_memories(
+        db: Session,
+        user_id: int,
+        memory_type: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> List[MemoryEntry]:
         """Get memories for a user"""
         query = db.query(MemoryEntry).filter(MemoryEntry.user_id == user_id)
         if memory_type:
             query = query.filter(MemoryEntry.memory_type == memory_type)
-        return query.order_by(MemoryEntry.importance.desc(), MemoryEntry.created_at.desc()).all()
+        query = query.order_by(MemoryEntry.importance.desc(), MemoryEntry.created_at.desc())
+        if limit is not None:
+            query = query.limit(limit)
+        return query.all()
     
     @staticmethod
     def get_aeon_status(db: Session, user_id: int) -> AEONStatus:
@@ -0,0 +1,104 @@
+"""
+Persistent cache service backed by Redis
+Caches expensive derived values (embeddings, extracted concepts) across process restarts
+"""
+
+import hashlib
+from typing import Awaitable, Callable, Dict, List, Optional, TypeVar
+import redis.asyncio as redis
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+CACHE_TTL = 7 * 24 * 60 * 60  # One week
+CACHE_SOCKET_TIMEOUT = 0.5  # A slow cache must never be slower than recomputing
+
+
+def content_key(prefix: str, content: str) -> str:
+    """Build a cache key from a prefix and the SHA-256 of the content"""
+    return f"{prefix}:{hashlib.sha256(content.encode('utf-8')).hexdigest()}"
+
+
+class CacheService:
+    """Redis-backed cache; every operation degrades to a miss when Redis is not configured or unavailable"""
+    
+    def __init__(self):
+        self.client: Optional[redis.Redis] = None
+        self.initialized = False
+    
+    async def initialize(self):
+        """Connect to Redis if a URL is configured"""
+        if settings.redis_url:
+            self.client = redis.from_url(
+                settings.redis_url,
+                socket_timeout=CACHE_SOCKET_TIMEOUT,
+                socket_connect_timeout=CACHE_SOCKET_TIMEOUT
+            )
+            logger.info("Cache service initialized with Redis")
+        else:
+            logger.info("Cache service initialized without Redis; persistent caching disabled")
+        self.initialized = True
+    
+    async def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        """Fetch several raw values in one round trip; missing keys come back as None"""
+        if self.client is None or not keys:
+            return [None] * len(keys)
+        try:
+            return await self.client.mget(keys)
+        except RedisError as e:
+            logger.warning(f"Cache read failed: {str(e)}")
+            return [None] * len(keys)
+    
+    async def set_many(self, values: Dict[str, bytes], ttl: int = CACHE_TTL):
+        """Store several raw values with a TTL in one pipeline"""
+        if self.client is None or not values:
+            return
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                for key, value in values.items():
+                    pipe.set(key, value, ex=ttl)
+                await pipe.execute()
+        except RedisError as e:
+            logger.warning(f"Cache write failed: {str(e)}")
+    
+    async def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[T]],
+        encode: Callable[[T], bytes],
+        decode: Callable[[bytes], T],
+        ttl: int = CACHE_TTL
+    ) -> T:
+        """Return the cached value for key, computing and storing it on a miss"""
+        cached, = await self.get_many([key])
+        if cached is not None:
+            return decode(cached)
+        
+        value = await compute()
+        await self.set_many({key: encode(value)}, ttl)
+        return value
+    
+    async def close(self):
+        """Close the Redis connection pool"""
+        try:
+            if self.client:
+                await self.client.close()
+            logger.info("Cache service closed")
+        except Exception as e:
+            logger.error(f"Error closing cache service: {str(e)}")
+
+
+# Global cache service instance
+cache_service = CacheService()
+
+
+async def get_cache_service() -> CacheService:
+    """Get the global cache service instance"""
+    if not cache_service.initialized:
+        await cache_service.initialize()
+    return cache_service
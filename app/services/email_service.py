@@ -6,10 +6,12 @@ import asyncio
 import email
 import imaplib
 import smtplib
+import time
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
-from email.mime.text import MimeText
-from email.mime.multipart import MimeMultipart
-from typing import List, Dict, Optional, Any
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
+from typing import List, Dict, Optional, Any, Tuple, AsyncIterator
 from dataclasses import dataclass
 import json
 
@@ -18,6 +20,11 @@ from app.core.config import settings
 
 logger = get_logger(__name__)
 
+# Logged-in IMAP connections kept per (server, account), and how long one
+# may sit unused before it is replaced rather than reused
+IMAP_POOL_SIZE = 2
+IMAP_IDLE_TIMEOUT = 600
+
 
 @dataclass
 class EmailMessage:
@@ -44,6 +51,8 @@ class EmailService:
         self.imap_connection = None
         self.smtp_connection = None
         self.email_config = None
+        # (imap_server, email) -> (in-use limit, idle (connection, last_used) pairs)
+        self._imap_pools: Dict[Tuple[str, str], Tuple[asyncio.Semaphore, List[Tuple[imaplib.IMAP4_SSL, float]]]] = {}
     
     async def configure_email_access(
         self,
@@ -100,42 +109,110 @@ class EmailService:
     ) -> List[EmailMessage]:
         """Fetch recent emails from specified folder"""
         try:
-            imap = imaplib.IMAP4_SSL(self.email_config["imap_server"], self.email_config["imap_port"])
-            imap.login(self.email_config["email"], self.email_config["password"])
-            
-            # Select folder
-            imap.select(folder)
-            
-            # Search for recent emails
-            date_since = (datetime.now() - timedelta(days=days_back)).strftime("%d-%b-%Y")
-            search_criteria = f'(SINCE "{date_since}")'
-            if not include_read:
-                search_criteria += ' UNSEEN'
-            
-            _, message_numbers = imap.search(None, search_criteria)
+            # imaplib is blocking, so the IMAP round trips run on a worker thread
+            async with self._imap_connection() as imap:
+                raw_messages = await asyncio.to_thread(
+                    self._fetch_raw_messages, imap, folder, limit, days_back, include_read
+                )
             
             emails = []
-            for num in message_numbers[0].split()[-limit:]:
+            for message_id, email_body in raw_messages:
                 try:
-                    _, msg_data = imap.fetch(num, '(RFC822)')
-                    email_body = msg_data[0][1]
                     email_message = email.message_from_bytes(email_body)
                     
                     # Parse email
-                    parsed_email = await self._parse_email_message(email_message, num.decode())
+                    parsed_email = await self._parse_email_message(email_message, message_id)
                     emails.append(parsed_email)
                     
                 except Exception as e:
-                    logger.error(f"Error parsing email {num}: {str(e)}")
+                    logger.error(f"Error parsing email {message_id}: {str(e)}")
                     continue
             
-            imap.logout()
             return emails
             
         except Exception as e:
             logger.error(f"Error fetching emails: {str(e)}")
             return []
     
+    def _fetch_raw_messages(
+        self,
+        imap: imaplib.IMAP4_SSL,
+        folder: str,
+        limit: int,
+        days_back: int,
+        include_read: bool
+    ) -> List[Tuple[str, bytes]]:
+        """Blocking IMAP fetch returning (message_id, raw RFC822 bytes) pairs"""
+        # Select folder
+        imap.select(folder)
+        
+        # Search for recent emails
+        date_since = (datetime.now() - timedelta(days=days_back)).strftime("%d-%b-%Y")
+        search_criteria = f'(SINCE "{date_since}")'
+        if not include_read:
+            search_criteria += ' UNSEEN'
+        
+        _, message_numbers = imap.search(None, search_criteria)
+        
+        raw_messages = []
+        for num in message_numbers[0].split()[-limit:]:
+            try:
+                _, msg_data = imap.fetch(num, '(RFC822)')
+                raw_messages.append((num.decode(), msg_data[0][1]))
+            except Exception as e:
+                logger.error(f"Error fetching email {num}: {str(e)}")
+                continue
+        
+        return raw_messages
+    
+    def _open_imap(self) -> imaplib.IMAP4_SSL:
+        """Open and log in a new IMAP connection (blocking)"""
+        imap = imaplib.IMAP4_SSL(self.email_config["imap_server"], self.email_config["imap_port"])
+        imap.login(self.email_config["email"], self.email_config["password"])
+        return imap
+    
+    @staticmethod
+    def _close_imap(imap: imaplib.IMAP4_SSL):
+        """Log out of an IMAP connection, ignoring errors on a dead socket (blocking)"""
+        try:
+            imap.logout()
+        except Exception:
+            pass
+    
+    @asynccontextmanager
+    async def _imap_connection(self) -> AsyncIterator[imaplib.IMAP4_SSL]:
+        """Borrow a logged-in IMAP connection from the pool for the current account
+        
+        At most IMAP_POOL_SIZE connections are in use per account; further
+        callers wait for one to be returned. Connections idle for longer than
+        IMAP_IDLE_TIMEOUT, or that failed during use, are closed instead of
+        being reused.
+        """
+        key = (self.email_config["imap_server"], self.email_config["email"])
+        if key not in self._imap_pools:
+            self._imap_pools[key] = (asyncio.Semaphore(IMAP_POOL_SIZE), [])
+        slots, idle = self._imap_pools[key]
+        
+        async with slots:
+            imap = None
+            while idle and imap is None:
+                imap, last_used = idle.pop()
+                if time.monotonic() - last_used > IMAP_IDLE_TIMEOUT:
+                    await asyncio.to_thread(self._close_imap, imap)
+                    imap = None
+            
+            try:
+                if imap is None:
+                    imap = await asyncio.to_thread(self._open_imap)
+                yield imap
+            except BaseException:
+                # Don't hand a connection in an unknown state to the next caller
+                if imap is not None:
+                    await asyncio.to_thread(self._close_imap, imap)
+                raise
+            else:
+                idle.append((imap, time.monotonic()))
+    
     async def _parse_email_message(self, email_message: email.message.Message, message_id: str) -> EmailMessage:
         """Parse email message into structured format"""
         # Extract basic headers
@@ -246,7 +323,7 @@ class EmailService:
             smtp.starttls()
             smtp.login(self.email_config["email"], self.email_config["password"])
             
-            msg = MimeMultipart()
+            msg = MIMEMultipart()
             msg["From"] = self.email_config["email"]
             msg["To"] = ", ".join(to)
             msg["Subject"] = subject
@@ -255,12 +332,12 @@ class EmailService:
                 msg["Cc"] = ", ".join(cc)
             
             # Add text content
-            text_part = MimeText(content, "plain")
+            text_part = MIMEText(content, "plain")
             msg.attach(text_part)
             
             # Add HTML content if provided
             if html_content:
-                html_part = MimeText(html_content, "html")
+                html_part = MIMEText(html_content, "html")
                 msg.attach(html_part)
             
             # Send email
@@ -3,13 +3,18 @@ Enhanced AEON service layer for Phase 2 with RAG capabilities
 Extends the original AEON service with hybrid memory system and intelligent context retrieval
 """
 
+import asyncio
+import hashlib
+import json
 import time
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, AsyncIterator, Set
+import orjson
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 
 from app.database.models import User, Conversation, ChatMessage, MemoryEntry
+from app.database.session import SessionLocal
 from app.models.aeon import (
     ChatRequest, ChatResponse, ChatMessageCreate, ChatMessageResponse, ConversationResponse,
     MemoryEntryCreate, AEONStatus, MessageRole, MessageType
@@ -17,54 +22,74 @@ from app.models.aeon import (
 from app.core.config import settings
 from app.core.logging import get_logger
 from app.services.aeon_service import AEONService
-from app.services.rag_service import get_rag_service
-from app.services.vector_service import get_vector_service
-from app.services.graph_service import get_graph_service
+from app.services.rag_service import RAGService, get_rag_service
+from app.services.vector_service import VectorService, get_vector_service
+from app.services.graph_service import GraphService, get_graph_service
 
 logger = get_logger(__name__)
 
+# Strong references to fire-and-forget tasks so they are not collected mid-flight
+_background_tasks: Set[asyncio.Task] = set()
+
+
+def _spawn_background(coro) -> asyncio.Task:
+    """Run a coroutine in the background, keeping a reference until it finishes"""
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Format a server-sent event frame"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
 
 class EnhancedAEONService(AEONService):
     """Enhanced AEON service with Phase 2 RAG capabilities"""
     
     @staticmethod
-    async def chat_with_aeon_enhanced(db: Session, user_id: int, chat_request: ChatRequest) -> ChatResponse:
-        """Enhanced chat function with RAG-powered memory retrieval"""
+    async def chat_with_aeon_enhanced(
+        db: Session,
+        user_id: int,
+        chat_request: ChatRequest,
+        rag_service: Optional[RAGService] = None
+    ) -> ChatResponse:
+        """Enhanced chat function with RAG-powered memory retrieval
+        
+        The RAG service is normally injected by the route; it is only resolved
+        here when the caller did not supply one.
+        """
         start_time = time.time()
         
-        try:
-            # Get or create conversation
-            conversation_id = chat_request.conversation_id
-            if not conversation_id:
-                conversation = AEONService.create_conversation(db, user_id)
-                conversation_id = conversation.id
-            
-            # Verify conversation belongs to user
-            conversation = AEONService.get_conversation(db, conversation_id, user_id)
-            if not conversation:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Conversation not found"
-                )
-            
-            # Add user message to database
-            user_message = AEONService.add_message_to_conversation(
-                db, conversation_id, user_id, chat_request.message, MessageRole.USER
+        # Get or create conversation
+        conversation_id = chat_request.conversation_id
+        if not conversation_id:
+            conversation = AEONService.create_conversation(db, user_id)
+            conversation_id = conversation.id
+        
+        # Verify conversation belongs to user
+        conversation = AEONService.get_conversation(db, conversation_id, user_id)
+        if not conversation:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Conversation not found"
             )
-            
-            # Get conversation history for context
-            messages = AEONService.get_conversation_messages(db, conversation_id, limit=20)
-            conversation_history = []
-            
-            for msg in messages[-10:]:  # Last 10 messages
-                role = "user" if msg.role == "user" else "assistant"
-                conversation_history.append({
-                    "role": role,
-                    "content": msg.content
-                })
-            
+        
+        # Add user message to database
+        AEONService.add_message_to_conversation(
+            db, conversation_id, user_id, chat_request.message, MessageRole.USER
+        )
+        
+        # Get conversation history for context (shared with the fallback path)
+        conversation_history = [
+            {"role": role, "content": content}
+            for role, content in AEONService.get_recent_history_tuples(db, conversation_id)
+        ]
+        
+        try:
             # Generate enhanced response using RAG
-            rag_service = await get_rag_service()
+            rag_service = rag_service or await get_rag_service()
             response_data = await rag_service.generate_enhanced_response(
                 user_id=user_id,
                 user_message=chat_request.message,
@@ -82,12 +107,9 @@ class EnhancedAEONService(AEONService):
             # Calculate response time
             response_time = time.time() - start_time
             
-            # Convert to response models
-            aeon_message_response = ChatMessageResponse.model_validate(aeon_message)
-            
             # Build enhanced response with metadata
             enhanced_response = ChatResponse(
-                message=aeon_message_response,
+                message=aeon_message,
                 conversation_id=conversation_id,
                 response_time=response_time
             )
@@ -97,7 +119,8 @@ class EnhancedAEONService(AEONService):
                 enhanced_response.__dict__.update({
                     "context_sources": response_data.get("context_used", {}),
                     "memories_referenced": response_data.get("memories_referenced", 0),
-                    "ai_tokens_used": response_data.get("tokens_used", 0)
+                    "ai_tokens_used": response_data.get("tokens_used", 0),
+                    "ai_cached_tokens": response_data.get("cached_tokens")
                 })
             
             logger.info(f"Enhanced chat response generated in {response_time:.2f}s with {response_data.get('memories_referenced', 0)} memories")
@@ -105,14 +128,120 @@ class EnhancedAEONService(AEONService):
             
         except Exception as e:
             logger.error(f"Enhanced chat failed: {str(e)}")
-            # Fallback to original chat method
-            return await EnhancedAEONService._fallback_chat(db, user_id, chat_request, start_time)
+            # Fallback to original chat method, reusing the history fetched above
+            fallback_request = chat_request.model_copy(update={"conversation_id": conversation_id})
+            return await EnhancedAEONService._fallback_chat(
+                db, user_id, fallback_request, start_time, conversation_history
+            )
+    
+    @staticmethod
+    async def chat_with_aeon_enhanced_stream(
+        db: Session,
+        user_id: int,
+        chat_request: ChatRequest,
+        rag_service: Optional[RAGService] = None
+    ) -> AsyncIterator[str]:
+        """Enhanced chat that streams the response as server-sent events"""
+        # Get or create conversation
+        conversation_id = chat_request.conversation_id
+        if not conversation_id:
+            conversation = AEONService.create_conversation(db, user_id)
+            conversation_id = conversation.id
+        
+        # Verify conversation belongs to user before the stream starts
+        conversation = AEONService.get_conversation(db, conversation_id, user_id)
+        if not conversation:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Conversation not found"
+            )
+        
+        # Add user message to database
+        AEONService.add_message_to_conversation(
+            db, conversation_id, user_id, chat_request.message, MessageRole.USER
+        )
+        
+        # Get conversation history for context
+        conversation_history = [
+            {"role": role, "content": content}
+            for role, content in AEONService.get_recent_history_tuples(db, conversation_id)
+        ]
+        
+        rag_service = rag_service or await get_rag_service()
+        
+        async def event_stream() -> AsyncIterator[str]:
+            start_time = time.time()
+            chunks = []
+            yield _sse_event("start", {"conversation_id": conversation_id})
+            
+            failed = False
+            try:
+                async for delta in rag_service.generate_enhanced_response_stream(
+                    user_id=user_id,
+                    user_message=chat_request.message,
+                    conversation_history=conversation_history,
+                    conversation_id=conversation_id
+                ):
+                    chunks.append(delta)
+                    yield _sse_event("delta", {"content": delta})
+            except Exception as e:
+                failed = True
+                logger.error(f"Enhanced chat stream failed: {str(e)}")
+            finally:
+                # Also reached when the client disconnects mid-stream, so the reply
+                # it has already seen is stored; the bookkeeping never delays "done"
+                if not failed:
+                    _spawn_background(EnhancedAEONService._complete_streamed_turn(
+                        rag_service, conversation_id, user_id, chat_request.message, "".join(chunks).strip()
+                    ))
+            
+            if failed:
+                yield _sse_event("error", {"detail": "Chat service temporarily unavailable"})
+                return
+            
+            yield _sse_event("done", {
+                "conversation_id": conversation_id,
+                "response_time": time.time() - start_time
+            })
+        
+        return event_stream()
+    
+    @staticmethod
+    async def _complete_streamed_turn(
+        rag_service: RAGService,
+        conversation_id: int,
+        user_id: int,
+        user_message: str,
+        content: str
+    ):
+        """Persist a streamed AEON response, then store it for future retrieval"""
+        if not content:
+            return
+        await asyncio.to_thread(
+            EnhancedAEONService._persist_assistant_message, conversation_id, user_id, content
+        )
+        await rag_service.finalize_response(user_id, user_message, content, conversation_id)
+    
+    @staticmethod
+    def _persist_assistant_message(conversation_id: int, user_id: int, content: str):
+        """Store a streamed AEON response using a session independent of the request"""
+        db = SessionLocal()
+        try:
+            AEONService.add_message_to_conversation(
+                db, conversation_id, user_id, content, MessageRole.AEON
+            )
+        except Exception as e:
+            logger.error(f"Failed to persist streamed response: {str(e)}")
+        finally:
+            db.close()
     
     @staticmethod
     async def create_memory_entry_enhanced(
         db: Session, 
         user_id: int, 
-        memory_data: MemoryEntryCreate
+        memory_data: MemoryEntryCreate,
+        rag_service: Optional[RAGService] = None,
+        graph_service: Optional[GraphService] = None
     ) -> Dict[str, Any]:
         """Enhanced memory creation with vector and graph storage"""
         try:
@@ -120,19 +249,19 @@ class EnhancedAEONService(AEONService):
             memory = AEONService.create_memory_entry(db, user_id, memory_data)
             
             # Store in hybrid memory system
-            rag_service = await get_rag_service()
+            rag_service = rag_service or await get_rag_service()
             rag_result = await rag_service.store_memory_with_context(
                 user_id=user_id,
                 content=memory_data.content,
                 memory_type=memory_data.memory_type,
                 importance=memory_data.importance,
-                metadata=memory_data.metadata
+                metadata=memory_data.meta_data
             )
             
             # Create user node in graph if it doesn't exist
             user = db.query(User).filter(User.id == user_id).first()
             if user:
-                graph_service = await get_graph_service()
+                graph_service = graph_service or await get_graph_service()
                 await graph_service.create_user_node(
                     user_id=user_id,
                     username=user.username,
@@ -161,18 +290,36 @@ class EnhancedAEONService(AEONService):
             }
     
     @staticmethod
-    async def get_enhanced_aeon_status(db: Session, user_id: int) -> Dict[str, Any]:
+    def get_status_etag(status_info: Dict[str, Any]) -> Optional[str]:
+        """Weak ETag over the full enhanced status, or None for the degraded fallback
+        
+        The tag covers the vector/graph health and counts as well as the SQL
+        totals, so a recovered (or failed) backend always changes it. Fallback
+        bodies are never tagged, so clients cannot keep revalidating them.
+        """
+        if "error" in status_info.get("hybrid_memory", {}):
+            return None
+        body = orjson.dumps(status_info, option=orjson.OPT_SORT_KEYS, default=str)
+        return f'W/"{hashlib.sha1(body).hexdigest()}"'
+    
+    @staticmethod
+    async def get_enhanced_aeon_status(
+        db: Session,
+        user_id: int,
+        vector_service: Optional[VectorService] = None,
+        graph_service: Optional[GraphService] = None
+    ) -> Dict[str, Any]:
         """Get enhanced AEON status with hybrid memory system info"""
         try:
             # Get basic status
             basic_status = AEONService.get_aeon_status(db, user_id)
             
             # Get vector database info
-            vector_service = await get_vector_service()
+            vector_service = vector_service or await get_vector_service()
             vector_health = await vector_service.get_health_status()
             
             # Get graph database info
-            graph_service = await get_graph_service()
+            graph_service = graph_service or await get_graph_service()
             graph_health = await graph_service.get_health_status()
             knowledge_graph = await graph_service.get_user_knowledge_graph(user_id)
             
@@ -218,20 +365,21 @@ class EnhancedAEONService(AEONService):
         query: str,
         memory_type: Optional[str] = None,
         min_importance: int = 1,
-        limit: int = 10
+        limit: int = 10,
+        rag_service: Optional[RAGService] = None
     ) -> Dict[str, Any]:
         """Enhanced memory search using hybrid vector and graph approach"""
         try:
-            # Get traditional database memories
-            traditional_memories = AEONService.get_user_memories(db, user_id, memory_type)
-            
-            # Get RAG-powered search results
-            rag_service = await get_rag_service()
-            context_data = await rag_service.retrieve_relevant_context(
-                user_id=user_id,
-                query=query,
-                max_memories=limit,
-                include_graph_context=True
+            # Run the traditional database query and the RAG-powered search concurrently
+            rag_service = rag_service or await get_rag_service()
+            traditional_memories, context_data = await asyncio.gather(
+                asyncio.to_thread(AEONService.get_user_memories, db, user_id, memory_type),
+                rag_service.retrieve_relevant_context(
+                    user_id=user_id,
+                    query=query,
+                    max_memories=limit,
+                    include_graph_context=True
+                )
             )
             
             return {
@@ -246,42 +394,50 @@ class EnhancedAEONService(AEONService):
         except Exception as e:
             logger.error(f"Enhanced memory search failed: {str(e)}")
             # Fallback to traditional search
-            traditional_memories = AEONService.get_user_memories(db, user_id, memory_type)
+            traditional_memories = AEONService.get_user_memories(db, user_id, memory_type, limit=limit)
             return {
                 "query": query,
                 "traditional_results": len(traditional_memories),
-                "memories": traditional_memories[:limit],
+                "memories": traditional_memories,
                 "error": str(e)
             }
     
     @staticmethod
-    async def initialize_user_graph(db: Session, user_id: int) -> Dict[str, Any]:
+    async def initialize_user_graph(
+        db: Session,
+        user_id: int,
+        graph_service: Optional[GraphService] = None
+    ) -> Dict[str, Any]:
         """Initialize user in the graph database"""
         try:
             user = db.query(User).filter(User.id == user_id).first()
             if not user:
                 raise HTTPException(status_code=404, detail="User not found")
             
-            graph_service = await get_graph_service()
-            await graph_service.create_user_node(
-                user_id=user_id,
-                username=user.username,
-                email=user.email,
-                metadata={
-                    "full_name": user.full_name,
-                    "bio": user.bio,
-                    "role": user.role
-                }
-            )
-            
-            # Create conversation nodes for existing conversations
+            graph_service = graph_service or await get_graph_service()
             conversations = db.query(Conversation).filter(Conversation.user_id == user_id).all()
-            for conv in conversations:
-                await graph_service.create_conversation_node(
-                    conversation_id=conv.id,
+            
+            async with graph_service.transaction() as tx:
+                await graph_service.create_user_node(
                     user_id=user_id,
-                    title=conv.title
+                    username=user.username,
+                    email=user.email,
+                    metadata={
+                        "full_name": user.full_name,
+                        "bio": user.bio,
+                        "role": user.role
+                    },
+                    tx=tx
                 )
+                
+                # Create conversation nodes for existing conversations
+                for conv in conversations:
+                    await graph_service.create_conversation_node(
+                        conversation_id=conv.id,
+                        user_id=user_id,
+                        title=conv.title,
+                        tx=tx
+                    )
             
             logger.info(f"User graph initialized for user {user_id}")
             return {
@@ -298,11 +454,20 @@ class EnhancedAEONService(AEONService):
             }
     
     @staticmethod
-    async def _fallback_chat(db: Session, user_id: int, chat_request: ChatRequest, start_time: float) -> ChatResponse:
+    async def _fallback_chat(
+        db: Session,
+        user_id: int,
+        chat_request: ChatRequest,
+        start_time: float,
+        conversation_history: Optional[List[Dict[str, str]]] = None
+    ) -> ChatResponse:
         """Fallback to original chat method if enhanced fails"""
         try:
             logger.warning("Using fallback chat method")
-            return AEONService.chat_with_aeon(db, user_id, chat_request)
+            # chat_with_aeon is synchronous (blocking DB + OpenAI calls); run it off the event loop
+            return await asyncio.to_thread(
+                AEONService.chat_with_aeon, db, user_id, chat_request, conversation_history
+            )
         except Exception as e:
             logger.error(f"Fallback chat also failed: {str(e)}")
             raise HTTPException(
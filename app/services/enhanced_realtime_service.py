@@ -3,91 +3,272 @@ Enhanced real-time service for AEON with email and web activity integration
 """
 
 import asyncio
-import json
+import heapq
 import time
+import orjson
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Set
+from typing import Dict, List, Optional, Any, Set, Tuple
 from fastapi import WebSocket, WebSocketDisconnect
-from sqlalchemy.orm import Session
 
 from app.core.logging import get_logger
 from app.services.email_service import email_service, EmailMessage
 from app.services.web_activity_service import web_activity_tracker, WebActivity, WebSession
-from app.services.realtime_service import ConnectionManager, RealTimeService
+from app.services.realtime_service import ClientConnection, ConnectionManager, RealTimeService, _encode
 from app.database.models import User
+from app.database.session import SessionLocal
 
 logger = get_logger(__name__)
 
+# Email is polled over IMAP, so it is checked on this interval; web activity
+# is pushed by the tracker, which brings the user's next check forward
+EMAIL_CHECK_INTERVAL = 300
+# Minimum spacing between web activity checks, so bursts of events coalesce
+ACTIVITY_CHECK_MIN_INTERVAL = 30
+# How long a computed email/activity summary may be reused
+SUMMARY_CACHE_TTL = 10
+# A monitoring tick slower than this is logged as a likely blocking call
+SLOW_TICK_THRESHOLD = 1.0
+
+# Constant payload pieces, built once rather than on every reminder
+_PRODUCTIVITY_REMINDER_MESSAGE = "Your productivity score is low. Consider focusing on work-related activities."
+_PRODUCTIVITY_SUGGESTIONS = (
+    "Switch to work-related websites",
+    "Take a break from social media",
+    "Focus on learning activities"
+)
+
+
+@dataclass(slots=True)
+class ConnectionState:
+    """Per-connection monitoring state for the enhanced manager, dropped as one unit on disconnect
+    
+    Outgoing messages go through the base manager's per-connection queue and
+    writer, so there is a single writer and backpressure policy per socket.
+    """
+    email_config: Optional[Dict[str, Any]] = None
+    next_email_check: float = 0.0
+    last_activity_check: float = 0.0
+    # Message type -> hash of the last payload sent, for skipping repeats
+    last_sent: Dict[str, int] = field(default_factory=dict)
+
 
 class EnhancedConnectionManager(ConnectionManager):
     """Enhanced connection manager with email and web activity tracking"""
     
     def __init__(self):
         super().__init__()
-        self.user_email_configs: Dict[int, Dict] = {}
-        self.user_activity_sessions: Dict[int, Dict] = {}
-        self.activity_monitoring_tasks: Dict[int, asyncio.Task] = {}
+        self.connection_states: Dict[int, ConnectionState] = {}
+        
+        # Shared monitoring scheduler: a heap of (deadline, user_id) entries,
+        # with _next_check holding each user's live deadline
+        self._monitored_users: Set[int] = set()
+        self._due: List[Tuple[float, int]] = []
+        self._next_check: Dict[int, float] = {}
+        self._scheduler_task: Optional[asyncio.Task] = None
+        self._wake_any: Optional[asyncio.Event] = None
+        
+        # (kind, user_id, days) -> (computed_at, summary)
+        self._summary_cache: Dict[Tuple[str, int, int], Tuple[float, Dict[str, Any]]] = {}
+        
+        # Strong references to fire-and-forget tasks until they finish
+        self._background_tasks: Set[asyncio.Task] = set()
+        
+        web_activity_tracker.add_activity_listener(self.wake)
+    
+    def wake(self, user_id: int):
+        """Bring the user's next check forward because new data has arrived"""
+        self.invalidate_summaries(user_id, "activity")
+        state = self.connection_states.get(user_id)
+        if state is None or user_id not in self._monitored_users:
+            return
+        # Let a burst of events settle into a single check
+        earliest = state.last_activity_check + ACTIVITY_CHECK_MIN_INTERVAL
+        self._schedule(user_id, max(earliest, time.monotonic()))
     
-    async def connect(self, websocket: WebSocket, user_id: int, username: str):
+    async def connect(self, websocket: WebSocket, user_id: int, username: str) -> ClientConnection:
         """Connect a user and start monitoring their activities"""
-        await super().connect(websocket, user_id, username)
+        connection = await super().connect(websocket, user_id, username)
+        self.connection_states[user_id] = ConnectionState()
         
         # Start activity monitoring
         await self.start_activity_monitoring(user_id)
         
-        logger.info(f"Enhanced connection established for user {username} (ID: {user_id})")
+        logger.debug("Enhanced connection established for user %s (ID: %s)", username, user_id)
+        return connection
     
     def disconnect(self, user_id: int):
         """Disconnect a user and stop monitoring"""
         # Stop activity monitoring
         self.stop_activity_monitoring(user_id)
         
-        # End web session
-        asyncio.create_task(web_activity_tracker.end_session(user_id))
+        # Drop the monitoring state
+        self.connection_states.pop(user_id, None)
+        
+        # End web session; disconnect stays synchronous because the base
+        # manager calls it from its own send paths
+        task = asyncio.create_task(web_activity_tracker.end_session(user_id))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        
+        self.invalidate_summaries(user_id)
         
         super().disconnect(user_id)
         
-        logger.info(f"Enhanced disconnection for user {user_id}")
+        logger.debug("Enhanced disconnection for user %s", user_id)
+    
+    async def get_activity_summary(self, user_id: int, days: int = 1) -> Dict[str, Any]:
+        """Web activity summary, reused for a few seconds unless new activity arrives"""
+        return await self._cached_summary(
+            "activity", user_id, days,
+            lambda: web_activity_tracker.get_user_activity_summary(user_id, days=days)
+        )
+    
+    async def get_email_summary(self, user_id: int, days: int = 7) -> Dict[str, Any]:
+        """Email summary, reused for a few seconds to avoid repeated IMAP round trips"""
+        return await self._cached_summary(
+            "email", user_id, days,
+            lambda: email_service.get_email_summary(days=days)
+        )
+    
+    async def _cached_summary(self, kind: str, user_id: int, days: int, compute) -> Dict[str, Any]:
+        """Return a cached summary if it is still fresh, otherwise compute and store it"""
+        key = (kind, user_id, days)
+        now = time.monotonic()
+        
+        cached = self._summary_cache.get(key)
+        if cached is not None and now - cached[0] < SUMMARY_CACHE_TTL:
+            return cached[1]
+        
+        summary = await compute()
+        self._summary_cache[key] = (now, summary)
+        return summary
+    
+    def invalidate_summaries(self, user_id: int, kind: Optional[str] = None):
+        """Drop a user's cached summaries, optionally only those of one kind"""
+        for key in [k for k in self._summary_cache if k[1] == user_id and (kind is None or k[0] == kind)]:
+            del self._summary_cache[key]
+    
+    def emit(self, user_id: int, msg_type: str, data: Any):
+        """Queue a message on the user's connection; dropped if the user is offline"""
+        if user_id in self.connection_states:
+            self._queue_message(_encode({"type": msg_type, "data": data}), user_id)
+    
+    def _emit_if_changed(self, user_id: int, state: ConnectionState, msg_type: str, data: Dict[str, Any]):
+        """Queue a periodic notification unless it repeats the last one of its type"""
+        payload_hash = hash(orjson.dumps(data))
+        if state.last_sent.get(msg_type) == payload_hash:
+            return
+        state.last_sent[msg_type] = payload_hash
+        self.emit(user_id, msg_type, data)
     
     async def start_activity_monitoring(self, user_id: int):
         """Start monitoring user's email and web activities"""
-        if user_id in self.activity_monitoring_tasks:
+        if user_id in self._monitored_users:
             return
         
-        # Create monitoring task
-        task = asyncio.create_task(self._monitor_user_activities(user_id))
-        self.activity_monitoring_tasks[user_id] = task
+        self._monitored_users.add(user_id)
+        self._ensure_scheduler()
+        self._schedule(user_id, time.monotonic())
         
-        logger.info(f"Started activity monitoring for user {user_id}")
+        logger.debug("Started activity monitoring for user %s", user_id)
     
     def stop_activity_monitoring(self, user_id: int):
         """Stop monitoring user's activities"""
-        if user_id in self.activity_monitoring_tasks:
-            self.activity_monitoring_tasks[user_id].cancel()
-            del self.activity_monitoring_tasks[user_id]
-            
-            logger.info(f"Stopped activity monitoring for user {user_id}")
+        if user_id not in self._monitored_users:
+            return
+        
+        # Any heap entries left for the user are discarded by the scheduler
+        self._monitored_users.discard(user_id)
+        self._next_check.pop(user_id, None)
+        
+        logger.debug("Stopped activity monitoring for user %s", user_id)
+    
+    def _ensure_scheduler(self):
+        """Start the shared monitoring scheduler if it is not running"""
+        if self._scheduler_task is None or self._scheduler_task.done():
+            # Created here so the event binds to the running loop
+            self._wake_any = asyncio.Event()
+            self._scheduler_task = asyncio.create_task(self._run_scheduler())
     
-    async def _monitor_user_activities(self, user_id: int):
-        """Monitor user's email and web activities in real-time"""
+    def _schedule(self, user_id: int, deadline: float):
+        """Schedule the user's next check, keeping an earlier one if already set"""
+        current = self._next_check.get(user_id)
+        if current is not None and current <= deadline:
+            return
+        self._next_check[user_id] = deadline
+        heapq.heappush(self._due, (deadline, user_id))
+        if self._wake_any is not None:
+            self._wake_any.set()
+    
+    async def _run_scheduler(self):
+        """Single task that runs every user's activity checks as they fall due"""
         try:
-            while user_id in self.active_connections:
-                # Check for new emails (every 5 minutes)
-                if user_id in self.user_email_configs:
-                    await self._check_new_emails(user_id)
+            while True:
+                self._wake_any.clear()
+                
+                # Drop entries superseded by a reschedule or a disconnect
+                while self._due and self._next_check.get(self._due[0][1]) != self._due[0][0]:
+                    heapq.heappop(self._due)
+                
+                if not self._due:
+                    await self._wake_any.wait()
+                    continue
+                
+                delay = self._due[0][0] - time.monotonic()
+                if delay > 0:
+                    try:
+                        await asyncio.wait_for(self._wake_any.wait(), timeout=delay)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
                 
-                # Check for web activity updates (every 30 seconds)
-                await self._check_web_activity_updates(user_id)
+                now = time.monotonic()
+                due_users = []
+                while self._due and self._due[0][0] <= now:
+                    deadline, user_id = heapq.heappop(self._due)
+                    if self._next_check.get(user_id) == deadline:
+                        del self._next_check[user_id]
+                        due_users.append(user_id)
                 
-                # Wait before next check
-                await asyncio.sleep(30)
+                await asyncio.gather(*(self._monitor_tick(user_id) for user_id in due_users))
                 
         except asyncio.CancelledError:
-            logger.info(f"Activity monitoring cancelled for user {user_id}")
+            logger.info("Activity monitoring scheduler cancelled")
         except Exception as e:
-            logger.error(f"Error in activity monitoring for user {user_id}: {str(e)}")
+            logger.error("Error in activity monitoring scheduler: %s", e)
+    
+    async def _monitor_tick(self, user_id: int):
+        """Run one round of email and web activity checks for a user"""
+        if (state := self.connection_states.get(user_id)) is None:
+            self.stop_activity_monitoring(user_id)
+            return
+        
+        started = time.monotonic()
+        try:
+            now = started
+            
+            # Check for new emails (every 5 minutes)
+            if state.email_config is not None and now >= state.next_email_check:
+                await self._check_new_emails(user_id, state)
+                state.next_email_check = now + EMAIL_CHECK_INTERVAL
+            
+            # Check for web activity updates
+            await self._check_web_activity_updates(user_id, state)
+            state.last_activity_check = time.monotonic()
+            
+        except Exception as e:
+            logger.error("Error in activity monitoring for user %s: %s", user_id, e)
+        
+        elapsed = time.monotonic() - started
+        if elapsed > SLOW_TICK_THRESHOLD:
+            logger.warning("Activity monitoring tick for user %s took %.2fs", user_id, elapsed)
+        
+        # Safety-net check even if the tracker never reports new activity
+        if user_id in self._monitored_users:
+            self._schedule(user_id, time.monotonic() + EMAIL_CHECK_INTERVAL)
     
-    async def _check_new_emails(self, user_id: int):
+    async def _check_new_emails(self, user_id: int, state: ConnectionState):
         """Check for new emails and notify user"""
         try:
             # Fetch recent unread emails
@@ -100,176 +281,147 @@ class EnhancedConnectionManager(ConnectionManager):
             
             if emails:
                 # Send email summary to user
-                await self._send_email_summary(user_id, emails)
+                summary, urgent_emails = self._build_email_summary(emails)
+                self._emit_if_changed(user_id, state, "email_summary", summary)
                 
-                # Check for urgent emails
-                urgent_emails = [e for e in emails if e.importance >= 4]
+                # Alert on urgent emails
                 if urgent_emails:
-                    await self._send_urgent_email_alert(user_id, urgent_emails)
+                    self._emit_if_changed(user_id, state, "urgent_email_alert", {
+                        "message": f"You have {len(urgent_emails)} urgent emails",
+                        "emails": [
+                            {
+                                "subject": email.subject,
+                                "sender": email.sender,
+                                "importance": email.importance
+                            }
+                            for email in urgent_emails
+                        ]
+                    })
                     
         except Exception as e:
-            logger.error(f"Error checking emails for user {user_id}: {str(e)}")
+            logger.error("Error checking emails for user %s: %s", user_id, e)
     
-    async def _check_web_activity_updates(self, user_id: int):
+    async def _check_web_activity_updates(self, user_id: int, state: ConnectionState):
         """Check for web activity updates and provide insights"""
         try:
             # Get recent activity summary
-            summary = await web_activity_tracker.get_user_activity_summary(user_id, days=1)
+            summary = await self.get_activity_summary(user_id, days=1)
             
             # Send activity insights if significant
             if summary["total_activities"] > 10:
-                await self._send_activity_insights(user_id, summary)
+                self._emit_if_changed(user_id, state, "activity_insights", {
+                    "total_activities": summary["total_activities"],
+                    "productivity_score": summary["productivity_score"],
+                    "top_topics": summary["top_topics"],
+                    "domains_visited": len(summary["domains_visited"]),
+                    "recommendations": await web_activity_tracker.get_recommendations(user_id)
+                })
             
             # Check for productivity patterns
             if summary["productivity_score"] < 30:
-                await self._send_productivity_reminder(user_id, summary)
+                self._emit_if_changed(user_id, state, "productivity_reminder", {
+                    "message": _PRODUCTIVITY_REMINDER_MESSAGE,
+                    "productivity_score": summary["productivity_score"],
+                    "suggestions": _PRODUCTIVITY_SUGGESTIONS
+                })
                 
         except Exception as e:
-            logger.error(f"Error checking web activity for user {user_id}: {str(e)}")
+            logger.error("Error checking web activity for user %s: %s", user_id, e)
     
-    async def _send_email_summary(self, user_id: int, emails: List[EmailMessage]):
-        """Send email summary to user"""
-        if user_id not in self.active_connections:
-            return
+    @staticmethod
+    def _build_email_summary(emails: List[EmailMessage]) -> Tuple[Dict[str, Any], List[EmailMessage]]:
+        """Build the email summary payload and pick out the urgent emails in one pass"""
+        unread_count = 0
+        urgent_emails = []
+        recent_emails = []
+        for email in emails:
+            if not email.is_read:
+                unread_count += 1
+            if email.importance >= 4:
+                urgent_emails.append(email)
+            if len(recent_emails) < 5:
+                recent_emails.append({
+                    "subject": email.subject,
+                    "sender": email.sender,
+                    "importance": email.importance,
+                    "sentiment": email.sentiment,
+                    "timestamp": email.timestamp
+                })
         
         summary = {
-            "type": "email_summary",
-            "data": {
-                "total_emails": len(emails),
-                "unread_count": len([e for e in emails if not e.is_read]),
-                "important_count": len([e for e in emails if e.importance >= 4]),
-                "top_senders": {},
-                "recent_emails": [
-                    {
-                        "subject": email.subject,
-                        "sender": email.sender,
-                        "importance": email.importance,
-                        "sentiment": email.sentiment,
-                        "timestamp": email.timestamp.isoformat()
-                    }
-                    for email in emails[:5]
-                ]
-            }
+            "total_emails": len(emails),
+            "unread_count": unread_count,
+            "important_count": len(urgent_emails),
+            "top_senders": {},
+            "recent_emails": recent_emails
         }
-        
-        try:
-            await self.active_connections[user_id].send_text(json.dumps(summary))
-        except Exception as e:
-            logger.error(f"Error sending email summary to user {user_id}: {str(e)}")
+        return summary, urgent_emails
     
-    async def _send_urgent_email_alert(self, user_id: int, urgent_emails: List[EmailMessage]):
-        """Send urgent email alert to user"""
-        if user_id not in self.active_connections:
-            return
-        
-        alert = {
-            "type": "urgent_email_alert",
-            "data": {
-                "message": f"You have {len(urgent_emails)} urgent emails",
-                "emails": [
-                    {
-                        "subject": email.subject,
-                        "sender": email.sender,
-                        "importance": email.importance
-                    }
-                    for email in urgent_emails
-                ]
-            }
-        }
-        
+    async def handle_web_activity_event(self, user_id: int, activity_data: Dict[str, Any]):
+        """Handle web activity events from browser extension"""
         try:
-            await self.active_connections[user_id].send_text(json.dumps(alert))
+            activity = await self._track_web_activity(user_id, activity_data)
+            
+            # Send confirmation back to user
+            self.emit(user_id, "activity_tracked", {
+                "activity_type": activity_data.get("type"),
+                "timestamp": activity.timestamp if activity else datetime.now()
+            })
+                
         except Exception as e:
-            logger.error(f"Error sending urgent email alert to user {user_id}: {str(e)}")
+            logger.error("Error handling web activity event for user %s: %s", user_id, e)
     
-    async def _send_activity_insights(self, user_id: int, summary: Dict[str, Any]):
-        """Send web activity insights to user"""
-        if user_id not in self.active_connections:
-            return
+    async def handle_web_activity_batch(self, user_id: int, batch_data: Dict[str, Any]):
+        """Handle a batch of web activity events sent in one frame, acknowledged once"""
+        events = batch_data.get("events", [])
+        results = await asyncio.gather(
+            *(self._track_web_activity(user_id, event) for event in events),
+            return_exceptions=True
+        )
         
-        insights = {
-            "type": "activity_insights",
-            "data": {
-                "total_activities": summary["total_activities"],
-                "productivity_score": summary["productivity_score"],
-                "top_topics": summary["top_topics"],
-                "domains_visited": len(summary["domains_visited"]),
-                "recommendations": await web_activity_tracker.get_recommendations(user_id)
-            }
-        }
+        failed = [r for r in results if isinstance(r, Exception)]
+        if failed:
+            logger.error("Failed to track %s of %s web activity events for user %s: %s",
+                         len(failed), len(events), user_id, failed[0])
         
-        try:
-            await self.active_connections[user_id].send_text(json.dumps(insights))
-        except Exception as e:
-            logger.error(f"Error sending activity insights to user {user_id}: {str(e)}")
+        self.emit(user_id, "activity_batch_tracked", {
+            "received": len(events),
+            "tracked": sum(1 for r in results if r is not None and not isinstance(r, Exception)),
+            "timestamp": datetime.now()
+        })
     
-    async def _send_productivity_reminder(self, user_id: int, summary: Dict[str, Any]):
-        """Send productivity reminder to user"""
-        if user_id not in self.active_connections:
-            return
-        
-        reminder = {
-            "type": "productivity_reminder",
-            "data": {
-                "message": "Your productivity score is low. Consider focusing on work-related activities.",
-                "productivity_score": summary["productivity_score"],
-                "suggestions": [
-                    "Switch to work-related websites",
-                    "Take a break from social media",
-                    "Focus on learning activities"
-                ]
-            }
-        }
+    async def _track_web_activity(self, user_id: int, activity_data: Dict[str, Any]) -> Optional[WebActivity]:
+        """Record one browser extension event with the web activity tracker"""
+        activity_type = activity_data.get("type")
+        activity = None
         
-        try:
-            await self.active_connections[user_id].send_text(json.dumps(reminder))
-        except Exception as e:
-            logger.error(f"Error sending productivity reminder to user {user_id}: {str(e)}")
-    
-    async def handle_web_activity_event(self, user_id: int, activity_data: Dict[str, Any]):
-        """Handle web activity events from browser extension"""
-        try:
-            activity_type = activity_data.get("type")
+        if activity_type == "page_view":
+            activity = await web_activity_tracker.track_page_view(
+                user_id=user_id,
+                url=activity_data["url"],
+                title=activity_data["title"],
+                referrer=activity_data.get("referrer"),
+                user_agent=activity_data.get("user_agent"),
+                duration=activity_data.get("duration")
+            )
             
-            if activity_type == "page_view":
-                activity = await web_activity_tracker.track_page_view(
-                    user_id=user_id,
-                    url=activity_data["url"],
-                    title=activity_data["title"],
-                    referrer=activity_data.get("referrer"),
-                    user_agent=activity_data.get("user_agent"),
-                    duration=activity_data.get("duration")
-                )
-                
-            elif activity_type == "search":
-                activity = await web_activity_tracker.track_search(
-                    user_id=user_id,
-                    search_query=activity_data["query"],
-                    search_engine=activity_data["engine"],
-                    results_count=activity_data.get("results_count")
-                )
-                
-            elif activity_type == "click":
-                activity = await web_activity_tracker.track_click(
-                    user_id=user_id,
-                    url=activity_data["url"],
-                    element_type=activity_data["element_type"],
-                    element_text=activity_data.get("element_text")
-                )
+        elif activity_type == "search":
+            activity = await web_activity_tracker.track_search(
+                user_id=user_id,
+                search_query=activity_data["query"],
+                search_engine=activity_data["engine"],
+                results_count=activity_data.get("results_count")
+            )
             
-            # Send confirmation back to user
-            if user_id in self.active_connections:
-                confirmation = {
-                    "type": "activity_tracked",
-                    "data": {
-                        "activity_type": activity_type,
-                        "timestamp": datetime.now().isoformat()
-                    }
-                }
-                await self.active_connections[user_id].send_text(json.dumps(confirmation))
-                
-        except Exception as e:
-            logger.error(f"Error handling web activity event for user {user_id}: {str(e)}")
+        elif activity_type == "click":
+            activity = await web_activity_tracker.track_click(
+                user_id=user_id,
+                url=activity_data["url"],
+                element_type=activity_data["element_type"],
+                element_text=activity_data.get("element_text")
+            )
+        
+        return activity
     
     async def configure_email_access(self, user_id: int, email_config: Dict[str, Any]):
         """Configure email access for a user"""
@@ -283,31 +435,21 @@ class EnhancedConnectionManager(ConnectionManager):
                 smtp_port=email_config.get("smtp_port", 587)
             )
             
-            self.user_email_configs[user_id] = email_config
+            if (state := self.connection_states.get(user_id)) is not None:
+                state.email_config = email_config
+            self.invalidate_summaries(user_id, "email")
             
             # Send confirmation
-            if user_id in self.active_connections:
-                confirmation = {
-                    "type": "email_configured",
-                    "data": {
-                        "email": email_config["email"],
-                        "status": "success"
-                    }
-                }
-                await self.active_connections[user_id].send_text(json.dumps(confirmation))
+            self.emit(user_id, "email_configured", {
+                "email": email_config["email"],
+                "status": "success"
+            })
                 
         except Exception as e:
-            logger.error(f"Error configuring email for user {user_id}: {str(e)}")
+            logger.error("Error configuring email for user %s: %s", user_id, e)
             
             # Send error notification
-            if user_id in self.active_connections:
-                error_msg = {
-                    "type": "email_config_error",
-                    "data": {
-                        "error": str(e)
-                    }
-                }
-                await self.active_connections[user_id].send_text(json.dumps(error_msg))
+            self.emit(user_id, "email_config_error", {"error": str(e)})
 
 
 class EnhancedRealTimeService(RealTimeService):
@@ -316,116 +458,110 @@ class EnhancedRealTimeService(RealTimeService):
     def __init__(self):
         super().__init__()
         self.connection_manager = EnhancedConnectionManager()
+        
+        # Enhanced message type -> handler(user_id, data); anything else falls
+        # through to the standard Phase 3 handlers
+        self._enhanced_handlers = {
+            "web_activity": self.connection_manager.handle_web_activity_event,
+            "web_activity_batch": self.connection_manager.handle_web_activity_batch,
+            "configure_email": self.connection_manager.configure_email_access,
+            "get_email_summary": self._handle_email_summary_request,
+            "get_activity_summary": self._handle_activity_summary_request
+        }
     
     async def handle_websocket_connection(
         self, 
         websocket: WebSocket, 
         user_id: int, 
-        username: str,
-        db: Session
+        username: str
     ):
         """Handle enhanced WebSocket connection"""
+        connection = None
         try:
-            await self.connection_manager.connect(websocket, user_id, username)
+            connection = await self.connection_manager.connect(websocket, user_id, username)
             
             # Send initial status
-            await self._send_initial_status(user_id, db)
+            await self._send_initial_status(user_id)
             
             # Main message loop
             while True:
                 try:
-                    data = await websocket.receive_text()
-                    message_data = json.loads(data)
-                    await self._handle_enhanced_message(message_data, user_id, username, db)
+                    # Clients may send text or binary frames; orjson parses either
+                    message = await websocket.receive()
+                    if message["type"] == "websocket.disconnect":
+                        raise WebSocketDisconnect(message.get("code", 1000))
+                    # An evicted or replaced socket must not re-register the user
+                    if not self.connection_manager.is_current(user_id, connection):
+                        break
+                    data = message.get("bytes") or message.get("text")
+                    message_data = orjson.loads(data)
+                    await self._handle_enhanced_message(message_data, user_id, username)
                 except WebSocketDisconnect:
                     break
                 except Exception as e:
-                    logger.error(f"Error handling enhanced message from user {user_id}: {e}")
+                    logger.error("Error handling enhanced message from user %s: %s", user_id, e)
                     await self.send_error_message(user_id, "Error processing message")
         
         except WebSocketDisconnect:
-            logger.info(f"Enhanced WebSocket disconnected for user {user_id}")
+            logger.debug("Enhanced WebSocket disconnected for user %s", user_id)
         except Exception as e:
-            logger.error(f"Enhanced WebSocket error for user {user_id}: {e}")
+            logger.error("Enhanced WebSocket error for user %s: %s", user_id, e)
         finally:
-            self.connection_manager.disconnect(user_id)
+            # Leave a newer connection for the same user alone
+            if connection is not None and self.connection_manager.is_current(user_id, connection):
+                self.connection_manager.disconnect(user_id)
     
-    async def _send_initial_status(self, user_id: int, db: Session):
+    async def _send_initial_status(self, user_id: int):
         """Send initial status including email and web activity summary"""
         try:
             # Get email summary if configured
             email_summary = None
-            if user_id in self.connection_manager.user_email_configs:
-                email_summary = await email_service.get_email_summary(days=1)
+            state = self.connection_manager.connection_states.get(user_id)
+            if state is not None and state.email_config is not None:
+                email_summary = await self.connection_manager.get_email_summary(user_id, days=1)
             
             # Get web activity summary
-            web_summary = await web_activity_tracker.get_user_activity_summary(user_id, days=1)
+            web_summary = await self.connection_manager.get_activity_summary(user_id, days=1)
             
             # Send combined status
-            status = {
-                "type": "initial_status",
-                "data": {
-                    "email_summary": email_summary,
-                    "web_activity_summary": web_summary,
-                    "timestamp": datetime.now().isoformat()
-                }
-            }
-            
-            if user_id in self.connection_manager.active_connections:
-                await self.connection_manager.active_connections[user_id].send_text(json.dumps(status))
+            self.connection_manager.emit(user_id, "initial_status", {
+                "email_summary": email_summary,
+                "web_activity_summary": web_summary,
+                "timestamp": datetime.now()
+            })
                 
         except Exception as e:
-            logger.error(f"Error sending initial status to user {user_id}: {str(e)}")
+            logger.error("Error sending initial status to user %s: %s", user_id, e)
     
-    async def _handle_enhanced_message(self, message_data: Dict[str, Any], user_id: int, username: str, db: Session):
+    async def _handle_enhanced_message(self, message_data: Dict[str, Any], user_id: int, username: str):
         """Handle enhanced message types"""
-        message_type = message_data.get("type")
-        
-        if message_type == "web_activity":
-            await self.connection_manager.handle_web_activity_event(user_id, message_data.get("data", {}))
-        elif message_type == "configure_email":
-            await self.connection_manager.configure_email_access(user_id, message_data.get("data", {}))
-        elif message_type == "get_email_summary":
-            await self._handle_email_summary_request(user_id, message_data.get("data", {}))
-        elif message_type == "get_activity_summary":
-            await self._handle_activity_summary_request(user_id, message_data.get("data", {}))
+        handler = self._enhanced_handlers.get(message_data.get("type"))
+        if handler is not None:
+            await handler(user_id, message_data.get("data", {}))
         else:
-            # Handle standard message types
-            await super().handle_message(message_data, user_id, username, db)
+            # Handle standard message types in a session scoped to this message
+            with SessionLocal() as db:
+                await super().handle_message(message_data, user_id, username, db)
     
     async def _handle_email_summary_request(self, user_id: int, data: Dict[str, Any]):
         """Handle email summary request"""
         try:
             days = data.get("days", 7)
-            summary = await email_service.get_email_summary(days=days)
-            
-            response = {
-                "type": "email_summary_response",
-                "data": summary
-            }
-            
-            if user_id in self.connection_manager.active_connections:
-                await self.connection_manager.active_connections[user_id].send_text(json.dumps(response))
+            summary = await self.connection_manager.get_email_summary(user_id, days=days)
+            self.connection_manager.emit(user_id, "email_summary_response", summary)
                 
         except Exception as e:
-            logger.error(f"Error handling email summary request for user {user_id}: {str(e)}")
+            logger.error("Error handling email summary request for user %s: %s", user_id, e)
     
     async def _handle_activity_summary_request(self, user_id: int, data: Dict[str, Any]):
         """Handle activity summary request"""
         try:
             days = data.get("days", 7)
-            summary = await web_activity_tracker.get_user_activity_summary(user_id, days=days)
-            
-            response = {
-                "type": "activity_summary_response",
-                "data": summary
-            }
-            
-            if user_id in self.connection_manager.active_connections:
-                await self.connection_manager.active_connections[user_id].send_text(json.dumps(response))
+            summary = await self.connection_manager.get_activity_summary(user_id, days=days)
+            self.connection_manager.emit(user_id, "activity_summary_response", summary)
                 
         except Exception as e:
-            logger.error(f"Error handling activity summary request for user {user_id}: {str(e)}")
+            logger.error("Error handling activity summary request for user %s: %s", user_id, e)
 
 
 # Global enhanced real-time service instance
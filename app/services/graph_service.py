@@ -4,89 +4,368 @@ Handles relationship modeling, knowledge graphs, and complex memory associations
 """
 
 import asyncio
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import List, Dict, Any, Optional, Tuple
-from neo4j import GraphDatabase, Driver
-from neo4j.exceptions import ServiceUnavailable, AuthError
+from typing import List, Dict, Any, Optional, Tuple, AsyncIterator
+from neo4j import AsyncGraphDatabase, AsyncDriver, AsyncManagedTransaction, AsyncTransaction, Record, WRITE_ACCESS
+from neo4j.exceptions import ServiceUnavailable, AuthError, ClientError
 
 from app.core.config import settings
 from app.core.logging import get_logger
 
 logger = get_logger(__name__)
 
+# Cypher statements are kept literal and parameter-only so Neo4j can reuse
+# cached query plans across calls.
+_CONNECTIVITY_CYPHER = "RETURN 1 as test"
+
+# Schema statements keyed by name so existing ones can be skipped at startup
+_SCHEMA_CONSTRAINTS = {
+    "user_id_unique": "CREATE CONSTRAINT user_id_unique IF NOT EXISTS FOR (u:User) REQUIRE u.user_id IS UNIQUE",
+    "memory_id_unique": "CREATE CONSTRAINT memory_id_unique IF NOT EXISTS FOR (m:Memory) REQUIRE m.memory_id IS UNIQUE",
+    "conversation_id_unique": "CREATE CONSTRAINT conversation_id_unique IF NOT EXISTS FOR (c:Conversation) REQUIRE c.conversation_id IS UNIQUE",
+    "concept_name_unique": "CREATE CONSTRAINT concept_name_unique IF NOT EXISTS FOR (con:Concept) REQUIRE con.name IS UNIQUE"
+}
+
+_SCHEMA_INDEXES = {
+    "user_created_idx": "CREATE INDEX user_created_idx IF NOT EXISTS FOR (u:User) ON (u.created_at)",
+    "memory_importance_idx": "CREATE INDEX memory_importance_idx IF NOT EXISTS FOR (m:Memory) ON (m.importance)",
+    "memory_type_idx": "CREATE INDEX memory_type_idx IF NOT EXISTS FOR (m:Memory) ON (m.memory_type)",
+    "concept_frequency_idx": "CREATE INDEX concept_frequency_idx IF NOT EXISTS FOR (c:Concept) ON (c.frequency)",
+    "memory_type_importance_idx": "CREATE INDEX memory_type_importance_idx IF NOT EXISTS FOR (m:Memory) ON (m.memory_type, m.importance)"
+}
+
+_SHOW_CONSTRAINTS_CYPHER = "SHOW CONSTRAINTS YIELD name RETURN name"
+
+_SHOW_INDEXES_CYPHER = "SHOW INDEXES YIELD name RETURN name"
+
+_CREATE_USER_CYPHER = """
+MERGE (u:User {user_id: $user_id})
+ON CREATE SET u.created_at = datetime()
+SET u.username = $username,
+    u.email = $email,
+    u.updated_at = datetime(),
+    u += $metadata
+RETURN u.user_id as user_id, u.created_at as created_at
+"""
+
+_CREATE_MEMORY_CYPHER = """
+MATCH (u:User {user_id: $user_id})
+CREATE (m:Memory {
+    memory_id: $memory_id,
+    content: $content,
+    memory_type: $memory_type,
+    importance: $importance,
+    created_at: datetime()
+})
+SET m += $metadata
+CREATE (u)-[:HAS_MEMORY]->(m)
+RETURN m.memory_id as memory_id, m.created_at as created_at
+"""
+
+_CREATE_CONVERSATION_CYPHER = """
+MATCH (u:User {user_id: $user_id})
+CREATE (c:Conversation {
+    conversation_id: $conversation_id,
+    title: $title,
+    created_at: datetime()
+})
+CREATE (u)-[:HAS_CONVERSATION]->(c)
+RETURN c.conversation_id as conversation_id, c.created_at as created_at
+"""
+
+_LINK_CONCEPTS_CYPHER = """
+MATCH (m:Memory {memory_id: $memory_id})
+UNWIND $concepts AS name
+MERGE (c:Concept {name: name})
+ON CREATE SET c.frequency = 1, c.created_at = datetime()
+ON MATCH SET c.frequency = c.frequency + 1, c.updated_at = datetime()
+MERGE (m)-[:MENTIONS]->(c)
+"""
+
+_LINK_CONCEPTS_BATCH_CYPHER = """
+UNWIND $rows AS row
+MATCH (m:Memory {memory_id: row.memory_id})
+UNWIND row.concepts AS name
+MERGE (c:Concept {name: name})
+ON CREATE SET c.frequency = 1, c.created_at = datetime()
+ON MATCH SET c.frequency = c.frequency + 1, c.updated_at = datetime()
+MERGE (m)-[:MENTIONS]->(c)
+RETURN count(*) as linked
+"""
+
+_CREATE_MEMORY_RELATIONSHIP_CYPHER = """
+MATCH (m1:Memory {memory_id: $memory_id1})
+MATCH (m2:Memory {memory_id: $memory_id2})
+MERGE (m1)-[r:RELATES_TO]->(m2)
+SET r.type = $relationship_type,
+    r.strength = $strength,
+    r.created_at = datetime()
+RETURN m1.memory_id as memory_id1, m2.memory_id as memory_id2, r.type as relationship_type, r.strength as strength
+"""
+
+# Bulk writes UNWIND parameter lists, capped per transaction
+GRAPH_BATCH_SIZE = 10000
+
+_CREATE_MEMORY_NODES_BATCH_CYPHER = """
+MATCH (u:User {user_id: $user_id})
+UNWIND $rows AS row
+CREATE (m:Memory {
+    memory_id: row.memory_id,
+    content: row.content,
+    memory_type: row.memory_type,
+    importance: row.importance,
+    created_at: datetime()
+})
+SET m += row.metadata
+CREATE (u)-[:HAS_MEMORY]->(m)
+RETURN count(m) as created
+"""
+
+_CREATE_MEMORY_RELATIONSHIPS_BATCH_CYPHER = """
+UNWIND $rows AS row
+MATCH (m1:Memory {memory_id: row.memory_id1})
+MATCH (m2:Memory {memory_id: row.memory_id2})
+MERGE (m1)-[r:RELATES_TO]->(m2)
+SET r.type = row.relationship_type,
+    r.strength = row.strength,
+    r.created_at = datetime()
+RETURN count(r) as created
+"""
+
+# Cypher does not accept parameters in variable-length bounds, so one literal
+# query is prepared per supported depth.
+MAX_RELATED_MEMORY_DEPTH = 5
+
+_FIND_RELATED_MEMORIES_TEMPLATE = """
+MATCH path = (start:Memory {memory_id: $memory_id})-[:RELATES_TO*1..%d]-(related:Memory)
+WHERE related <> start
+WITH related, min(length(path)) as distance
+ORDER BY related.importance DESC, distance ASC
+LIMIT $limit
+RETURN collect({
+    memory_id: related.memory_id,
+    content: related.content,
+    importance: related.importance,
+    memory_type: related.memory_type,
+    distance: distance
+}) as rows
+"""
+
+_FIND_RELATED_MEMORIES_CYPHER = {
+    depth: _FIND_RELATED_MEMORIES_TEMPLATE % depth
+    for depth in range(1, MAX_RELATED_MEMORY_DEPTH + 1)
+}
+
+_FIND_RELATED_MEMORIES_BATCH_TEMPLATE = """
+UNWIND $memory_ids AS memory_id
+MATCH path = (start:Memory {memory_id: memory_id})-[:RELATES_TO*1..%d]-(related:Memory)
+WHERE related <> start
+WITH memory_id, related, min(length(path)) as distance
+ORDER BY related.importance DESC, distance ASC
+WITH memory_id, collect({
+    memory_id: related.memory_id,
+    content: related.content,
+    importance: related.importance,
+    memory_type: related.memory_type,
+    distance: distance
+})[0..$limit] as rows
+RETURN memory_id, rows
+"""
+
+_FIND_RELATED_MEMORIES_BATCH_CYPHER = {
+    depth: _FIND_RELATED_MEMORIES_BATCH_TEMPLATE % depth
+    for depth in range(1, MAX_RELATED_MEMORY_DEPTH + 1)
+}
+
+# Each rollup runs as its own subquery so the matches never form a cartesian product
+_USER_KNOWLEDGE_GRAPH_CYPHER = """
+MATCH (u:User {user_id: $user_id})
+CALL {
+    WITH u
+    MATCH (u)-[:HAS_MEMORY]->(m:Memory)
+    RETURN count(m) as memory_count
+}
+CALL {
+    WITH u
+    MATCH (u)-[:HAS_MEMORY]->(:Memory)-[:MENTIONS]->(c:Concept)
+    WITH DISTINCT c
+    ORDER BY c.frequency DESC
+    WITH collect(c) as concepts
+    RETURN size(concepts) as concept_count,
+           [con IN concepts[0..10] | {name: con.name, frequency: con.frequency}] as top_concepts
+}
+CALL {
+    WITH u
+    MATCH (u)-[:HAS_CONVERSATION]->(conv:Conversation)
+    RETURN count(conv) as conversation_count
+}
+RETURN memory_count, concept_count, conversation_count, top_concepts
+"""
+
+# Node counts come from store statistics rather than a full node scan
+_APOC_NODE_STATS_CYPHER = "CALL apoc.meta.stats() YIELD nodeCount, labels RETURN nodeCount, labels"
+
+_DB_LABELS_CYPHER = "CALL db.labels() YIELD label RETURN label"
+
+_TOTAL_NODES_CYPHER = "MATCH (n) RETURN count(n) as count"
+
+_LABEL_COUNT_TEMPLATE = "MATCH (n:`%s`) RETURN count(n) as count"
+
+
+def _normalize_concept(concept: str) -> str:
+    """Normalise a concept name to the form stored on Concept nodes"""
+    return concept.strip().lower()
+
+
+def _normalize_concepts(concepts: List[str]) -> List[str]:
+    """Normalise concept names, dropping empties and duplicates while keeping order"""
+    return list(dict.fromkeys(filter(None, map(_normalize_concept, concepts))))
+
+
+async def _fetch_records(tx: AsyncManagedTransaction, query: str, params: Dict[str, Any]) -> List[Record]:
+    """Run a query inside a managed transaction and fetch all of its records"""
+    result = await tx.run(query, params)
+    return [record async for record in result]
+
+
+async def _fetch_column(tx: AsyncManagedTransaction, query: str, key: str) -> List[Any]:
+    """Stream a query's records inside a managed transaction, keeping only one column"""
+    result = await tx.run(query)
+    return [record[key] async for record in result]
+
+
+async def _run_statements(tx: AsyncManagedTransaction, statements: List[str]):
+    """Run several parameterless statements in one managed transaction"""
+    for statement in statements:
+        result = await tx.run(statement)
+        await result.consume()
+
 
 class GraphService:
     """Graph database service for relationships and knowledge modeling"""
     
     def __init__(self):
-        self.driver: Optional[Driver] = None
+        self.driver: Optional[AsyncDriver] = None
+    
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[AsyncTransaction]:
+        """Open an explicit write transaction for several graph operations
+        
+        The operations commit together when the block exits, and are all rolled
+        back if any of them raises.
+        """
+        async with self.driver.session(default_access_mode=WRITE_ACCESS) as session:
+            async with await session.begin_transaction() as tx:
+                yield tx
+    
+    @asynccontextmanager
+    async def _transaction(self, tx: Optional[AsyncTransaction] = None) -> AsyncIterator[AsyncTransaction]:
+        """Use the caller's transaction if given, otherwise open one for this operation"""
+        if tx is not None:
+            yield tx
+        else:
+            async with self.transaction() as new_tx:
+                yield new_tx
+    
+    async def _read(
+        self,
+        query: str,
+        params: Optional[Dict[str, Any]] = None,
+        tx: Optional[AsyncTransaction] = None
+    ) -> List[Record]:
+        """Run a query in the caller's transaction, or in a managed read transaction retried on transient errors"""
+        if tx is not None:
+            return await _fetch_records(tx, query, params or {})
+        async with self.driver.session() as session:
+            return await session.execute_read(_fetch_records, query, params or {})
+    
+    async def _write(
+        self,
+        query: str,
+        params: Optional[Dict[str, Any]] = None,
+        tx: Optional[AsyncTransaction] = None
+    ) -> List[Record]:
+        """Run a query in the caller's transaction, or in a managed write transaction retried on transient errors"""
+        if tx is not None:
+            return await _fetch_records(tx, query, params or {})
+        async with self.driver.session() as session:
+            return await session.execute_write(_fetch_records, query, params or {})
         
     async def initialize(self):
-        """Initialize Neo4j driver and setup constraints"""
+        """Initialize Neo4j driver and setup constraints
+        
+        The driver is only published on self.driver once connectivity and schema
+        setup have succeeded, so callers never see a half-initialized service and
+        a failed initialization is retried on the next call.
+        """
+        driver = None
         try:
             # Create Neo4j driver
-            self.driver = GraphDatabase.driver(
+            driver = AsyncGraphDatabase.driver(
                 settings.neo4j_uri,
-                auth=(settings.neo4j_user, settings.neo4j_password)
+                auth=(settings.neo4j_user, settings.neo4j_password),
+                max_connection_pool_size=settings.neo4j_pool_size,
+                connection_acquisition_timeout=settings.neo4j_acq_timeout,
+                max_connection_lifetime=settings.neo4j_max_connection_lifetime,
+                connection_timeout=settings.neo4j_connection_timeout,
+                keep_alive=True
             )
             
             # Verify connectivity
-            await self._verify_connectivity()
+            await self._verify_connectivity(driver)
             
             # Setup database schema
-            await self._setup_schema()
+            await self._setup_schema(driver)
             
+            self.driver = driver
             logger.info("Graph service initialized successfully")
             
         except Exception as e:
             logger.error(f"Failed to initialize graph service: {str(e)}")
+            if driver is not None:
+                await driver.close()
             raise
     
-    async def _verify_connectivity(self):
+    @staticmethod
+    async def _verify_connectivity(driver: AsyncDriver):
         """Verify Neo4j connectivity"""
         try:
-            with self.driver.session() as session:
-                result = session.run("RETURN 1 as test")
-                record = result.single()
-                if record["test"] != 1:
-                    raise Exception("Connectivity test failed")
+            async with driver.session() as session:
+                records = await session.execute_read(_fetch_records, _CONNECTIVITY_CYPHER, {})
+            if not records or records[0]["test"] != 1:
+                raise Exception("Connectivity test failed")
             logger.info("Neo4j connectivity verified")
         except Exception as e:
             logger.error(f"Neo4j connectivity failed: {str(e)}")
             raise
     
-    async def _setup_schema(self):
+    @staticmethod
+    async def _setup_schema(driver: AsyncDriver):
         """Setup Neo4j constraints and indexes"""
         try:
-            with self.driver.session() as session:
-                # Create constraints
-                constraints = [
-                    "CREATE CONSTRAINT user_id_unique IF NOT EXISTS FOR (u:User) REQUIRE u.user_id IS UNIQUE",
-                    "CREATE CONSTRAINT memory_id_unique IF NOT EXISTS FOR (m:Memory) REQUIRE m.memory_id IS UNIQUE",
-                    "CREATE CONSTRAINT conversation_id_unique IF NOT EXISTS FOR (c:Conversation) REQUIRE c.conversation_id IS UNIQUE",
-                    "CREATE CONSTRAINT concept_name_unique IF NOT EXISTS FOR (con:Concept) REQUIRE con.name IS UNIQUE"
-                ]
-                
-                for constraint in constraints:
-                    try:
-                        session.run(constraint)
-                    except Exception as e:
-                        # Constraint might already exist
-                        logger.debug(f"Constraint creation result: {str(e)}")
-                
-                # Create indexes for performance
-                indexes = [
-                    "CREATE INDEX user_created_idx IF NOT EXISTS FOR (u:User) ON (u.created_at)",
-                    "CREATE INDEX memory_importance_idx IF NOT EXISTS FOR (m:Memory) ON (m.importance)",
-                    "CREATE INDEX memory_type_idx IF NOT EXISTS FOR (m:Memory) ON (m.memory_type)",
-                    "CREATE INDEX concept_frequency_idx IF NOT EXISTS FOR (c:Concept) ON (c.frequency)"
+            async with driver.session() as session:
+                # Only create constraints and indexes that are not there yet
+                existing = set(await session.execute_read(_fetch_column, _SHOW_CONSTRAINTS_CYPHER, "name"))
+                existing.update(await session.execute_read(_fetch_column, _SHOW_INDEXES_CYPHER, "name"))
+                
+                missing = [
+                    statement
+                    for name, statement in {**_SCHEMA_CONSTRAINTS, **_SCHEMA_INDEXES}.items()
+                    if name not in existing
                 ]
                 
-                for index in indexes:
+                if missing:
                     try:
-                        session.run(index)
+                        await session.execute_write(_run_statements, missing)
                     except Exception as e:
-                        logger.debug(f"Index creation result: {str(e)}")
+                        # Fall back to one statement at a time, tolerating individual failures
+                        logger.debug(f"Batched schema setup failed, retrying per statement: {str(e)}")
+                        for statement in missing:
+                            try:
+                                await session.run(statement)
+                            except Exception as e:
+                                logger.debug(f"Schema statement result: {str(e)}")
                         
             logger.info("Neo4j schema setup complete")
             
@@ -94,36 +373,27 @@ class GraphService:
             logger.error(f"Failed to setup Neo4j schema: {str(e)}")
             raise
     
-    async def create_user_node(self, user_id: int, username: str, email: str, metadata: Optional[Dict] = None):
+    async def create_user_node(
+        self,
+        user_id: int,
+        username: str,
+        email: str,
+        metadata: Optional[Dict] = None,
+        tx: Optional[AsyncTransaction] = None
+    ):
         """Create a user node in the graph"""
         try:
-            with self.driver.session() as session:
-                query = """
-                MERGE (u:User {user_id: $user_id})
-                SET u.username = $username,
-                    u.email = $email,
-                    u.created_at = datetime(),
-                    u.updated_at = datetime()
-                """
-                
-                if metadata:
-                    for key, value in metadata.items():
-                        query += f", u.{key} = ${key}"
-                
-                query += " RETURN u"
-                
-                params = {
-                    "user_id": user_id,
-                    "username": username,
-                    "email": email,
-                    **(metadata or {})
-                }
-                
-                result = session.run(query, params)
-                record = result.single()
-                
-                logger.info(f"User node created/updated for user {user_id}")
-                return record["u"] if record else None
+            params = {
+                "user_id": user_id,
+                "username": username,
+                "email": email,
+                "metadata": metadata or {}
+            }
+            
+            records = await self._write(_CREATE_USER_CYPHER, params, tx)
+            
+            logger.info(f"User node created/updated for user {user_id}")
+            return records[0].data() if records else None
                 
         except Exception as e:
             logger.error(f"Failed to create user node: {str(e)}")
@@ -136,209 +406,268 @@ class GraphService:
         content: str,
         memory_type: str,
         importance: int,
-        metadata: Optional[Dict] = None
+        metadata: Optional[Dict] = None,
+        tx: Optional[AsyncTransaction] = None
     ):
         """Create a memory node and link it to the user"""
         try:
-            with self.driver.session() as session:
-                query = """
-                MATCH (u:User {user_id: $user_id})
-                CREATE (m:Memory {
-                    memory_id: $memory_id,
-                    content: $content,
-                    memory_type: $memory_type,
-                    importance: $importance,
-                    created_at: datetime()
-                })
-                CREATE (u)-[:HAS_MEMORY]->(m)
-                RETURN m
-                """
-                
-                params = {
-                    "user_id": user_id,
-                    "memory_id": memory_id,
-                    "content": content,
-                    "memory_type": memory_type,
-                    "importance": importance
-                }
-                
-                if metadata:
-                    # Add metadata fields to the memory node
-                    for key, value in metadata.items():
-                        query = query.replace(
-                            "created_at: datetime()",
-                            f"created_at: datetime(), {key}: ${key}"
-                        )
-                        params[key] = value
-                
-                result = session.run(query, params)
-                record = result.single()
-                
-                logger.info(f"Memory node created: {memory_id}")
-                return record["m"] if record else None
+            params = {
+                "user_id": user_id,
+                "memory_id": memory_id,
+                "content": content,
+                "memory_type": memory_type,
+                "importance": importance,
+                "metadata": metadata or {}
+            }
+            
+            records = await self._write(_CREATE_MEMORY_CYPHER, params, tx)
+            
+            logger.info(f"Memory node created: {memory_id}")
+            return records[0].data() if records else None
                 
         except Exception as e:
             logger.error(f"Failed to create memory node: {str(e)}")
             raise
     
-    async def create_conversation_node(self, conversation_id: int, user_id: int, title: str):
+    async def create_conversation_node(
+        self,
+        conversation_id: int,
+        user_id: int,
+        title: str,
+        tx: Optional[AsyncTransaction] = None
+    ):
         """Create a conversation node and link it to the user"""
         try:
-            with self.driver.session() as session:
-                query = """
-                MATCH (u:User {user_id: $user_id})
-                CREATE (c:Conversation {
-                    conversation_id: $conversation_id,
-                    title: $title,
-                    created_at: datetime()
-                })
-                CREATE (u)-[:HAS_CONVERSATION]->(c)
-                RETURN c
-                """
-                
-                params = {
-                    "user_id": user_id,
-                    "conversation_id": conversation_id,
-                    "title": title
-                }
-                
-                result = session.run(query, params)
-                record = result.single()
-                
-                logger.info(f"Conversation node created: {conversation_id}")
-                return record["c"] if record else None
+            params = {
+                "user_id": user_id,
+                "conversation_id": conversation_id,
+                "title": title
+            }
+            
+            records = await self._write(_CREATE_CONVERSATION_CYPHER, params, tx)
+            
+            logger.info(f"Conversation node created: {conversation_id}")
+            return records[0].data() if records else None
                 
         except Exception as e:
             logger.error(f"Failed to create conversation node: {str(e)}")
             raise
     
-    async def extract_and_link_concepts(self, memory_id: str, content: str, concepts: List[str]):
+    async def extract_and_link_concepts(
+        self,
+        memory_id: str,
+        content: str,
+        concepts: List[str],
+        tx: Optional[AsyncTransaction] = None
+    ):
         """Extract concepts from memory content and create relationships"""
         try:
-            with self.driver.session() as session:
-                # Create or update concepts and link them to the memory
-                for concept in concepts:
-                    query = """
-                    MATCH (m:Memory {memory_id: $memory_id})
-                    MERGE (c:Concept {name: $concept})
-                    ON CREATE SET c.frequency = 1, c.created_at = datetime()
-                    ON MATCH SET c.frequency = c.frequency + 1, c.updated_at = datetime()
-                    MERGE (m)-[:MENTIONS]->(c)
-                    """
-                    
-                    session.run(query, {"memory_id": memory_id, "concept": concept.lower()})
-                
-                logger.info(f"Linked {len(concepts)} concepts to memory {memory_id}")
+            # Normalise and dedupe up front so one UNWIND covers every concept
+            concept_names = _normalize_concepts(concepts)
+            if not concept_names:
+                return
+            
+            # Create or update concepts and link them to the memory
+            await self._write(_LINK_CONCEPTS_CYPHER, {"memory_id": memory_id, "concepts": concept_names}, tx)
+            
+            logger.info(f"Linked {len(concept_names)} concepts to memory {memory_id}")
                 
         except Exception as e:
             logger.error(f"Failed to extract and link concepts: {str(e)}")
             raise
     
-    async def create_memory_relationship(self, memory_id1: str, memory_id2: str, relationship_type: str, strength: float):
+    async def extract_and_link_concepts_batch(
+        self,
+        memory_concepts: Dict[str, List[str]],
+        tx: Optional[AsyncTransaction] = None
+    ) -> int:
+        """Link concepts to many memories at once, keyed by memory id"""
+        try:
+            rows = []
+            for memory_id, concepts in memory_concepts.items():
+                concept_names = _normalize_concepts(concepts)
+                if concept_names:
+                    rows.append({"memory_id": memory_id, "concepts": concept_names})
+            
+            linked = 0
+            async with self._transaction(tx) as tx:
+                for start in range(0, len(rows), GRAPH_BATCH_SIZE):
+                    records = await self._write(_LINK_CONCEPTS_BATCH_CYPHER, {
+                        "rows": rows[start:start + GRAPH_BATCH_SIZE]
+                    }, tx)
+                    linked += records[0]["linked"] if records else 0
+            
+            logger.info(f"Linked {linked} concepts across {len(rows)} memories")
+            return linked
+            
+        except Exception as e:
+            logger.error(f"Failed to extract and link concepts batch: {str(e)}")
+            raise
+    
+    async def create_memory_relationship(
+        self,
+        memory_id1: str,
+        memory_id2: str,
+        relationship_type: str,
+        strength: float,
+        tx: Optional[AsyncTransaction] = None
+    ):
         """Create a relationship between two memories"""
         try:
-            with self.driver.session() as session:
-                query = """
-                MATCH (m1:Memory {memory_id: $memory_id1})
-                MATCH (m2:Memory {memory_id: $memory_id2})
-                MERGE (m1)-[r:RELATES_TO]->(m2)
-                SET r.type = $relationship_type,
-                    r.strength = $strength,
-                    r.created_at = datetime()
-                RETURN r
-                """
-                
-                params = {
-                    "memory_id1": memory_id1,
-                    "memory_id2": memory_id2,
-                    "relationship_type": relationship_type,
-                    "strength": strength
-                }
-                
-                result = session.run(query, params)
-                record = result.single()
-                
-                logger.info(f"Relationship created between memories: {memory_id1} -> {memory_id2}")
-                return record["r"] if record else None
+            params = {
+                "memory_id1": memory_id1,
+                "memory_id2": memory_id2,
+                "relationship_type": relationship_type,
+                "strength": strength
+            }
+            
+            records = await self._write(_CREATE_MEMORY_RELATIONSHIP_CYPHER, params, tx)
+            
+            logger.info(f"Relationship created between memories: {memory_id1} -> {memory_id2}")
+            return records[0].data() if records else None
                 
         except Exception as e:
             logger.error(f"Failed to create memory relationship: {str(e)}")
             raise
     
-    async def find_related_memories(self, memory_id: str, max_depth: int = 2, limit: int = 10) -> List[Dict]:
-        """Find memories related to a given memory through the graph"""
+    async def create_memory_nodes_batch(
+        self,
+        user_id: int,
+        memories: List[Dict[str, Any]],
+        tx: Optional[AsyncTransaction] = None
+    ) -> int:
+        """Create many memory nodes for a user with one UNWIND query per batch"""
         try:
-            with self.driver.session() as session:
-                query = """
-                MATCH path = (start:Memory {memory_id: $memory_id})-[:RELATES_TO*1..$max_depth]-(related:Memory)
-                RETURN DISTINCT related.memory_id as memory_id,
-                       related.content as content,
-                       related.importance as importance,
-                       related.memory_type as memory_type,
-                       length(path) as distance
-                ORDER BY related.importance DESC, distance ASC
-                LIMIT $limit
-                """
-                
-                params = {
-                    "memory_id": memory_id,
-                    "max_depth": max_depth,
-                    "limit": limit
+            rows = [
+                {
+                    "memory_id": memory["memory_id"],
+                    "content": memory["content"],
+                    "memory_type": memory["memory_type"],
+                    "importance": memory["importance"],
+                    "metadata": memory.get("metadata") or {}
                 }
-                
-                result = session.run(query, params)
-                
-                related_memories = []
-                for record in result:
-                    related_memories.append({
-                        "memory_id": record["memory_id"],
-                        "content": record["content"],
-                        "importance": record["importance"],
-                        "memory_type": record["memory_type"],
-                        "distance": record["distance"]
-                    })
-                
-                logger.info(f"Found {len(related_memories)} related memories")
-                return related_memories
+                for memory in memories
+            ]
+            
+            created = 0
+            async with self._transaction(tx) as tx:
+                for start in range(0, len(rows), GRAPH_BATCH_SIZE):
+                    records = await self._write(_CREATE_MEMORY_NODES_BATCH_CYPHER, {
+                        "user_id": user_id,
+                        "rows": rows[start:start + GRAPH_BATCH_SIZE]
+                    }, tx)
+                    created += records[0]["created"] if records else 0
+            
+            logger.info(f"Created {created} memory nodes for user {user_id}")
+            return created
+            
+        except Exception as e:
+            logger.error(f"Failed to create memory nodes batch: {str(e)}")
+            raise
+    
+    async def create_memory_relationships_batch(
+        self,
+        relationships: List[Dict[str, Any]],
+        tx: Optional[AsyncTransaction] = None
+    ) -> int:
+        """Create many memory relationships with one UNWIND query per batch
+        
+        Each relationship is a dict with memory_id1, memory_id2, relationship_type and strength.
+        """
+        try:
+            created = 0
+            async with self._transaction(tx) as tx:
+                for start in range(0, len(relationships), GRAPH_BATCH_SIZE):
+                    records = await self._write(_CREATE_MEMORY_RELATIONSHIPS_BATCH_CYPHER, {
+                        "rows": relationships[start:start + GRAPH_BATCH_SIZE]
+                    }, tx)
+                    created += records[0]["created"] if records else 0
+            
+            logger.info(f"Created {created} memory relationships")
+            return created
+            
+        except Exception as e:
+            logger.error(f"Failed to create memory relationships batch: {str(e)}")
+            raise
+    
+    async def find_related_memories(
+        self,
+        memory_id: str,
+        max_depth: int = 2,
+        limit: int = 10,
+        tx: Optional[AsyncTransaction] = None
+    ) -> List[Dict]:
+        """Find memories related to a given memory through the graph"""
+        try:
+            # Clamp to the prepared depths; deep traversals explode on dense graphs
+            depth = min(max(int(max_depth), 1), MAX_RELATED_MEMORY_DEPTH)
+            
+            params = {
+                "memory_id": memory_id,
+                "limit": limit
+            }
+            
+            # The server collects the rows, so there is a single record to read
+            records = await self._read(_FIND_RELATED_MEMORIES_CYPHER[depth], params, tx)
+            related_memories = records[0]["rows"] if records else []
+            
+            logger.info(f"Found {len(related_memories)} related memories")
+            return related_memories
                 
         except Exception as e:
             logger.error(f"Failed to find related memories: {str(e)}")
             return []
     
-    async def get_user_knowledge_graph(self, user_id: int) -> Dict[str, Any]:
+    async def find_related_memories_batch(
+        self,
+        memory_ids: List[str],
+        max_depth: int = 2,
+        limit: int = 10,
+        tx: Optional[AsyncTransaction] = None
+    ) -> Dict[str, List[Dict]]:
+        """Find related memories for several seed memories in one query, keyed by seed id"""
+        if not memory_ids:
+            return {}
+        
+        try:
+            depth = min(max(int(max_depth), 1), MAX_RELATED_MEMORY_DEPTH)
+            
+            params = {
+                "memory_ids": memory_ids,
+                "limit": limit
+            }
+            
+            records = await self._read(_FIND_RELATED_MEMORIES_BATCH_CYPHER[depth], params, tx)
+            related_by_seed = {record["memory_id"]: record["rows"] for record in records}
+            
+            logger.info(f"Found related memories for {len(related_by_seed)} of {len(memory_ids)} seeds")
+            return related_by_seed
+            
+        except Exception as e:
+            logger.error(f"Failed to find related memories batch: {str(e)}")
+            return {}
+    
+    async def get_user_knowledge_graph(self, user_id: int, tx: Optional[AsyncTransaction] = None) -> Dict[str, Any]:
         """Get a summary of the user's knowledge graph"""
         try:
-            with self.driver.session() as session:
-                query = """
-                MATCH (u:User {user_id: $user_id})
-                OPTIONAL MATCH (u)-[:HAS_MEMORY]->(m:Memory)
-                OPTIONAL MATCH (m)-[:MENTIONS]->(c:Concept)
-                OPTIONAL MATCH (u)-[:HAS_CONVERSATION]->(conv:Conversation)
-                RETURN 
-                    count(DISTINCT m) as memory_count,
-                    count(DISTINCT c) as concept_count,
-                    count(DISTINCT conv) as conversation_count,
-                    collect(DISTINCT {name: c.name, frequency: c.frequency})[0..10] as top_concepts
-                """
-                
-                result = session.run(query, {"user_id": user_id})
-                record = result.single()
+            records = await self._read(_USER_KNOWLEDGE_GRAPH_CYPHER, {"user_id": user_id}, tx)
+            
+            if records:
+                record = records[0]
+                return {
+                    "memory_count": record["memory_count"],
+                    "concept_count": record["concept_count"],
+                    "conversation_count": record["conversation_count"],
+                    "top_concepts": record["top_concepts"]
+                }
+            else:
+                return {
+                    "memory_count": 0,
+                    "concept_count": 0,
+                    "conversation_count": 0,
+                    "top_concepts": []
+                }
                 
-                if record:
-                    return {
-                        "memory_count": record["memory_count"],
-                        "concept_count": record["concept_count"],
-                        "conversation_count": record["conversation_count"],
-                        "top_concepts": record["top_concepts"]
-                    }
-                else:
-                    return {
-                        "memory_count": 0,
-                        "concept_count": 0,
-                        "conversation_count": 0,
-                        "top_concepts": []
-                    }
-                    
         except Exception as e:
             logger.error(f"Failed to get knowledge graph summary: {str(e)}")
             return {}
@@ -346,32 +675,22 @@ class GraphService:
     async def get_health_status(self) -> Dict[str, Any]:
         """Check the health of the graph service"""
         try:
-            with self.driver.session() as session:
-                # Test basic connectivity and get node counts
-                query = """
-                MATCH (n)
-                RETURN labels(n) as labels, count(n) as count
-                """
-                
-                result = session.run(query)
-                node_counts = {}
-                total_nodes = 0
-                
-                for record in result:
-                    labels = record["labels"]
-                    count = record["count"]
-                    total_nodes += count
-                    
-                    for label in labels:
-                        node_counts[label] = node_counts.get(label, 0) + count
-                
-                return {
-                    "status": "healthy",
-                    "total_nodes": total_nodes,
-                    "node_counts": node_counts,
-                    "driver_connected": True
-                }
-                
+            # Test basic connectivity and get node counts
+            try:
+                records = await self._read(_APOC_NODE_STATS_CYPHER)
+                total_nodes = records[0]["nodeCount"]
+                node_counts = dict(records[0]["labels"])
+            except ClientError:
+                # APOC not installed; count each label from the count store
+                total_nodes, node_counts = await self._count_nodes_by_label()
+            
+            return {
+                "status": "healthy",
+                "total_nodes": total_nodes,
+                "node_counts": node_counts,
+                "driver_connected": True
+            }
+            
         except Exception as e:
             logger.error(f"Graph service health check failed: {str(e)}")
             return {
@@ -380,11 +699,28 @@ class GraphService:
                 "driver_connected": False
             }
     
+    async def _count_nodes_by_label(self) -> Tuple[int, Dict[str, int]]:
+        """Count nodes per label with one count-store query per label, run concurrently"""
+        async with self.driver.session() as session:
+            labels = await session.execute_read(_fetch_column, _DB_LABELS_CYPHER, "label")
+        
+        counts = await asyncio.gather(
+            self._run_count(_TOTAL_NODES_CYPHER),
+            *(self._run_count(_LABEL_COUNT_TEMPLATE % label.replace("`", "``")) for label in labels)
+        )
+        return counts[0], dict(zip(labels, counts[1:]))
+    
+    async def _run_count(self, query: str) -> int:
+        """Run a single count query in its own session"""
+        records = await self._read(query)
+        return records[0]["count"]
+    
     async def close(self):
         """Close the Neo4j driver"""
         try:
             if self.driver:
-                self.driver.close()
+                await self.driver.close()
+                self.driver = None
             logger.info("Graph service closed")
         except Exception as e:
             logger.error(f"Error closing graph service: {str(e)}")
@@ -392,10 +728,14 @@ class GraphService:
 
 # Global graph service instance
 graph_service = GraphService()
+_init_lock = asyncio.Lock()
 
 
 async def get_graph_service() -> GraphService:
     """Get the global graph service instance"""
     if not graph_service.driver:
-        await graph_service.initialize()
+        # Concurrent first callers must not each create a driver and pool
+        async with _init_lock:
+            if not graph_service.driver:
+                await graph_service.initialize()
     return graph_service 
\ No newline at end of file
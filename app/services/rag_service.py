@@ -5,26 +5,76 @@ Combines vector similarity search and graph relationships for enhanced memory re
 
 import re
 import asyncio
-from datetime import datetime
-from typing import List, Dict, Any, Optional, Tuple
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import lru_cache, partial
+from typing import List, Dict, Any, Optional, Set, Tuple, AsyncIterator
+import orjson
 import tiktoken
-from openai import OpenAI
+import yake
+from openai import AsyncOpenAI
 
 from app.core.config import settings
 from app.core.logging import get_logger
+from app.services.cache_service import get_cache_service, content_key
 from app.services.vector_service import get_vector_service
 from app.services.graph_service import get_graph_service
 
 logger = get_logger(__name__)
 
+_WORD_RE = re.compile(r"\b[A-Za-z]{4,}\b")  # Fallback concept extraction
+
+# Cheap gate in front of the LLM memorability check: long messages or first-person statements
+MEMORABLE_MIN_LENGTH = 40
+_MEMORABLE_RE = re.compile(
+    r"\b(?:I(?:'m| am| have| love| hate| like| prefer| work| live)|my)\b",
+    re.IGNORECASE
+)
+
+RECENT_MEMORY_IDS_SIZE = 16  # Per-user seed memories whose graph neighbours are prefetched
+
+# Static persona sent first and byte-identical every turn so provider prompt caching can reuse it;
+# per-turn memory context goes after the history, just before the user message.
+_AEON_PERSONA_MESSAGE = {
+    "role": "system",
+    "content": """You are AEON, a digital AI twin with perfect memory and deep understanding of your owner.
+
+Use the memory context provided with each message to give personalized, contextual responses. Reference specific memories when relevant, and show that you remember and understand your owner's experiences, preferences, and personality. Always respond as if you're having a natural conversation with someone you know intimately well."""
+}
+
+
+@lru_cache(maxsize=8)
+def _encoding(model: str) -> tiktoken.Encoding:
+    """Load the tiktoken encoding for a model once per process"""
+    return tiktoken.encoding_for_model(model)
+
+
+@lru_cache(maxsize=4096)
+def _count_tokens(text: str) -> int:
+    """Count GPT-4 tokens in text, memoised since history and memories repeat across turns"""
+    return len(_encoding("gpt-4").encode(text))
+
 
 class RAGService:
     """RAG service for intelligent memory retrieval and context enhancement"""
     
     def __init__(self):
-        self.openai_client = OpenAI(api_key=settings.openai_api_key)
-        self.encoding = tiktoken.encoding_for_model("gpt-4")
+        self.openai_client = AsyncOpenAI(api_key=settings.openai_api_key)
+        self.encoding = _encoding("gpt-4")
         self.max_context_tokens = 3000  # Reserve tokens for context
+        self.keyword_extractor = yake.KeywordExtractor(lan="en", n=1, top=5)
+        self._recent_memory_ids: Dict[int, "OrderedDict[str, None]"] = {}
+        self._vector_service = None
+        self._graph_service = None
+    
+    async def _services(self) -> Tuple[Any, Any]:
+        """Resolve the vector and graph services once and reuse them on every call"""
+        if self._vector_service is None or self._graph_service is None:
+            self._vector_service, self._graph_service = await asyncio.gather(
+                get_vector_service(),
+                get_graph_service()
+            )
+        return self._vector_service, self._graph_service
         
     async def store_memory_with_context(
         self,
@@ -34,47 +84,68 @@ class RAGService:
         importance: int,
         metadata: Optional[Dict] = None
     ) -> Dict[str, str]:
-        """Store a memory in both vector and graph databases with extracted context"""
+        """Store a memory in both vector and graph databases with extracted context
+        
+        Runs through the batch path, so single and bulk ingestion share one implementation.
+        """
+        results = await self.store_memories_with_context(user_id, [{
+            "content": content,
+            "memory_type": memory_type,
+            "importance": importance,
+            "metadata": metadata
+        }])
+        return results[0]
+    
+    async def store_memories_with_context(
+        self,
+        user_id: int,
+        memories: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Store several memories with one embedding batch and batched graph writes
+        
+        Each memory is a dict with content, memory_type, importance and optional metadata.
+        """
         try:
-            vector_service = await get_vector_service()
-            graph_service = await get_graph_service()
+            vector_service, graph_service = await self._services()
             
-            # Store in vector database
-            memory_id = await vector_service.store_memory(
-                user_id=user_id,
-                content=content,
-                memory_type=memory_type,
-                importance=importance,
-                metadata=metadata
-            )
-            
-            # Store in graph database
-            await graph_service.create_memory_node(
-                memory_id=memory_id,
-                user_id=user_id,
-                content=content,
-                memory_type=memory_type,
-                importance=importance,
-                metadata=metadata
+            contents = [memory["content"] for memory in memories]
+            embeddings, concept_lists = await asyncio.gather(
+                vector_service.embed_batch(contents),
+                asyncio.gather(*(self._extract_concepts(content) for content in contents))
             )
             
-            # Extract and link concepts
-            concepts = await self._extract_concepts(content)
-            if concepts:
-                await graph_service.extract_and_link_concepts(
-                    memory_id=memory_id,
-                    content=content,
-                    concepts=concepts
+            # Store in vector database with a single write
+            memory_ids = await vector_service.store_memories_batch(user_id, memories, embeddings)
+            
+            # Store in graph database and link concepts in one transaction
+            async with graph_service.transaction() as tx:
+                await graph_service.create_memory_nodes_batch(
+                    user_id=user_id,
+                    memories=[
+                        {**memory, "memory_id": memory_id}
+                        for memory, memory_id in zip(memories, memory_ids)
+                    ],
+                    tx=tx
+                )
+                await graph_service.extract_and_link_concepts_batch(
+                    dict(zip(memory_ids, concept_lists)),
+                    tx=tx
                 )
             
             # Find and create relationships with existing memories
-            await self._create_memory_relationships(user_id, memory_id, content)
+            await asyncio.gather(*(
+                self._create_memory_relationships(user_id, memory_id, content, embedding)
+                for memory_id, content, embedding in zip(memory_ids, contents, embeddings)
+            ))
             
-            logger.info(f"Memory stored with context: {memory_id}")
-            return {"memory_id": memory_id, "concepts_extracted": len(concepts)}
+            logger.info(f"Stored {len(memory_ids)} memories with context for user {user_id}")
+            return [
+                {"memory_id": memory_id, "concepts_extracted": len(concepts)}
+                for memory_id, concepts in zip(memory_ids, concept_lists)
+            ]
             
         except Exception as e:
-            logger.error(f"Failed to store memory with context: {str(e)}")
+            logger.error(f"Failed to store memories with context: {str(e)}")
             raise
     
     async def retrieve_relevant_context(
@@ -86,38 +157,74 @@ class RAGService:
         include_graph_context: bool = True
     ) -> Dict[str, Any]:
         """Retrieve relevant memories and context using hybrid approach"""
+        prefetch_task = None
         try:
-            vector_service = await get_vector_service()
-            graph_service = await get_graph_service()
-            
-            # 1. Vector similarity search for memories
-            vector_memories = await vector_service.search_relevant_memories(
-                user_id=user_id,
-                query=query,
-                limit=max_memories,
-                min_importance=3
-            )
-            
-            # 2. Search conversation history for context
-            conversation_context = await vector_service.search_conversation_context(
-                user_id=user_id,
-                query=query,
-                exclude_conversation_id=conversation_id,
-                limit=3
+            vector_service, graph_service = await self._services()
+            
+            # Speculatively fetch graph neighbours of recently used seed memories
+            # while the vector search runs
+            recent_ids = list(self._recent_memory_ids.get(user_id, ()))
+            if include_graph_context and recent_ids:
+                prefetch_task = asyncio.create_task(graph_service.find_related_memories_batch(
+                    memory_ids=recent_ids,
+                    max_depth=2,
+                    limit=3
+                ))
+            
+            # Embed the query once for both searches
+            query_embedding = await vector_service.embed(query)
+            
+            # 1. Vector similarity search for memories and
+            # 2. search conversation history for context, concurrently
+            vector_memories, conversation_context = await asyncio.gather(
+                vector_service.search_relevant_memories(
+                    user_id=user_id,
+                    query=query,
+                    limit=max_memories,
+                    min_importance=3,
+                    query_embedding=query_embedding
+                ),
+                vector_service.search_conversation_context(
+                    user_id=user_id,
+                    query=query,
+                    exclude_conversation_id=conversation_id,
+                    limit=3,
+                    query_embedding=query_embedding
+                )
             )
             
             # 3. Get graph-based relationships if enabled
             graph_memories = []
             if include_graph_context and vector_memories:
-                for memory in vector_memories[:2]:  # Use top 2 memories to find related ones
-                    memory_id = memory.get("metadata", {}).get("memory_id")
-                    if memory_id:
-                        related = await graph_service.find_related_memories(
-                            memory_id=memory_id,
-                            max_depth=2,
-                            limit=3
-                        )
-                        graph_memories.extend(related)
+                # Use top 2 memories to find related ones
+                seed_ids = [
+                    memory_id
+                    for memory in vector_memories[:2]
+                    if (memory_id := memory.get("metadata", {}).get("memory_id"))
+                ]
+                hit_ids = [memory_id for memory_id in seed_ids if memory_id in recent_ids]
+                miss_ids = [memory_id for memory_id in seed_ids if memory_id not in recent_ids]
+                
+                lookups = [graph_service.find_related_memories_batch(
+                    memory_ids=miss_ids,
+                    max_depth=2,
+                    limit=3
+                )]
+                if hit_ids:
+                    lookups.append(prefetch_task)
+                
+                related_by_seed = {}
+                for related in await asyncio.gather(*lookups):
+                    related_by_seed.update(related)
+                
+                logger.debug("Graph prefetch hits for user %s: %s/%s", user_id, len(hit_ids), len(seed_ids))
+                self._remember_memory_ids(user_id, seed_ids)
+                
+                graph_memories = [
+                    related
+                    for memory_id in seed_ids
+                    for related in related_by_seed.get(memory_id, [])
+                ]
             
             # 4. Combine and deduplicate results
             combined_context = await self._combine_context_sources(
@@ -142,6 +249,20 @@ class RAGService:
         except Exception as e:
             logger.error(f"Failed to retrieve context: {str(e)}")
             return {"context": "", "sources": {}, "memory_details": []}
+        
+        finally:
+            # Drop a prefetch that turned out not to be needed
+            if prefetch_task is not None and not prefetch_task.done():
+                prefetch_task.cancel()
+    
+    def _remember_memory_ids(self, user_id: int, memory_ids: List[str]):
+        """Record seed memories as recently used so their neighbours are prefetched next time"""
+        recent = self._recent_memory_ids.setdefault(user_id, OrderedDict())
+        for memory_id in memory_ids:
+            recent[memory_id] = None
+            recent.move_to_end(memory_id)
+        while len(recent) > RECENT_MEMORY_IDS_SIZE:
+            recent.popitem(last=False)
     
     async def generate_enhanced_response(
         self,
@@ -152,40 +273,15 @@ class RAGService:
     ) -> Dict[str, Any]:
         """Generate AI response enhanced with RAG context"""
         try:
-            # Retrieve relevant context
-            context_data = await self.retrieve_relevant_context(
+            messages, context_data = await self._prepare_messages(
                 user_id=user_id,
-                query=user_message,
-                conversation_id=conversation_id,
-                max_memories=5
-            )
-            
-            # Build enhanced system message
-            system_message = await self._build_enhanced_system_message(
-                user_id=user_id,
-                context=context_data["context"]
+                user_message=user_message,
+                conversation_history=conversation_history,
+                conversation_id=conversation_id
             )
             
-            # Prepare messages for OpenAI
-            messages = [system_message]
-            
-            # Add conversation history (limited by tokens)
-            history_tokens = 0
-            for msg in conversation_history[-10:]:  # Last 10 messages max
-                msg_tokens = len(self.encoding.encode(msg["content"]))
-                if history_tokens + msg_tokens > 1000:  # Reserve 1000 tokens for history
-                    break
-                messages.append(msg)
-                history_tokens += msg_tokens
-            
-            # Add current user message
-            messages.append({
-                "role": "user",
-                "content": user_message
-            })
-            
             # Generate response
-            response = self.openai_client.chat.completions.create(
+            response = await self.openai_client.chat.completions.create(
                 model=settings.openai_model,
                 messages=messages,
                 max_tokens=600,
@@ -196,25 +292,14 @@ class RAGService:
             
             aeon_response = response.choices[0].message.content.strip()
             
-            # Store conversation chunk for future retrieval
-            await self._store_conversation_chunk(
-                user_id=user_id,
-                conversation_id=conversation_id or 0,
-                content=f"User: {user_message}\nAEON: {aeon_response}"
-            )
-            
-            # Extract and store any new memories from the conversation
-            await self._extract_conversation_memories(
-                user_id=user_id,
-                user_message=user_message,
-                aeon_response=aeon_response
-            )
+            await self.finalize_response(user_id, user_message, aeon_response, conversation_id)
             
             return {
                 "response": aeon_response,
                 "context_used": context_data["sources"],
                 "memories_referenced": len(context_data["memory_details"]),
-                "tokens_used": response.usage.total_tokens if hasattr(response, 'usage') else None
+                "tokens_used": response.usage.total_tokens if hasattr(response, 'usage') else None,
+                "cached_tokens": self._cached_prompt_tokens(response)
             }
             
         except Exception as e:
@@ -226,63 +311,207 @@ class RAGService:
                 "tokens_used": 0
             }
     
+    async def generate_enhanced_response_stream(
+        self,
+        user_id: int,
+        user_message: str,
+        conversation_history: List[Dict[str, str]],
+        conversation_id: Optional[int] = None
+    ) -> AsyncIterator[str]:
+        """Stream an AI response enhanced with RAG context, one text delta at a time
+        
+        The caller owns the finished text, so it is responsible for calling
+        finalize_response once the stream is exhausted.
+        """
+        messages, _ = await self._prepare_messages(
+            user_id=user_id,
+            user_message=user_message,
+            conversation_history=conversation_history,
+            conversation_id=conversation_id
+        )
+        
+        stream = await self.openai_client.chat.completions.create(
+            model=settings.openai_model,
+            messages=messages,
+            max_tokens=600,
+            temperature=0.7,
+            presence_penalty=0.1,
+            frequency_penalty=0.1,
+            stream=True
+        )
+        
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                yield delta
+    
+    @staticmethod
+    def _cached_prompt_tokens(response) -> Optional[int]:
+        """Prompt tokens served from the provider's prompt cache, when reported"""
+        usage = getattr(response, "usage", None)
+        details = getattr(usage, "prompt_tokens_details", None)
+        return getattr(details, "cached_tokens", None)
+    
+    async def _prepare_messages(
+        self,
+        user_id: int,
+        user_message: str,
+        conversation_history: List[Dict[str, str]],
+        conversation_id: Optional[int] = None
+    ) -> Tuple[List[Dict[str, str]], Dict[str, Any]]:
+        """Retrieve context and assemble the OpenAI message list for a turn"""
+        # Retrieve relevant context
+        context_data = await self.retrieve_relevant_context(
+            user_id=user_id,
+            query=user_message,
+            conversation_id=conversation_id,
+            max_memories=5
+        )
+        
+        # Build the per-turn context message
+        context_message = await self._build_enhanced_system_message(
+            user_id=user_id,
+            context=context_data["context"]
+        )
+        
+        # Prepare messages for OpenAI, stable prefix first
+        messages = [_AEON_PERSONA_MESSAGE]
+        
+        # Add conversation history (limited by tokens), keeping the newest messages
+        # when over budget; counts are memoised, so only new messages get tokenized
+        history_tokens = 0
+        kept_history = []
+        for msg in reversed(conversation_history[-10:]):  # Last 10 messages max
+            msg_tokens = _count_tokens(msg["content"])
+            if history_tokens + msg_tokens > 1000:  # Reserve 1000 tokens for history
+                break
+            kept_history.append(msg)
+            history_tokens += msg_tokens
+        messages.extend(reversed(kept_history))
+        
+        # Add volatile context last, then the current user message
+        messages.append(context_message)
+        messages.append({
+            "role": "user",
+            "content": user_message
+        })
+        
+        return messages, context_data
+    
+    async def finalize_response(
+        self,
+        user_id: int,
+        user_message: str,
+        aeon_response: str,
+        conversation_id: Optional[int] = None
+    ):
+        """Store the finished turn for future retrieval and extract memories from it"""
+        # Store conversation chunk for future retrieval, and extract and store
+        # any new memories from the conversation; both handle their own errors
+        await asyncio.gather(
+            self._store_conversation_chunk(
+                user_id=user_id,
+                conversation_id=conversation_id or 0,
+                content=f"User: {user_message}\nAEON: {aeon_response}"
+            ),
+            self._extract_conversation_memories(
+                user_id=user_id,
+                user_message=user_message,
+                aeon_response=aeon_response
+            )
+        )
+    
     async def _extract_concepts(self, content: str) -> List[str]:
         """Extract key concepts from content using NLP"""
         try:
-            # Use OpenAI to extract concepts
-            response = self.openai_client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "Extract 3-5 key concepts or topics from the following text. Return only the concepts separated by commas, no explanations."
-                    },
-                    {
-                        "role": "user",
-                        "content": content
-                    }
-                ],
-                max_tokens=50,
-                temperature=0.3
+            if settings.concept_extractor == "openai":
+                compute = partial(self._extract_concepts_openai, content)
+            else:
+                # Local keyword extraction is CPU-bound; keep it off the event loop
+                compute = partial(asyncio.to_thread, self._extract_concepts_local, content)
+            
+            # Keyed by extractor so switching extractors does not serve stale concepts
+            cache_service = await get_cache_service()
+            return await cache_service.get_or_compute(
+                content_key(f"concepts:{settings.concept_extractor}", content),
+                compute,
+                encode=orjson.dumps,
+                decode=orjson.loads
             )
             
-            concepts_text = response.choices[0].message.content.strip()
-            concepts = [c.strip().lower() for c in concepts_text.split(",") if c.strip()]
-            
-            return concepts[:5]  # Limit to 5 concepts
-            
         except Exception as e:
             logger.error(f"Failed to extract concepts: {str(e)}")
             # Fallback: simple keyword extraction
-            words = re.findall(r'\b[a-zA-Z]{4,}\b', content.lower())
-            return list(set(words))[:5]
+            words = {match.group(0).lower() for match in _WORD_RE.finditer(content)}
+            return list(words)[:5]
+    
+    def _extract_concepts_local(self, content: str) -> List[str]:
+        """Extract up to 5 single-word keywords locally with YAKE"""
+        keywords = self.keyword_extractor.extract_keywords(content)
+        return [keyword.lower() for keyword, _ in keywords][:5]
     
-    async def _create_memory_relationships(self, user_id: int, memory_id: str, content: str):
+    async def _extract_concepts_openai(self, content: str) -> List[str]:
+        """Extract 3-5 key concepts with a chat completion"""
+        response = await self.openai_client.chat.completions.create(
+            model="gpt-3.5-turbo",
+            messages=[
+                {
+                    "role": "system",
+                    "content": "Extract 3-5 key concepts or topics from the following text. Return only the concepts separated by commas, no explanations."
+                },
+                {
+                    "role": "user",
+                    "content": content
+                }
+            ],
+            max_tokens=50,
+            temperature=0.3
+        )
+        
+        concepts_text = response.choices[0].message.content.strip()
+        concepts = [c.strip().lower() for c in concepts_text.split(",") if c.strip()]
+        
+        return concepts[:5]  # Limit to 5 concepts
+    
+    async def _create_memory_relationships(
+        self,
+        user_id: int,
+        memory_id: str,
+        content: str,
+        embedding: Optional[List[float]] = None
+    ):
         """Create relationships between memories based on similarity"""
         try:
-            vector_service = await get_vector_service()
-            graph_service = await get_graph_service()
+            vector_service, graph_service = await self._services()
             
             # Find similar memories
             similar_memories = await vector_service.search_relevant_memories(
                 user_id=user_id,
                 query=content,
                 limit=3,
-                min_importance=1
+                min_importance=1,
+                query_embedding=embedding,
+                min_score=0.7  # High similarity threshold
             )
+            if not similar_memories:
+                return
             
             # Create relationships in graph
+            relationships = []
             for similar in similar_memories:
                 similar_id = similar.get("metadata", {}).get("memory_id")
                 if similar_id and similar_id != memory_id:
-                    relevance = similar.get("relevance_score", 0)
-                    if relevance > 0.7:  # High similarity threshold
-                        await graph_service.create_memory_relationship(
-                            memory_id1=memory_id,
-                            memory_id2=similar_id,
-                            relationship_type="similar",
-                            strength=relevance
-                        )
+                    relationships.append({
+                        "memory_id1": memory_id,
+                        "memory_id2": similar_id,
+                        "relationship_type": "similar",
+                        "strength": similar["relevance_score"]
+                    })
+            
+            if relationships:
+                await graph_service.create_memory_relationships_batch(relationships)
             
         except Exception as e:
             logger.error(f"Failed to create memory relationships: {str(e)}")
@@ -295,31 +524,24 @@ class RAGService:
     ) -> List[Dict]:
         """Combine and deduplicate context from different sources"""
         combined = []
-        seen_content = set()
-        
-        # Prioritize vector memories (highest relevance)
-        for memory in vector_memories:
-            content = memory.get("content", "")
-            if content not in seen_content:
-                memory["source"] = "vector"
-                combined.append(memory)
-                seen_content.add(content)
+        seen_hashes: Set[int] = set()
         
-        # Add graph memories (relationships)
-        for memory in graph_memories:
-            content = memory.get("content", "")
-            if content not in seen_content:
-                memory["source"] = "graph"
-                combined.append(memory)
-                seen_content.add(content)
+        # Sources in priority order: vector memories (highest relevance),
+        # graph memories (relationships), then conversation context
+        sources = (
+            ("vector", vector_memories),
+            ("graph", graph_memories),
+            ("conversation", conversation_context)
+        )
         
-        # Add conversation context
-        for context in conversation_context:
-            content = context.get("content", "")
-            if content not in seen_content:
-                context["source"] = "conversation"
-                combined.append(context)
-                seen_content.add(content)
+        for source, items in sources:
+            for item in items:
+                content_hash = hash(item.get("content", ""))
+                if content_hash in seen_hashes:
+                    continue
+                seen_hashes.add(content_hash)
+                item["source"] = source
+                combined.append(item)
         
         return combined
     
@@ -329,6 +551,10 @@ class RAGService:
         total_tokens = 0
         
         for item in context_items:
+            # Nothing meaningful fits once the budget is nearly used up
+            if total_tokens >= self.max_context_tokens * 0.95:
+                break
+            
             content = item.get("content", "")
             source = item.get("source", "unknown")
             importance = item.get("importance", 0)
@@ -339,8 +565,12 @@ class RAGService:
             else:
                 formatted = f"[Memory - {source}, importance: {importance}]: {content}"
             
+            # Cheap ~4 chars/token estimate first; only tokenize items that could fit
+            if total_tokens + (len(formatted) >> 2) > self.max_context_tokens * 1.1:
+                break
+            
             # Check token count
-            item_tokens = len(self.encoding.encode(formatted))
+            item_tokens = _count_tokens(formatted)
             if total_tokens + item_tokens > self.max_context_tokens:
                 break
                 
@@ -350,23 +580,19 @@ class RAGService:
         return "\n\n".join(context_parts)
     
     async def _build_enhanced_system_message(self, user_id: int, context: str) -> Dict[str, str]:
-        """Build an enhanced system message with context"""
-        graph_service = await get_graph_service()
+        """Build the per-turn system message carrying memory context and knowledge summary"""
+        _, graph_service = await self._services()
         
         # Get user knowledge graph summary
         kg_summary = await graph_service.get_user_knowledge_graph(user_id)
         
-        system_content = f"""You are AEON, a digital AI twin with perfect memory and deep understanding of your owner.
-
-MEMORY CONTEXT:
+        system_content = f"""MEMORY CONTEXT:
 {context}
 
 KNOWLEDGE SUMMARY:
 - Memories stored: {kg_summary.get('memory_count', 0)}
 - Concepts learned: {kg_summary.get('concept_count', 0)}
-- Conversations: {kg_summary.get('conversation_count', 0)}
-
-Use the memory context above to provide personalized, contextual responses. Reference specific memories when relevant, and show that you remember and understand your owner's experiences, preferences, and personality. Always respond as if you're having a natural conversation with someone you know intimately well."""
+- Conversations: {kg_summary.get('conversation_count', 0)}"""
         
         return {
             "role": "system",
@@ -375,28 +601,38 @@ Use the memory context above to provide personalized, contextual responses. Refe
     
     async def _store_conversation_chunk(self, user_id: int, conversation_id: int, content: str):
         """Store conversation chunk for future retrieval"""
+        # Create a chunk index and timestamp from a single clock read
+        now = datetime.now(timezone.utc)
+        chunk_index = int(now.timestamp())
+        metadata = {"stored_at": now.isoformat()}
+        
         try:
-            vector_service = await get_vector_service()
-            
-            # Create a chunk index based on current time
-            chunk_index = int(datetime.utcnow().timestamp())
+            vector_service, _ = await self._services()
             
             await vector_service.store_conversation_chunk(
                 user_id=user_id,
                 conversation_id=conversation_id,
                 content=content,
                 chunk_index=chunk_index,
-                metadata={"stored_at": datetime.utcnow().isoformat()}
+                metadata=metadata
             )
             
         except Exception as e:
             logger.error(f"Failed to store conversation chunk: {str(e)}")
     
+    @staticmethod
+    def _maybe_memorable(user_message: str) -> bool:
+        """Whether a turn could hold something worth remembering, so small talk skips the LLM check"""
+        return len(user_message) >= MEMORABLE_MIN_LENGTH or _MEMORABLE_RE.search(user_message) is not None
+    
     async def _extract_conversation_memories(self, user_id: int, user_message: str, aeon_response: str):
         """Extract important memories from conversation"""
+        if not self._maybe_memorable(user_message):
+            return
+        
         try:
             # Use OpenAI to determine if conversation contains memorable information
-            response = self.openai_client.chat.completions.create(
+            response = await self.openai_client.chat.completions.create(
                 model="gpt-3.5-turbo",
                 messages=[
                     {
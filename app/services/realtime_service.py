@@ -3,15 +3,21 @@ Real-time service for Phase 3 WebSocket communication and chat rooms
 """
 
 import asyncio
-import json
+import time
+import orjson
 import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Dict, List, Optional, Set, Any
+from typing import Dict, List, Optional, Set, Tuple, Any
 from fastapi import WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from sqlalchemy import or_, bindparam, func, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 from app.core.logging import get_logger
+from app.database.session import SessionLocal
 from app.database.models import (
     User, ChatRoom, RealTimeMessage, RoomParticipant, UserPresence
 )
@@ -19,24 +25,115 @@ from app.models.aeon import (
     RealTimeMessage as RealTimeMessageModel,
     UserPresence as UserPresenceModel,
     ChatRoom as ChatRoomModel,
-    ConnectionStatus
+    ConnectionStatus,
+    ChatMessageEvent,
+    RoomEvent,
+    TypingEvent
 )
 
 logger = get_logger(__name__)
 
+# Outgoing messages buffered per connection; a client this far behind is evicted
+SEND_QUEUE_SIZE = 256
+# Close codes for sockets the server drops: 1013 (try again later) for clients
+# too slow to keep up, 1011 (internal error) when a send fails
+SLOW_CLIENT_CLOSE_CODE = 1013
+SEND_FAILED_CLOSE_CODE = 1011
+# Messages already queued when the writer wakes are coalesced, up to this many per frame
+SEND_BATCH_SIZE = 64
+# Chat messages are persisted in the background, up to this many per commit,
+# waiting at most this long (seconds) for a batch to fill
+PERSIST_BATCH_SIZE = 100
+PERSIST_BATCH_WINDOW = 0.01
+# Repeated "is typing" events from a user within this window (seconds) are not rebroadcast
+TYPING_DEBOUNCE_WINDOW = 0.5
+# Room info reused across join/info requests; rooms are never edited after creation
+ROOM_CACHE_SIZE = 1024
+ROOM_CACHE_TTL = 60
+# Rooms whose membership changed have their stored participant count reconciled on this interval (seconds)
+PARTICIPANT_COUNT_FLUSH_INTERVAL = 5
+
+
+# Statements built once at import; handlers only bind parameters
+_ACTIVE_PARTICIPANT_STMT = select(RoomParticipant).where(
+    RoomParticipant.room_id == bindparam("room_id"),
+    RoomParticipant.user_id == bindparam("user_id"),
+    RoomParticipant.is_active == True
+)
+_ROOM_STMT = select(ChatRoom).where(ChatRoom.id == bindparam("room_id"))
+_ROOM_PARTICIPANTS_STMT = select(
+    RoomParticipant.room_id,
+    RoomParticipant.joined_at,
+    User.id,
+    User.username
+).join(User, User.id == RoomParticipant.user_id).where(RoomParticipant.is_active == True)
+_RECOUNT_PARTICIPANTS_STMT = update(ChatRoom).where(
+    ChatRoom.id.in_(bindparam("room_ids", expanding=True))
+).values(
+    current_participants=select(func.count(RoomParticipant.id)).where(
+        RoomParticipant.room_id == ChatRoom.id,
+        RoomParticipant.is_active == True
+    ).scalar_subquery()
+)
+# Single upsert keyed on the unique user_id instead of SELECT then UPDATE/INSERT
+_UPSERT_PRESENCE_STMT = sqlite_insert(UserPresence).values(
+    user_id=bindparam("user_id"),
+    status=bindparam("status"),
+    last_seen=bindparam("last_seen"),
+    is_aeon=False
+).on_conflict_do_update(
+    index_elements=[UserPresence.user_id],
+    set_={"status": bindparam("status"), "last_seen": bindparam("last_seen")}
+)
+
+
+def _encode(message: Dict[str, Any]) -> bytes:
+    """Serialize an outgoing message once to UTF-8 JSON, reused for every recipient
+    
+    Datetimes are left in payloads; naive ones are our UTC timestamps and are
+    formatted by orjson with a Z suffix.
+    """
+    return orjson.dumps(message, option=orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z)
+
+
+@dataclass(slots=True)
+class ClientConnection:
+    """A connected socket with its outgoing queue and the writer task draining it"""
+    websocket: WebSocket
+    queue: asyncio.Queue
+    writer_task: Optional[asyncio.Task] = None
+
 
 class ConnectionManager:
     """Manages WebSocket connections and real-time messaging"""
     
     def __init__(self):
-        self.active_connections: Dict[int, WebSocket] = {}
+        self.active_connections: Dict[int, ClientConnection] = {}
         self.room_connections: Dict[str, Set[int]] = {}
+        # Reverse index of room_connections, so disconnect only visits the user's rooms
+        self.user_rooms: Dict[int, Set[str]] = {}
+        # Immutable (user_id, send queue) tuples per room, rebuilt only after membership changes
+        self.room_snapshots: Dict[str, Tuple[Tuple[int, asyncio.Queue], ...]] = {}
         self.user_presence: Dict[int, UserPresenceModel] = {}
+        # Strong references to socket close tasks until they finish
+        self._close_tasks: Set[asyncio.Task] = set()
     
-    async def connect(self, websocket: WebSocket, user_id: int, username: str):
-        """Connect a user to the WebSocket"""
+    async def connect(self, websocket: WebSocket, user_id: int, username: str) -> ClientConnection:
+        """Connect a user to the WebSocket, returning the connection now registered for them"""
         await websocket.accept()
-        self.active_connections[user_id] = websocket
+        
+        # Replace a previous connection for this user; snapshots of its rooms hold the old queue
+        previous = self.active_connections.get(user_id)
+        if previous is not None:
+            previous.writer_task.cancel()
+            self._close_later(previous.websocket, 1000, "Replaced by a newer connection")
+            for room_id in self.user_rooms.get(user_id, ()):
+                self.room_snapshots.pop(room_id, None)
+        
+        # Start the outgoing message writer
+        connection = ClientConnection(websocket=websocket, queue=asyncio.Queue(maxsize=SEND_QUEUE_SIZE))
+        connection.writer_task = asyncio.create_task(self._writer(user_id, connection))
+        self.active_connections[user_id] = connection
         
         # Update user presence
         presence = UserPresenceModel(
@@ -52,11 +149,17 @@ class ConnectionManager:
         await self.broadcast_presence_update(presence, exclude_user=user_id)
         
         logger.info(f"User {username} (ID: {user_id}) connected")
+        return connection
+    
+    def is_current(self, user_id: int, connection: ClientConnection) -> bool:
+        """Whether the connection is still the one registered for the user, i.e. not evicted or replaced"""
+        return self.active_connections.get(user_id) is connection
     
     def disconnect(self, user_id: int):
         """Disconnect a user from the WebSocket"""
-        if user_id in self.active_connections:
-            del self.active_connections[user_id]
+        connection = self.active_connections.pop(user_id, None)
+        if connection is not None:
+            connection.writer_task.cancel()
         
         # Update user presence
         if user_id in self.user_presence:
@@ -64,53 +167,132 @@ class ConnectionManager:
             self.user_presence[user_id].last_seen = datetime.utcnow()
         
         # Remove from all rooms
-        for room_id in list(self.room_connections.keys()):
-            if user_id in self.room_connections[room_id]:
-                self.room_connections[room_id].discard(user_id)
-                if not self.room_connections[room_id]:
-                    del self.room_connections[room_id]
+        for room_id in tuple(self.user_rooms.get(user_id, ())):
+            self.leave_room(room_id, user_id)
         
         logger.info(f"User ID {user_id} disconnected")
     
-    async def send_personal_message(self, message: str, user_id: int):
-        """Send a personal message to a specific user"""
-        if user_id in self.active_connections:
-            try:
-                await self.active_connections[user_id].send_text(message)
-            except Exception as e:
-                logger.error(f"Error sending personal message to user {user_id}: {e}")
-                self.disconnect(user_id)
-    
-    async def broadcast_to_room(self, message: str, room_id: str, exclude_user: Optional[int] = None):
-        """Broadcast a message to all users in a room"""
-        if room_id in self.room_connections:
-            disconnected_users = []
-            for user_id in self.room_connections[room_id]:
-                if user_id != exclude_user:
-                    try:
-                        await self.active_connections[user_id].send_text(message)
-                    except Exception as e:
-                        logger.error(f"Error broadcasting to user {user_id}: {e}")
-                        disconnected_users.append(user_id)
-            
-            # Clean up disconnected users
-            for user_id in disconnected_users:
-                self.disconnect(user_id)
+    def join_room(self, room_id: str, user_id: int):
+        """Add a connected user to a room's broadcast group"""
+        self.room_connections.setdefault(room_id, set()).add(user_id)
+        self.user_rooms.setdefault(user_id, set()).add(room_id)
+        self.room_snapshots.pop(room_id, None)
+    
+    def leave_room(self, room_id: str, user_id: int):
+        """Remove a user from a room's broadcast group, dropping the room when empty"""
+        members = self.room_connections.get(room_id)
+        if members is None or user_id not in members:
+            return
+        members.discard(user_id)
+        if not members:
+            del self.room_connections[room_id]
+        rooms = self.user_rooms[user_id]
+        rooms.discard(room_id)
+        if not rooms:
+            del self.user_rooms[user_id]
+        self.room_snapshots.pop(room_id, None)
+    
+    def _room_members(self, room_id: str) -> Tuple[Tuple[int, asyncio.Queue], ...]:
+        """Snapshot of a room's members and their send queues, shared by every broadcast until membership changes"""
+        snapshot = self.room_snapshots.get(room_id)
+        if snapshot is None:
+            members = self.room_connections.get(room_id)
+            if not members:
+                return ()
+            connections = self.active_connections
+            snapshot = self.room_snapshots[room_id] = tuple(
+                (user_id, connections[user_id].queue) for user_id in members if user_id in connections
+            )
+        return snapshot
+    
+    async def _writer(self, user_id: int, connection: ClientConnection):
+        """Send queued messages in order so producers never wait on a slow socket
+        
+        Messages that queued up while the previous send was in flight go out
+        together as one "batch" frame.
+        """
+        websocket = connection.websocket
+        queue = connection.queue
+        try:
+            while True:
+                batch = [await queue.get()]
+                while len(batch) < SEND_BATCH_SIZE and not queue.empty():
+                    batch.append(queue.get_nowait())
+                
+                if len(batch) == 1:
+                    frame = batch[0]
+                else:
+                    # Messages are already encoded JSON objects; splice them into the envelope
+                    frame = b'{"type":"batch","data":[' + b",".join(batch) + b"]}"
+                await websocket.send_bytes(frame)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"Error sending to user {user_id}: {e}")
+            self._evict(user_id, connection, SEND_FAILED_CLOSE_CODE, "Send failed")
+    
+    def _evict(self, user_id: int, connection: ClientConnection, code: int, reason: str):
+        """Close a socket the server will no longer write to, then drop its state
+        
+        Closing tells the client to reconnect instead of silently receiving
+        nothing, and ends the receive loop still serving the old socket.
+        """
+        self._close_later(connection.websocket, code, reason)
+        # Only tear down the state if it still belongs to this connection
+        if self.is_current(user_id, connection):
+            self.disconnect(user_id)
+    
+    def _close_later(self, websocket: WebSocket, code: int, reason: str):
+        """Close a socket without blocking the caller, which may be a send path"""
+        task = asyncio.create_task(self._close(websocket, code, reason))
+        self._close_tasks.add(task)
+        task.add_done_callback(self._close_tasks.discard)
+    
+    @staticmethod
+    async def _close(websocket: WebSocket, code: int, reason: str):
+        """Close a socket, ignoring one that is already gone"""
+        try:
+            await websocket.close(code=code, reason=reason)
+        except Exception:
+            pass
+    
+    def _queue_message(self, message: bytes, user_id: int):
+        """Queue a pre-encoded message for the user's writer"""
+        connection = self.active_connections.get(user_id)
+        if connection is not None:
+            self._put(connection.queue, message, user_id)
+    
+    def _put(self, queue: asyncio.Queue, message: bytes, user_id: int):
+        """Add a message to a send queue, evicting clients that fall too far behind"""
+        try:
+            queue.put_nowait(message)
+        except asyncio.QueueFull:
+            connection = self.active_connections.get(user_id)
+            # A stale room snapshot may still hold the queue of a replaced connection
+            if connection is not None and connection.queue is queue:
+                logger.warning(f"Send queue full for user {user_id}; disconnecting slow client")
+                self._evict(user_id, connection, SLOW_CLIENT_CLOSE_CODE, "Client too slow")
+    
+    async def send_personal_message(self, message: bytes, user_id: int):
+        """Send a pre-encoded personal message to a specific user"""
+        self._queue_message(message, user_id)
+    
+    async def broadcast_to_room(self, message: bytes, room_id: str, exclude_user: Optional[int] = None):
+        """Broadcast a pre-encoded message to all users in a room"""
+        # Iterate the snapshot; evicting a slow client mutates the room set
+        for user_id, queue in self._room_members(room_id):
+            if user_id != exclude_user:
+                self._put(queue, message, user_id)
     
     async def broadcast_presence_update(self, presence: UserPresenceModel, exclude_user: Optional[int] = None):
         """Broadcast user presence update to all connected users"""
-        message = {
+        payload = _encode({
             "type": "presence_update",
             "data": presence.model_dump()
-        }
-        
-        for user_id in list(self.active_connections.keys()):
+        })
+        for user_id, connection in tuple(self.active_connections.items()):
             if user_id != exclude_user:
-                try:
-                    await self.active_connections[user_id].send_text(json.dumps(message))
-                except Exception as e:
-                    logger.error(f"Error broadcasting presence update to user {user_id}: {e}")
-                    self.disconnect(user_id)
+                self._put(connection.queue, payload, user_id)
 
 
 class RealTimeService:
@@ -118,30 +300,60 @@ class RealTimeService:
     
     def __init__(self):
         self.connection_manager = ConnectionManager()
+        self._persist_queue: Optional[asyncio.Queue] = None
+        self._persist_task: Optional[asyncio.Task] = None
+        # user_id -> (timer closing the debounce window, room the indicator was sent to)
+        self._typing_debounce: Dict[int, Tuple[asyncio.TimerHandle, str]] = {}
+        
+        # room_id -> (loaded_at, room_info payload), least recently used first
+        self._room_cache: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        # Rooms whose chat_rooms.current_participants needs reconciling
+        self._dirty_rooms: Set[str] = set()
+        self._count_flush_task: Optional[asyncio.Task] = None
+        
+        # Message type -> (handler(event, user_id, username, db), event model)
+        self._handlers = {
+            "chat_message": (self.handle_chat_message, ChatMessageEvent),
+            "join_room": (self.handle_join_room, RoomEvent),
+            "leave_room": (self.handle_leave_room, RoomEvent),
+            "typing": (self.handle_typing, TypingEvent)
+        }
     
     async def handle_websocket_connection(
         self, 
         websocket: WebSocket, 
         user_id: int, 
-        username: str,
-        db: Session
+        username: str
     ):
-        """Handle WebSocket connection for a user"""
+        """Handle WebSocket connection for a user
+        
+        Database sessions are opened per operation rather than held for the
+        lifetime of the socket, so idle connections do not pin pooled connections.
+        """
+        connection = None
         try:
-            await self.connection_manager.connect(websocket, user_id, username)
-            
-            # Update database presence
-            await self.update_user_presence(db, user_id, ConnectionStatus.CONNECTED)
+            connection = await self.connection_manager.connect(websocket, user_id, username)
             
-            # Send current room participants
-            await self.send_room_participants(user_id, db)
+            with SessionLocal() as db:
+                # Update database presence
+                await self.update_user_presence(db, user_id, ConnectionStatus.CONNECTED, self._last_seen(user_id))
+                
+                # Send current room participants
+                await self.send_room_participants(user_id, db)
             
             # Main message loop
             while True:
                 try:
-                    data = await websocket.receive_text()
-                    message_data = json.loads(data)
-                    await self.handle_message(message_data, user_id, username, db)
+                    # Clients may send text or binary frames; orjson parses either
+                    message = await websocket.receive()
+                    if message["type"] == "websocket.disconnect":
+                        raise WebSocketDisconnect(message.get("code", 1000))
+                    # An evicted or replaced socket must not re-register the user
+                    if not self.connection_manager.is_current(user_id, connection):
+                        break
+                    message_data = orjson.loads(message.get("bytes") or message.get("text"))
+                    with SessionLocal() as db:
+                        await self.handle_message(message_data, user_id, username, db)
                 except WebSocketDisconnect:
                     break
                 except Exception as e:
@@ -153,29 +365,35 @@ class RealTimeService:
         except Exception as e:
             logger.error(f"WebSocket error for user {user_id}: {e}")
         finally:
-            self.connection_manager.disconnect(user_id)
-            await self.update_user_presence(db, user_id, ConnectionStatus.DISCONNECTED)
+            # Leave a newer connection for the same user alone
+            if connection is not None and self.connection_manager.is_current(user_id, connection):
+                self.connection_manager.disconnect(user_id)
+            if user_id not in self.connection_manager.active_connections:
+                with SessionLocal() as db:
+                    await self.update_user_presence(db, user_id, ConnectionStatus.DISCONNECTED, self._last_seen(user_id))
     
     async def handle_message(self, message_data: Dict[str, Any], user_id: int, username: str, db: Session):
         """Handle incoming WebSocket message"""
         message_type = message_data.get("type")
-        
-        if message_type == "chat_message":
-            await self.handle_chat_message(message_data, user_id, username, db)
-        elif message_type == "join_room":
-            await self.handle_join_room(message_data, user_id, username, db)
-        elif message_type == "leave_room":
-            await self.handle_leave_room(message_data, user_id, username, db)
-        elif message_type == "typing":
-            await self.handle_typing(message_data, user_id, username, db)
-        else:
+        entry = self._handlers.get(message_type)
+        if entry is None:
             logger.warning(f"Unknown message type: {message_type}")
+            return
+        
+        # Validate once into a typed event instead of dict lookups in each handler
+        handler, event_model = entry
+        try:
+            event = event_model.model_validate(message_data)
+        except ValidationError:
+            await self.send_error_message(user_id, "Invalid message format")
+            return
+        await handler(event, user_id, username, db)
     
-    async def handle_chat_message(self, message_data: Dict[str, Any], user_id: int, username: str, db: Session):
+    async def handle_chat_message(self, event: ChatMessageEvent, user_id: int, username: str, db: Session):
         """Handle chat message"""
-        content = message_data.get("content", "")
-        room_id = message_data.get("room_id")
-        message_type = message_data.get("message_type", "text")
+        content = event.content
+        room_id = event.room_id
+        message_type = event.message_type
         
         if not content or not room_id:
             await self.send_error_message(user_id, "Invalid message format")
@@ -184,7 +402,7 @@ class RealTimeService:
         # Create message ID
         message_id = str(uuid.uuid4())
         
-        # Save to database
+        # Save to database in the background so the broadcast is not held up by the commit
         db_message = RealTimeMessage(
             id=message_id,
             sender_id=user_id,
@@ -192,10 +410,9 @@ class RealTimeService:
             message_type=message_type,
             room_id=room_id,
             is_aeon_message=False,
-            meta_data=message_data.get("meta_data")
+            meta_data=event.meta_data
         )
-        db.add(db_message)
-        db.commit()
+        self._queue_persist(db_message)
         
         # Create response message
         response_message = RealTimeMessageModel(
@@ -207,7 +424,7 @@ class RealTimeService:
             timestamp=datetime.utcnow(),
             room_id=room_id,
             is_aeon_message=False,
-            meta_data=message_data.get("meta_data")
+            meta_data=event.meta_data
         )
         
         # Broadcast to room
@@ -216,35 +433,108 @@ class RealTimeService:
             "data": response_message.model_dump()
         }
         await self.connection_manager.broadcast_to_room(
-            json.dumps(message_json), 
+            _encode(message_json), 
             room_id, 
             exclude_user=user_id
         )
         
         logger.info(f"Message sent by {username} in room {room_id}")
     
-    async def handle_join_room(self, message_data: Dict[str, Any], user_id: int, username: str, db: Session):
+    def _queue_persist(self, db_message: RealTimeMessage):
+        """Hand a message to the background persistence worker, starting it if needed"""
+        if self._persist_task is None or self._persist_task.done():
+            # Created here so the queue binds to the running loop
+            self._persist_queue = asyncio.Queue()
+            self._persist_task = asyncio.create_task(self._persist_worker(self._persist_queue))
+        self._persist_queue.put_nowait(db_message)
+    
+    async def flush_pending_messages(self):
+        """Persist every queued chat message and stop the worker; called at application shutdown"""
+        if self._persist_task is None or self._persist_task.done():
+            return
+        # The sentinel queues behind the pending messages, so the worker writes them all first
+        self._persist_queue.put_nowait(None)
+        await self._persist_task
+    
+    async def _persist_worker(self, queue: asyncio.Queue):
+        """Drain queued messages in batches and commit each batch off the event loop
+        
+        A None on the queue writes whatever is already batched and stops the worker.
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            stopping = False
+            while not stopping:
+                message = await queue.get()
+                if message is None:
+                    break
+                batch = [message]
+                deadline = loop.time() + PERSIST_BATCH_WINDOW
+                while len(batch) < PERSIST_BATCH_SIZE:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        message = await asyncio.wait_for(queue.get(), timeout=timeout)
+                    except asyncio.TimeoutError:
+                        break
+                    if message is None:
+                        stopping = True
+                        break
+                    batch.append(message)
+                
+                try:
+                    await asyncio.to_thread(self._write_messages, batch)
+                except Exception as e:
+                    logger.error(f"Error persisting {len(batch)} chat messages: {e}")
+        except asyncio.CancelledError:
+            pass
+    
+    @staticmethod
+    def _write_messages(batch: List[RealTimeMessage]):
+        """Commit a batch of messages in its own session
+        
+        If the batch fails, the messages are retried one per commit so a single bad
+        row only loses itself.
+        """
+        db = SessionLocal()
+        try:
+            try:
+                db.add_all(batch)
+                db.commit()
+                return
+            except Exception as e:
+                db.rollback()
+                logger.warning(f"Batch of {len(batch)} chat messages failed, retrying one at a time: {e}")
+            
+            for message in batch:
+                try:
+                    db.add(message)
+                    db.commit()
+                except Exception as e:
+                    db.rollback()
+                    logger.error(f"Dropped chat message {message.id} from user {message.sender_id}: {e}")
+        finally:
+            db.close()
+    
+    async def handle_join_room(self, event: RoomEvent, user_id: int, username: str, db: Session):
         """Handle join room request"""
-        room_id = message_data.get("room_id")
+        room_id = event.room_id
         
         if not room_id:
             await self.send_error_message(user_id, "Room ID required")
             return
         
         # Check if room exists
-        room = db.query(ChatRoom).filter(ChatRoom.id == room_id).first()
+        room = self._get_room(room_id, db)
         if not room:
             await self.send_error_message(user_id, "Room not found")
             return
         
         # Check if user is already in room
-        existing_participant = db.query(RoomParticipant).filter(
-            and_(
-                RoomParticipant.room_id == room_id,
-                RoomParticipant.user_id == user_id,
-                RoomParticipant.is_active == True
-            )
-        ).first()
+        existing_participant = db.execute(
+            _ACTIVE_PARTICIPANT_STMT, {"room_id": room_id, "user_id": user_id}
+        ).scalars().first()
         
         if existing_participant:
             await self.send_error_message(user_id, "Already in room")
@@ -257,15 +547,11 @@ class RealTimeService:
             is_active=True
         )
         db.add(participant)
-        
-        # Update room participant count
-        room.current_participants += 1
         db.commit()
+        self._mark_room_dirty(room_id)
         
         # Add to connection manager
-        if room_id not in self.connection_manager.room_connections:
-            self.connection_manager.room_connections[room_id] = set()
-        self.connection_manager.room_connections[room_id].add(user_id)
+        self.connection_manager.join_room(room_id, user_id)
         
         # Update user presence
         if user_id in self.connection_manager.user_presence:
@@ -281,7 +567,7 @@ class RealTimeService:
             }
         }
         await self.connection_manager.broadcast_to_room(
-            json.dumps(join_message), 
+            _encode(join_message), 
             room_id, 
             exclude_user=user_id
         )
@@ -291,39 +577,27 @@ class RealTimeService:
         
         logger.info(f"User {username} joined room {room_id}")
     
-    async def handle_leave_room(self, message_data: Dict[str, Any], user_id: int, username: str, db: Session):
+    async def handle_leave_room(self, event: RoomEvent, user_id: int, username: str, db: Session):
         """Handle leave room request"""
-        room_id = message_data.get("room_id")
+        room_id = event.room_id
         
         if not room_id:
             await self.send_error_message(user_id, "Room ID required")
             return
         
         # Remove from database
-        participant = db.query(RoomParticipant).filter(
-            and_(
-                RoomParticipant.room_id == room_id,
-                RoomParticipant.user_id == user_id,
-                RoomParticipant.is_active == True
-            )
-        ).first()
+        participant = db.execute(
+            _ACTIVE_PARTICIPANT_STMT, {"room_id": room_id, "user_id": user_id}
+        ).scalars().first()
         
         if participant:
             participant.is_active = False
             participant.last_activity = datetime.utcnow()
-            
-            # Update room participant count
-            room = db.query(ChatRoom).filter(ChatRoom.id == room_id).first()
-            if room and room.current_participants > 0:
-                room.current_participants -= 1
-            
             db.commit()
+            self._mark_room_dirty(room_id)
         
         # Remove from connection manager
-        if room_id in self.connection_manager.room_connections:
-            self.connection_manager.room_connections[room_id].discard(user_id)
-            if not self.connection_manager.room_connections[room_id]:
-                del self.connection_manager.room_connections[room_id]
+        self.connection_manager.leave_room(room_id, user_id)
         
         # Update user presence
         if user_id in self.connection_manager.user_presence:
@@ -339,17 +613,17 @@ class RealTimeService:
             }
         }
         await self.connection_manager.broadcast_to_room(
-            json.dumps(leave_message), 
+            _encode(leave_message), 
             room_id, 
             exclude_user=user_id
         )
         
         logger.info(f"User {username} left room {room_id}")
     
-    async def handle_typing(self, message_data: Dict[str, Any], user_id: int, username: str, db: Session):
+    async def handle_typing(self, event: TypingEvent, user_id: int, username: str, db: Session):
         """Handle typing indicator"""
-        room_id = message_data.get("room_id")
-        is_typing = message_data.get("is_typing", False)
+        room_id = event.room_id
+        is_typing = event.is_typing
         
         if not room_id:
             return
@@ -359,6 +633,20 @@ class RealTimeService:
             status = ConnectionStatus.TYPING if is_typing else ConnectionStatus.CONNECTED
             self.connection_manager.user_presence[user_id].status = status
         
+        # Keystroke bursts: the first "typing" goes out, repeats inside the window are dropped;
+        # "stopped typing" always goes out immediately
+        pending = self._typing_debounce.pop(user_id, None)
+        if pending is not None:
+            if is_typing and pending[1] == room_id:
+                self._typing_debounce[user_id] = pending
+                return
+            pending[0].cancel()
+        if is_typing:
+            timer = asyncio.get_running_loop().call_later(
+                TYPING_DEBOUNCE_WINDOW, self._typing_debounce.pop, user_id, None
+            )
+            self._typing_debounce[user_id] = (timer, room_id)
+        
         # Broadcast typing indicator
         typing_message = {
             "type": "typing_indicator",
@@ -370,7 +658,7 @@ class RealTimeService:
             }
         }
         await self.connection_manager.broadcast_to_room(
-            json.dumps(typing_message), 
+            _encode(typing_message), 
             room_id, 
             exclude_user=user_id
         )
@@ -384,77 +672,133 @@ class RealTimeService:
             }
         }
         await self.connection_manager.send_personal_message(
-            json.dumps(error_data), 
+            _encode(error_data), 
             user_id
         )
     
     async def send_room_info(self, user_id: int, room_id: str, db: Session):
         """Send room information to user"""
-        room = db.query(ChatRoom).filter(ChatRoom.id == room_id).first()
+        room = self._get_room(room_id, db)
         if not room:
             return
         
+        # Live count of connected members rather than the lazily reconciled column
         room_info = {
             "type": "room_info",
             "data": {
-                "room_id": room.id,
-                "name": room.name,
-                "description": room.description,
-                "topic": room.topic,
-                "current_participants": room.current_participants,
-                "max_participants": room.max_participants,
-                "is_aeon_room": room.is_aeon_room
+                **room,
+                "current_participants": len(self.connection_manager.room_connections.get(room_id, ()))
             }
         }
         await self.connection_manager.send_personal_message(
-            json.dumps(room_info), 
+            _encode(room_info), 
             user_id
         )
     
+    def _get_room(self, room_id: str, db: Session) -> Optional[Dict[str, Any]]:
+        """Room info for a room, from the cache when fresh, otherwise loaded from the database"""
+        now = time.monotonic()
+        cached = self._room_cache.get(room_id)
+        if cached is not None and now - cached[0] < ROOM_CACHE_TTL:
+            self._room_cache.move_to_end(room_id)
+            return cached[1]
+        
+        room = db.execute(_ROOM_STMT, {"room_id": room_id}).scalars().first()
+        if not room:
+            self._room_cache.pop(room_id, None)
+            return None
+        
+        info = {
+            "room_id": room.id,
+            "name": room.name,
+            "description": room.description,
+            "topic": room.topic,
+            "max_participants": room.max_participants,
+            "is_aeon_room": room.is_aeon_room
+        }
+        self._room_cache[room_id] = (now, info)
+        self._room_cache.move_to_end(room_id)
+        if len(self._room_cache) > ROOM_CACHE_SIZE:
+            self._room_cache.popitem(last=False)
+        return info
+    
+    def _mark_room_dirty(self, room_id: str):
+        """Schedule a room's stored participant count for the next reconciliation"""
+        self._dirty_rooms.add(room_id)
+        if self._count_flush_task is None or self._count_flush_task.done():
+            self._count_flush_task = asyncio.create_task(self._flush_participant_counts())
+    
+    async def _flush_participant_counts(self):
+        """Periodically write participant counts for changed rooms, exiting once nothing is pending"""
+        try:
+            while self._dirty_rooms:
+                await asyncio.sleep(PARTICIPANT_COUNT_FLUSH_INTERVAL)
+                rooms, self._dirty_rooms = self._dirty_rooms, set()
+                try:
+                    await asyncio.to_thread(self._write_participant_counts, rooms)
+                except Exception as e:
+                    logger.error(f"Error updating participant counts for {len(rooms)} rooms: {e}")
+                    # Retry with the next flush
+                    self._dirty_rooms |= rooms
+        except asyncio.CancelledError:
+            pass
+    
+    @staticmethod
+    def _write_participant_counts(room_ids: Set[str]):
+        """Recount active participants for the given rooms in one UPDATE"""
+        db = SessionLocal()
+        try:
+            db.execute(_RECOUNT_PARTICIPANTS_STMT, {"room_ids": list(room_ids)})
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+    
     async def send_room_participants(self, user_id: int, db: Session):
         """Send current room participants to user"""
-        # Get all active participants
-        participants = db.query(RoomParticipant).filter(
-            RoomParticipant.is_active == True
-        ).all()
-        
-        participant_data = []
-        for participant in participants:
-            user = db.query(User).filter(User.id == participant.user_id).first()
-            if user:
-                participant_data.append({
-                    "user_id": user.id,
-                    "username": user.username,
-                    "room_id": participant.room_id,
-                    "joined_at": participant.joined_at.isoformat()
-                })
+        # Get all active participants with their usernames in one query
+        participants = db.execute(_ROOM_PARTICIPANTS_STMT).all()
+        
+        participant_data = [
+            {
+                "user_id": participant_user_id,
+                "username": username,
+                "room_id": room_id,
+                "joined_at": joined_at.isoformat()
+            }
+            for room_id, joined_at, participant_user_id, username in participants
+        ]
         
         participants_message = {
             "type": "room_participants",
             "data": participant_data
         }
         await self.connection_manager.send_personal_message(
-            json.dumps(participants_message), 
+            _encode(participants_message), 
             user_id
         )
     
-    async def update_user_presence(self, db: Session, user_id: int, status: ConnectionStatus):
+    def _last_seen(self, user_id: int) -> Optional[datetime]:
+        """Timestamp the connection manager just recorded for the user, reused for the database row"""
+        presence = self.connection_manager.user_presence.get(user_id)
+        return presence.last_seen if presence is not None else None
+    
+    async def update_user_presence(
+        self,
+        db: Session,
+        user_id: int,
+        status: ConnectionStatus,
+        last_seen: Optional[datetime] = None
+    ):
         """Update user presence in database"""
         try:
-            presence = db.query(UserPresence).filter(UserPresence.user_id == user_id).first()
-            
-            if presence:
-                presence.status = status.value
-                presence.last_seen = datetime.utcnow()
-            else:
-                presence = UserPresence(
-                    user_id=user_id,
-                    status=status.value,
-                    last_seen=datetime.utcnow(),
-                    is_aeon=False
-                )
-                db.add(presence)
-            
+            db.execute(_UPSERT_PRESENCE_STMT, {
+                "user_id": user_id,
+                "status": status.value,
+                "last_seen": last_seen or datetime.utcnow()
+            })
             db.commit()
         except Exception as e:
             logger.error(f"Error updating user presence: {e}")
@@ -5,8 +5,9 @@ Social service for Phase 3 user relationships, shared knowledge, and social inte
 import uuid
 from datetime import datetime, timedelta
 from typing import List, Optional, Dict, Any
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, desc, func
+from sqlalchemy.orm import Session, load_only, selectinload
+from sqlalchemy import and_, or_, desc, func, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 from app.core.logging import get_logger
 from app.database.models import (
@@ -38,30 +39,8 @@ class SocialService:
     ) -> UserRelationshipModel:
         """Create a new user relationship"""
         try:
-            # Check if relationship already exists
-            existing_relationship = db.query(UserRelationship).filter(
-                and_(
-                    UserRelationship.user_id == user_id,
-                    UserRelationship.related_user_id == relationship_data.related_user_id
-                )
-            ).first()
-            
-            if existing_relationship:
-                # Update existing relationship
-                existing_relationship.relationship_type = relationship_data.relationship_type
-                existing_relationship.strength = relationship_data.strength
-                existing_relationship.shared_interests = relationship_data.shared_interests
-                existing_relationship.meta_data = relationship_data.meta_data
-                existing_relationship.last_interaction = datetime.utcnow()
-                existing_relationship.interaction_count += 1
-                
-                db.commit()
-                db.refresh(existing_relationship)
-                
-                return UserRelationshipModel.model_validate(existing_relationship)
-            
-            # Create new relationship
-            relationship = UserRelationship(
+            # Insert or refresh the pair in one atomic statement
+            stmt = sqlite_insert(UserRelationship).values(
                 user_id=user_id,
                 related_user_id=relationship_data.related_user_id,
                 relationship_type=relationship_data.relationship_type,
@@ -69,13 +48,26 @@ class SocialService:
                 shared_interests=relationship_data.shared_interests,
                 meta_data=relationship_data.meta_data
             )
-            
-            db.add(relationship)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[UserRelationship.user_id, UserRelationship.related_user_id],
+                set_={
+                    "relationship_type": stmt.excluded.relationship_type,
+                    "strength": stmt.excluded.strength,
+                    "shared_interests": stmt.excluded.shared_interests,
+                    "meta_data": stmt.excluded.meta_data,
+                    "last_interaction": datetime.utcnow(),
+                    "interaction_count": UserRelationship.interaction_count + 1
+                }
+            ).returning(UserRelationship)
+            
+            relationship = db.scalars(stmt.execution_options(populate_existing=True)).one()
+            # Validate before commit: the commit expires the returned row, and reading
+            # it afterwards would cost a refresh query
+            response = UserRelationshipModel.model_validate(relationship)
             db.commit()
-            db.refresh(relationship)
             
-            logger.info(f"Created relationship between user {user_id} and {relationship_data.related_user_id}")
-            return UserRelationshipModel.model_validate(relationship)
+            logger.info(f"Saved relationship between user {user_id} and {relationship_data.related_user_id}")
+            return response
             
         except Exception as e:
             logger.error(f"Error creating user relationship: {e}")
@@ -111,7 +103,13 @@ class SocialService:
     ) -> bool:
         """Update relationship strength based on interaction"""
         try:
-            relationship = db.query(UserRelationship).filter(
+            relationship = db.query(UserRelationship).options(
+                load_only(
+                    UserRelationship.strength,
+                    UserRelationship.last_interaction,
+                    UserRelationship.interaction_count
+                )
+            ).filter(
                 and_(
                     UserRelationship.user_id == user_id,
                     UserRelationship.related_user_id == related_user_id
@@ -154,12 +152,8 @@ class SocialService:
             db.commit()
             db.refresh(knowledge)
             
-            # Get creator name
-            creator = db.query(User).filter(User.id == user_id).first()
-            creator_name = creator.username if creator else None
-            
             response = SharedKnowledgeResponse.model_validate(knowledge)
-            response.creator_name = creator_name
+            response.creator_name = knowledge.creator.username if knowledge.creator else None
             
             logger.info(f"Created shared knowledge by user {user_id}")
             return response
@@ -179,7 +173,8 @@ class SocialService:
     ) -> List[SharedKnowledgeResponse]:
         """Get shared knowledge based on visibility and filters"""
         try:
-            query = db.query(SharedKnowledge)
+            # Creators are loaded with one extra IN query for the whole page
+            query = db.query(SharedKnowledge).options(selectinload(SharedKnowledge.creator))
             
             # Filter by visibility
             if visibility == "public":
@@ -217,9 +212,8 @@ class SocialService:
             # Add creator names
             result = []
             for knowledge in knowledge_list:
-                creator = db.query(User).filter(User.id == knowledge.creator_id).first()
                 response = SharedKnowledgeResponse.model_validate(knowledge)
-                response.creator_name = creator.username if creator else None
+                response.creator_name = knowledge.creator.username if knowledge.creator else None
                 result.append(response)
             
             return result
@@ -232,14 +226,17 @@ class SocialService:
     def upvote_knowledge(db: Session, knowledge_id: int, user_id: int) -> bool:
         """Upvote shared knowledge"""
         try:
-            knowledge = db.query(SharedKnowledge).filter(SharedKnowledge.id == knowledge_id).first()
+            # Atomic increment; RETURNING tells us whether the row existed
+            updated_id = db.execute(
+                update(SharedKnowledge)
+                .where(SharedKnowledge.id == knowledge_id)
+                .values(upvotes=SharedKnowledge.upvotes + 1)
+                .returning(SharedKnowledge.id)
+                .execution_options(synchronize_session=False)
+            ).scalar()
+            db.commit()
             
-            if knowledge:
-                knowledge.upvotes += 1
-                db.commit()
-                return True
-            
-            return False
+            return updated_id is not None
             
         except Exception as e:
             logger.error(f"Error upvoting knowledge: {e}")
@@ -250,14 +247,17 @@ class SocialService:
     def downvote_knowledge(db: Session, knowledge_id: int, user_id: int) -> bool:
         """Downvote shared knowledge"""
         try:
-            knowledge = db.query(SharedKnowledge).filter(SharedKnowledge.id == knowledge_id).first()
-            
-            if knowledge:
-                knowledge.downvotes += 1
-                db.commit()
-                return True
+            # Atomic increment; RETURNING tells us whether the row existed
+            updated_id = db.execute(
+                update(SharedKnowledge)
+                .where(SharedKnowledge.id == knowledge_id)
+                .values(downvotes=SharedKnowledge.downvotes + 1)
+                .returning(SharedKnowledge.id)
+                .execution_options(synchronize_session=False)
+            ).scalar()
+            db.commit()
             
-            return False
+            return updated_id is not None
             
         except Exception as e:
             logger.error(f"Error downvoting knowledge: {e}")
@@ -287,8 +287,8 @@ class SocialService:
             db.refresh(interaction)
             
             # Get AEON names
-            aeon_user = db.query(User).filter(User.id == aeon_user_id).first()
-            target_aeon = db.query(User).filter(User.id == interaction_data.target_aeon_user_id).first()
+            aeon_user = interaction.aeon_user
+            target_aeon = interaction.target_aeon_user
             
             response = AEONInteractionResponse.model_validate(interaction)
             response.aeon_name = aeon_user.username if aeon_user else None
@@ -312,7 +312,11 @@ class SocialService:
     ) -> List[AEONInteractionResponse]:
         """Get AEON interactions"""
         try:
-            query = db.query(AEONInteraction).filter(
+            # Both AEON users are loaded with IN queries for the whole page
+            query = db.query(AEONInteraction).options(
+                selectinload(AEONInteraction.aeon_user),
+                selectinload(AEONInteraction.target_aeon_user)
+            ).filter(
                 or_(
                     AEONInteraction.aeon_user_id == aeon_user_id,
                     AEONInteraction.target_aeon_user_id == aeon_user_id
@@ -331,12 +335,11 @@ class SocialService:
             # Add AEON names
             result = []
             for interaction in interactions:
-                aeon_user = db.query(User).filter(User.id == interaction.aeon_user_id).first()
-                target_aeon = db.query(User).filter(User.id == interaction.target_aeon_user_id).first()
-                
                 response = AEONInteractionResponse.model_validate(interaction)
-                response.aeon_name = aeon_user.username if aeon_user else None
-                response.target_aeon_name = target_aeon.username if target_aeon else None
+                response.aeon_name = interaction.aeon_user.username if interaction.aeon_user else None
+                response.target_aeon_name = (
+                    interaction.target_aeon_user.username if interaction.target_aeon_user else None
+                )
                 result.append(response)
             
             return result
@@ -353,15 +356,20 @@ class SocialService:
     ) -> bool:
         """Respond to an AEON interaction"""
         try:
-            interaction = db.query(AEONInteraction).filter(AEONInteraction.id == interaction_id).first()
-            
-            if interaction and not interaction.response_content:
-                interaction.response_content = response_content
-                interaction.response_at = datetime.utcnow()
-                db.commit()
-                return True
+            # The unanswered guard is part of the WHERE clause, so only one response can win
+            updated_id = db.execute(
+                update(AEONInteraction)
+                .where(
+                    AEONInteraction.id == interaction_id,
+                    or_(AEONInteraction.response_content.is_(None), AEONInteraction.response_content == "")
+                )
+                .values(response_content=response_content, response_at=datetime.utcnow())
+                .returning(AEONInteraction.id)
+                .execution_options(synchronize_session=False)
+            ).scalar()
+            db.commit()
             
-            return False
+            return updated_id is not None
             
         except Exception as e:
             logger.error(f"Error responding to AEON interaction: {e}")
@@ -369,9 +377,18 @@ class SocialService:
             return False
     
     @staticmethod
-    def get_social_network(db: Session, user_id: int) -> SocialNetwork:
-        """Get user's social network information"""
+    def get_social_network(db: Session, user_id: int, include_details: bool = False) -> SocialNetwork:
+        """Get user's social network scores, computed in SQL; the member lists are loaded only on request"""
         try:
+            if not include_details:
+                network_strength, total_upvotes, total_interactions = SocialService._network_aggregates(db, user_id)
+                return SocialNetwork(
+                    user_id=user_id,
+                    network_strength=network_strength,
+                    influence_score=(total_upvotes * 0.7) + (total_interactions * 0.3),
+                    last_updated=datetime.utcnow()
+                )
+            
             # Get relationships
             relationships = db.query(UserRelationship).filter(
                 UserRelationship.user_id == user_id
@@ -396,7 +413,6 @@ class SocialService:
                 network_strength = sum(rel.strength for rel in relationships) / len(relationships)
             
             # Calculate influence score (based on shared knowledge upvotes and interactions)
-            influence_score = 0.0
             total_upvotes = sum(knowledge.upvotes for knowledge in shared_knowledge)
             total_interactions = len(aeon_interactions)
             influence_score = (total_upvotes * 0.7) + (total_interactions * 0.3)
@@ -415,6 +431,24 @@ class SocialService:
             logger.error(f"Error getting social network: {e}")
             return SocialNetwork(user_id=user_id)
     
+    @staticmethod
+    def _network_aggregates(db: Session, user_id: int):
+        """Average relationship strength, total upvotes and interaction count in one round trip"""
+        network_strength = db.query(
+            func.coalesce(func.avg(UserRelationship.strength), 0.0)
+        ).filter(UserRelationship.user_id == user_id).scalar_subquery()
+        total_upvotes = db.query(
+            func.coalesce(func.sum(SharedKnowledge.upvotes), 0)
+        ).filter(SharedKnowledge.creator_id == user_id).scalar_subquery()
+        total_interactions = db.query(func.count(AEONInteraction.id)).filter(
+            or_(
+                AEONInteraction.aeon_user_id == user_id,
+                AEONInteraction.target_aeon_user_id == user_id
+            )
+        ).scalar_subquery()
+        
+        return db.query(network_strength, total_upvotes, total_interactions).one()
+    
     @staticmethod
     def find_similar_users(
         db: Session, 
@@ -424,14 +458,14 @@ class SocialService:
         """Find users with similar interests based on shared knowledge and relationships"""
         try:
             # Get user's shared knowledge tags
-            user_knowledge = db.query(SharedKnowledge).filter(
+            user_knowledge_tags = db.query(SharedKnowledge.tags).filter(
                 SharedKnowledge.creator_id == user_id
             ).all()
             
             user_tags = set()
-            for knowledge in user_knowledge:
-                if knowledge.tags:
-                    user_tags.update(knowledge.tags)
+            for tags, in user_knowledge_tags:
+                if tags:
+                    user_tags.update(tags)
             
             if not user_tags:
                 return []
@@ -456,9 +490,9 @@ class SocialService:
                 user = db.query(User).filter(User.id == creator_id).first()
                 if user:
                     # Calculate similarity score
-                    user_knowledge_count = db.query(SharedKnowledge).filter(
+                    user_knowledge_count = db.query(func.count(SharedKnowledge.id)).filter(
                         SharedKnowledge.creator_id == creator_id
-                    ).count()
+                    ).scalar()
                     
                     similarity_score = common_count / max(len(user_tags), user_knowledge_count)
                     
@@ -480,36 +514,39 @@ class SocialService:
     def get_active_users(db: Session, limit: int = 20) -> List[Dict[str, Any]]:
         """Get most active users based on recent activity"""
         try:
-            # Get users with recent presence
-            recent_presence = db.query(UserPresence).filter(
+            # Presence, username and both activity counts in one query; the
+            # correlated counts only run for the rows that survive the limit
+            knowledge_count = db.query(func.count(SharedKnowledge.id)).filter(
+                SharedKnowledge.creator_id == User.id
+            ).correlate(User).scalar_subquery()
+            interaction_count = db.query(func.count(AEONInteraction.id)).filter(
+                or_(
+                    AEONInteraction.aeon_user_id == User.id,
+                    AEONInteraction.target_aeon_user_id == User.id
+                )
+            ).correlate(User).scalar_subquery()
+            
+            recent_activity = db.query(
+                UserPresence,
+                User.username,
+                knowledge_count.label("knowledge_count"),
+                interaction_count.label("interaction_count")
+            ).join(User, User.id == UserPresence.user_id).filter(
                 UserPresence.last_seen >= datetime.utcnow() - timedelta(hours=24)
             ).order_by(desc(UserPresence.last_seen)).limit(limit).all()
             
-            active_users = []
-            for presence in recent_presence:
-                user = db.query(User).filter(User.id == presence.user_id).first()
-                if user:
-                    # Get activity metrics
-                    knowledge_count = db.query(SharedKnowledge).filter(
-                        SharedKnowledge.creator_id == user.id
-                    ).count()
-                    
-                    interaction_count = db.query(AEONInteraction).filter(
-                        or_(
-                            AEONInteraction.aeon_user_id == user.id,
-                            AEONInteraction.target_aeon_user_id == user.id
-                        )
-                    ).count()
-                    
-                    active_users.append({
-                        "user_id": user.id,
-                        "username": user.username,
-                        "status": presence.status,
-                        "last_seen": presence.last_seen,
-                        "knowledge_count": knowledge_count,
-                        "interaction_count": interaction_count,
-                        "is_aeon": presence.is_aeon
-                    })
+            active_users = [
+                {
+                    "user_id": presence.user_id,
+                    "username": username,
+                    "status": presence.status,
+                    "last_seen": presence.last_seen,
+                    "knowledge_count": knowledge_count,
+                    "interaction_count": interaction_count,
+                    "is_aeon": presence.is_aeon
+                }
+                for presence, username, knowledge_count, interaction_count in recent_activity
+            ]
             
             return active_users
             
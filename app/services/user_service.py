@@ -22,32 +22,30 @@ class UserService:
     def create_user(db: Session, user_data: UserCreate) -> UserResponse:
         """Create a new user"""
         try:
-            # Check if user already exists
-            existing_user = db.query(User).filter(
-                (User.username == user_data.username) | (User.email == user_data.email)
-            ).first()
+            # Probe for username/email clashes and for any existing user in one
+            # round trip; EXISTS stops at the first index hit and hydrates no rows
+            username_taken, email_taken, any_user = db.query(
+                db.query(User.id).filter(User.username == user_data.username).exists(),
+                db.query(User.id).filter(User.email == user_data.email).exists(),
+                db.query(User.id).exists()
+            ).one()
             
-            if existing_user:
-                if existing_user.username == user_data.username:
-                    raise HTTPException(
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        detail="Username already registered"
-                    )
-                else:
-                    raise HTTPException(
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        detail="Email already registered"
-                    )
+            if username_taken:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Username already registered"
+                )
+            if email_taken:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Email already registered"
+                )
             
             # Create new user
             hashed_password = get_password_hash(user_data.password)
             
-            # Check if this is the first user (make them GOD_AEON) or assign appropriate role
-            existing_users = db.query(User).count()
-            if existing_users == 0:
-                role = UserRole.GOD_AEON.value  # First user becomes GOD_AEON
-            else:
-                role = UserRole.OWNER.value  # Subsequent users become owners
+            # The first user becomes GOD_AEON; subsequent users become owners
+            role = UserRole.OWNER.value if any_user else UserRole.GOD_AEON.value
                 
             db_user = User(
                 username=user_data.username,
@@ -4,9 +4,12 @@ Handles vector storage, retrieval, and similarity search for memories and conver
 """
 
 import asyncio
+import hashlib
 import uuid
+from collections import OrderedDict
 from datetime import datetime
 from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
 import chromadb
 from chromadb.config import Settings as ChromaSettings
 from chromadb.utils import embedding_functions
@@ -14,9 +17,13 @@ from sentence_transformers import SentenceTransformer
 
 from app.core.config import settings
 from app.core.logging import get_logger
+from app.services.cache_service import get_cache_service
 
 logger = get_logger(__name__)
 
+EMBEDDING_CACHE_SIZE = 2048
+EMBEDDING_BATCH_SIZE = 2048  # OpenAI embeddings accept up to 2048 inputs per request
+
 
 class VectorService:
     """Vector database service for memory and conversation storage"""
@@ -27,6 +34,7 @@ class VectorService:
         self.memory_collection = None
         self.conversation_collection = None
         self._sentence_transformer = None
+        self._embedding_cache: "OrderedDict[Tuple[str, str], List[float]]" = OrderedDict()
         
     async def initialize(self):
         """Initialize ChromaDB client and collections"""
@@ -78,13 +86,65 @@ class VectorService:
             logger.error(f"Failed to setup ChromaDB collections: {str(e)}")
             raise
     
+    async def embed(self, text: str) -> List[float]:
+        """Embed text with the collection embedding function, caching recent results"""
+        embeddings = await self.embed_batch([text])
+        return embeddings[0]
+    
+    async def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Embed many texts, sending only uncached ones in as few API requests as possible"""
+        keys = [
+            (settings.openai_embedding_model, hashlib.sha256(text.encode("utf-8")).hexdigest())
+            for text in texts
+        ]
+        
+        resolved: Dict[Tuple[str, str], List[float]] = {}
+        for key in keys:
+            cached = self._embedding_cache.get(key)
+            if cached is not None:
+                self._embedding_cache.move_to_end(key)
+                resolved[key] = cached
+        
+        pending = {key: text for key, text in zip(keys, texts) if key not in resolved}
+        
+        # Fall back to the persistent cache, where embeddings are stored as raw float32 bytes
+        cache_service = await get_cache_service()
+        cached_values = await cache_service.get_many([f"emb:{model}:{digest}" for model, digest in pending])
+        for key, cached in zip(list(pending), cached_values):
+            if cached is not None:
+                resolved[key] = np.frombuffer(cached, dtype=np.float32).tolist()
+                self._embedding_cache[key] = resolved[key]
+                del pending[key]
+        
+        pending_keys = list(pending)
+        pending_texts = list(pending.values())
+        computed: Dict[str, bytes] = {}
+        
+        for start in range(0, len(pending_texts), EMBEDDING_BATCH_SIZE):
+            embeddings = await asyncio.to_thread(
+                self.embedding_function,
+                pending_texts[start:start + EMBEDDING_BATCH_SIZE]
+            )
+            for key, embedding in zip(pending_keys[start:start + EMBEDDING_BATCH_SIZE], embeddings):
+                resolved[key] = list(embedding)
+                self._embedding_cache[key] = resolved[key]
+                computed[f"emb:{key[0]}:{key[1]}"] = np.asarray(embedding, dtype=np.float32).tobytes()
+        
+        await cache_service.set_many(computed)
+        
+        while len(self._embedding_cache) > EMBEDDING_CACHE_SIZE:
+            self._embedding_cache.popitem(last=False)
+        
+        return [resolved[key] for key in keys]
+    
     async def store_memory(
         self, 
         user_id: int, 
         content: str, 
         memory_type: str, 
         importance: int,
-        metadata: Optional[Dict[str, Any]] = None
+        metadata: Optional[Dict[str, Any]] = None,
+        embedding: Optional[List[float]] = None
     ) -> str:
         """Store a memory in the vector database"""
         try:
@@ -100,11 +160,13 @@ class VectorService:
                 **(metadata or {})
             }
             
-            # Store in ChromaDB
-            self.memory_collection.add(
+            # Store in ChromaDB; embedding and write block, so keep them off the event loop
+            await asyncio.to_thread(
+                self.memory_collection.add,
                 documents=[content],
                 ids=[memory_id],
-                metadatas=[memory_metadata]
+                metadatas=[memory_metadata],
+                embeddings=[embedding] if embedding is not None else None
             )
             
             logger.info(f"Memory stored in vector DB: {memory_id}")
@@ -114,6 +176,49 @@ class VectorService:
             logger.error(f"Failed to store memory in vector DB: {str(e)}")
             raise
     
+    async def store_memories_batch(
+        self,
+        user_id: int,
+        memories: List[Dict[str, Any]],
+        embeddings: Optional[List[List[float]]] = None
+    ) -> List[str]:
+        """Store several memories with one embedding batch and a single ChromaDB write
+        
+        Each memory is a dict with content, memory_type, importance and optional metadata.
+        """
+        try:
+            contents = [memory["content"] for memory in memories]
+            if embeddings is None:
+                embeddings = await self.embed_batch(contents)
+            
+            created_at = datetime.utcnow().isoformat()
+            memory_ids = [f"memory_{user_id}_{uuid.uuid4().hex[:8]}" for _ in memories]
+            memory_metadatas = [
+                {
+                    "user_id": user_id,
+                    "memory_type": memory["memory_type"],
+                    "importance": memory["importance"],
+                    "created_at": created_at,
+                    **(memory.get("metadata") or {})
+                }
+                for memory in memories
+            ]
+            
+            await asyncio.to_thread(
+                self.memory_collection.add,
+                documents=contents,
+                ids=memory_ids,
+                metadatas=memory_metadatas,
+                embeddings=embeddings
+            )
+            
+            logger.info(f"Stored {len(memory_ids)} memories in vector DB for user {user_id}")
+            return memory_ids
+            
+        except Exception as e:
+            logger.error(f"Failed to store memories batch in vector DB: {str(e)}")
+            raise
+    
     async def store_conversation_chunk(
         self,
         user_id: int,
@@ -137,7 +242,8 @@ class VectorService:
             }
             
             # Store in ChromaDB
-            self.conversation_collection.add(
+            await asyncio.to_thread(
+                self.conversation_collection.add,
                 documents=[content],
                 ids=[chunk_id],
                 metadatas=[chunk_metadata]
@@ -155,13 +261,16 @@ class VectorService:
         user_id: int,
         query: str,
         limit: int = 5,
-        min_importance: int = 3
+        min_importance: int = 3,
+        query_embedding: Optional[List[float]] = None,
+        min_score: Optional[float] = None
     ) -> List[Dict[str, Any]]:
-        """Search for relevant memories using vector similarity"""
+        """Search for relevant memories using vector similarity, optionally above a relevance score"""
         try:
             # Query the memory collection
-            results = self.memory_collection.query(
-                query_texts=[query],
+            results = await asyncio.to_thread(
+                self.memory_collection.query,
+                **self._query_input(query, query_embedding),
                 n_results=limit * 2,  # Get more results to filter by user and importance
                 where={"user_id": user_id, "importance": {"$gte": min_importance}}
             )
@@ -172,11 +281,16 @@ class VectorService:
                 for i, doc in enumerate(results['documents'][0]):
                     metadata = results['metadatas'][0][i]
                     distance = results['distances'][0][i] if results.get('distances') else 0
+                    relevance = 1 - distance  # Convert distance to similarity
+                    
+                    # Chroma has no score threshold, so prune before building the result
+                    if min_score is not None and relevance <= min_score:
+                        continue
                     
                     relevant_memories.append({
                         "content": doc,
                         "metadata": metadata,
-                        "relevance_score": 1 - distance,  # Convert distance to similarity
+                        "relevance_score": relevance,
                         "memory_type": metadata.get("memory_type", "unknown"),
                         "importance": metadata.get("importance", 0)
                     })
@@ -199,7 +313,8 @@ class VectorService:
         user_id: int,
         query: str,
         exclude_conversation_id: Optional[int] = None,
-        limit: int = 3
+        limit: int = 3,
+        query_embedding: Optional[List[float]] = None
     ) -> List[Dict[str, Any]]:
         """Search for relevant conversation context"""
         try:
@@ -209,8 +324,9 @@ class VectorService:
                 where_clause["conversation_id"] = {"$ne": exclude_conversation_id}
             
             # Query the conversation collection
-            results = self.conversation_collection.query(
-                query_texts=[query],
+            results = await asyncio.to_thread(
+                self.conversation_collection.query,
+                **self._query_input(query, query_embedding),
                 n_results=limit * 2,
                 where=where_clause
             )
@@ -239,6 +355,13 @@ class VectorService:
             logger.error(f"Failed to search conversation context: {str(e)}")
             return []
     
+    @staticmethod
+    def _query_input(query: str, query_embedding: Optional[List[float]]) -> Dict[str, Any]:
+        """Query by a precomputed embedding when given, so Chroma does not embed the text again"""
+        if query_embedding is not None:
+            return {"query_embeddings": [query_embedding]}
+        return {"query_texts": [query]}
+    
     async def get_health_status(self) -> Dict[str, Any]:
         """Check the health of the vector service"""
         try:
@@ -6,7 +6,7 @@ import asyncio
 import json
 import time
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Set
+from typing import Dict, List, Optional, Any, Set, Callable
 from dataclasses import dataclass, asdict
 from urllib.parse import urlparse, parse_qs
 import hashlib
@@ -58,6 +58,7 @@ class WebActivityTracker:
     def __init__(self):
         self.active_sessions: Dict[int, WebSession] = {}
         self.activity_buffer: List[WebActivity] = []
+        self.activity_listeners: List[Callable[[int], None]] = []
         self.domain_categories = self._load_domain_categories()
         self.topic_keywords = self._load_topic_keywords()
     
@@ -122,6 +123,19 @@ class WebActivityTracker:
             "travel": ["vacation", "trip", "hotel", "flight", "destination", "tourism"]
         }
     
+    def add_activity_listener(self, listener: Callable[[int], None]):
+        """Register a callback invoked with the user ID whenever activity is tracked"""
+        if listener not in self.activity_listeners:
+            self.activity_listeners.append(listener)
+    
+    def _notify_activity(self, user_id: int):
+        """Tell listeners that new activity is available for a user"""
+        for listener in self.activity_listeners:
+            try:
+                listener(user_id)
+            except Exception as e:
+                logger.error(f"Error notifying activity listener: {str(e)}")
+    
     async def track_page_view(
         self,
         user_id: int,
@@ -166,6 +180,7 @@ class WebActivityTracker:
             
             # Add to buffer
             self.activity_buffer.append(activity)
+            self._notify_activity(user_id)
             
             # Update active session
             await self._update_session(user_id, activity)
@@ -214,6 +229,7 @@ class WebActivityTracker:
             
             # Add to buffer
             self.activity_buffer.append(activity)
+            self._notify_activity(user_id)
             
             logger.info(f"Tracked search: {search_query} on {search_engine}")
             return activity
@@ -254,6 +270,7 @@ class WebActivityTracker:
             
             # Add to buffer
             self.activity_buffer.append(activity)
+            self._notify_activity(user_id)
             
             return activity
             
@@ -8,6 +8,8 @@ class AEONActivityTracker {
         this.pageStartTime = Date.now();
         this.aeonServerUrl = 'http://localhost:8000';
         this.isTracking = false;
+        this.pendingEvents = [];
+        this.flushTimer = null;
         
         this.init();
     }
@@ -60,6 +62,7 @@ class AEONActivityTracker {
         // Send page view data when page is about to unload
         window.addEventListener('beforeunload', () => {
             this.trackPageView(true); // Final page view
+            this.flushPendingEvents();
         });
     }
     
@@ -217,10 +220,11 @@ class AEONActivityTracker {
     async sendToAEON(payload) {
         // Try WebSocket first, fallback to HTTP
         if (this.websocket && this.websocket.readyState === WebSocket.OPEN) {
-            this.websocket.send(JSON.stringify({
-                type: 'web_activity',
-                data: payload
-            }));
+            // Batch events so bursts of clicks/scrolls go out as one frame
+            this.pendingEvents.push(payload.data);
+            if (!this.flushTimer) {
+                this.flushTimer = setTimeout(() => this.flushPendingEvents(), 1000);
+            }
         } else {
             // Fallback to HTTP
             await fetch(`${this.aeonServerUrl}/api/v1/aeon/web-activity`, {
@@ -233,16 +237,36 @@ class AEONActivityTracker {
         }
     }
     
+    flushPendingEvents() {
+        this.flushTimer = null;
+        if (!this.pendingEvents.length) return;
+        
+        const events = this.pendingEvents;
+        this.pendingEvents = [];
+        
+        if (this.websocket && this.websocket.readyState === WebSocket.OPEN) {
+            this.websocket.send(JSON.stringify({
+                type: 'web_activity_batch',
+                data: { events: events }
+            }));
+        }
+    }
+    
     connectWebSocket() {
         try {
-            this.websocket = new WebSocket(`ws://localhost:8000/api/v1/phase3/ws/${this.userId}`);
+            this.websocket = new WebSocket(`ws://localhost:8000/api/v1/aeon/enhanced/ws/enhanced/${this.userId}`);
+            this.websocket.binaryType = 'arraybuffer';
             
             this.websocket.onopen = () => {
                 console.log('AEON WebSocket connected');
             };
             
             this.websocket.onmessage = (event) => {
-                const message = JSON.parse(event.data);
+                // Binary frames carry UTF-8 encoded JSON
+                const text = typeof event.data === 'string'
+                    ? event.data
+                    : new TextDecoder().decode(event.data);
+                const message = JSON.parse(text);
                 this.handleWebSocketMessage(message);
             };
             
@@ -263,9 +287,16 @@ class AEONActivityTracker {
     
     handleWebSocketMessage(message) {
         switch (message.type) {
+            case 'batch':
+                // Several messages coalesced into one frame by the server
+                message.data.forEach((item) => this.handleWebSocketMessage(item));
+                break;
             case 'activity_tracked':
                 console.log('Activity tracked successfully');
                 break;
+            case 'activity_batch_tracked':
+                console.log(`Tracked ${message.data.tracked} of ${message.data.received} activities`);
+                break;
             case 'productivity_reminder':
                 this.showProductivityReminder(message.data);
                 break;
@@ -318,7 +318,9 @@ class Phase3Demo:
         
         try:
             # Get social network
-            response = await self.client.get(f"{self.base_url}/api/v1/phase3/social/network")
+            response = await self.client.get(
+                f"{self.base_url}/api/v1/phase3/social/network", params={"include_details": True}
+            )
             if response.status_code == 200:
                 network = response.json()
                 print(f"📊 Social Network Analysis:")
@@ -41,4 +41,4 @@ echo ""
 echo "Press Ctrl+C to stop the server"
 echo "================================"
 
-uvicorn app.main:app --host 0.0.0.0 --port 8000 --reload 
\ No newline at end of file
+uvicorn app.main:app --host 0.0.0.0 --port 8000 --reload --ws-per-message-deflate false 
\ No newline at end of file
@@ -79,7 +79,7 @@ echo "Health Check: http://localhost:8000/health"
 echo "Hybrid System Health: http://localhost:8000/api/v1/aeon/health/hybrid"
 
 # Start the FastAPI server
-uvicorn app.main:app --host 0.0.0.0 --port 8000 --reload
+uvicorn app.main:app --host 0.0.0.0 --port 8000 --reload --ws-per-message-deflate false
 
 echo ""
 echo "🎉 AEON Phase 2 startup complete!"
@@ -166,4 +166,4 @@ echo "   • Social intelligence and user discovery"
 echo ""
 
 # Start the server
-uvicorn app.main:app --host 0.0.0.0 --port 8000 --reload 
\ No newline at end of file
+uvicorn app.main:app --host 0.0.0.0 --port 8000 --reload --ws-per-message-deflate false 
\ No newline at end of file
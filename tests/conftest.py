@@ -0,0 +1,49 @@
+"""
+Shared fixtures for AEON tests
+"""
+
+import os
+
+# Settings are read at import time and both keys are required
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database.models import Base, User
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    """Session factory bound to a fresh SQLite file, usable from worker threads"""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'aeon_test.db'}",
+        connect_args={"check_same_thread": False}
+    )
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def db(session_factory):
+    """Database session for a single test"""
+    session = session_factory()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def make_user(db):
+    """Create users with unique usernames and emails"""
+    def _make_user(username: str) -> User:
+        user = User(username=username, email=f"{username}@example.com", hashed_password="hashed")
+        db.add(user)
+        db.commit()
+        db.refresh(user)
+        return user
+    return _make_user
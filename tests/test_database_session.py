@@ -0,0 +1,41 @@
+"""
+Tests for the database engine setup and the startup steps that bring existing databases up to the current schema
+"""
+
+from sqlalchemy import create_engine, inspect, text
+
+from app.database.models import Base
+from app.database.session import (
+    SQLITE_BUSY_TIMEOUT_MS,
+    SQLITE_POOL_SIZE,
+    create_database_engine,
+    ensure_room_participant_active_index
+)
+
+
+def test_active_participant_index_is_added_to_an_existing_database(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        # Rebuild the table as it was before the index
+        conn.execute(text("DROP INDEX ix_room_participants_active_user"))
+
+    ensure_room_participant_active_index(engine)
+    ensure_room_participant_active_index(engine)
+
+    indexes = {index["name"]: index["column_names"] for index in inspect(engine).get_indexes("room_participants")}
+    assert indexes["ix_room_participants_active_user"] == ["is_active", "user_id"]
+    engine.dispose()
+
+
+def test_sqlite_engine_uses_a_small_pool_with_wal_and_busy_timeout(tmp_path):
+    engine = create_database_engine(f"sqlite:///{tmp_path / 'aeon.db'}")
+
+    with engine.connect() as conn:
+        journal_mode = conn.execute(text("PRAGMA journal_mode")).scalar()
+        busy_timeout = conn.execute(text("PRAGMA busy_timeout")).scalar()
+
+    assert journal_mode == "wal"
+    assert busy_timeout == SQLITE_BUSY_TIMEOUT_MS
+    assert engine.pool.size() == SQLITE_POOL_SIZE
+    engine.dispose()
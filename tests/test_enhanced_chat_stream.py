@@ -0,0 +1,113 @@
+"""
+Tests for the server-sent event chat stream
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from app.database.models import ChatMessage
+from app.models.aeon import ChatRequest
+from app.services import enhanced_aeon_service
+from app.services.aeon_service import AEONService
+from app.services.enhanced_aeon_service import EnhancedAEONService
+
+
+class FakeRAGService:
+    """Streams fixed deltas and records finalized turns"""
+
+    def __init__(self, deltas, error=None):
+        self.deltas = deltas
+        self.error = error
+        self.finalized = []
+        self.finalize_gate = asyncio.Event()
+        self.finalize_gate.set()
+
+    async def generate_enhanced_response_stream(self, **kwargs):
+        for delta in self.deltas:
+            yield delta
+        if self.error:
+            raise self.error
+
+    async def finalize_response(self, user_id, user_message, aeon_response, conversation_id=None):
+        await self.finalize_gate.wait()
+        self.finalized.append(aeon_response)
+
+
+def _parse(frame: str):
+    event_line, data_line = frame.strip().split("\n")
+    return event_line[len("event: "):], json.loads(data_line[len("data: "):])
+
+
+async def _drain_background():
+    await asyncio.gather(*list(enhanced_aeon_service._background_tasks))
+
+
+@pytest.fixture
+def stream_setup(db, session_factory, make_user, monkeypatch):
+    monkeypatch.setattr(enhanced_aeon_service, "SessionLocal", session_factory)
+    user = make_user("streamer")
+    conversation = AEONService.create_conversation(db, user.id)
+
+    async def start(rag_service):
+        return await EnhancedAEONService.chat_with_aeon_enhanced_stream(
+            db, user.id, ChatRequest(message="Hi there", conversation_id=conversation.id), rag_service
+        )
+
+    def stored_messages():
+        with session_factory() as session:
+            return [
+                (message.role, message.content)
+                for message in session.query(ChatMessage).filter(
+                    ChatMessage.conversation_id == conversation.id
+                ).order_by(ChatMessage.id)
+            ]
+
+    return start, stored_messages
+
+
+@pytest.mark.asyncio
+async def test_done_is_not_held_back_by_finalize(stream_setup):
+    start, stored_messages = stream_setup
+    rag_service = FakeRAGService(["Hello", " world"])
+    rag_service.finalize_gate.clear()
+
+    events = [_parse(frame) async for frame in await start(rag_service)]
+
+    assert [name for name, _ in events] == ["start", "delta", "delta", "done"]
+    assert rag_service.finalized == []
+
+    rag_service.finalize_gate.set()
+    await _drain_background()
+
+    assert rag_service.finalized == ["Hello world"]
+    assert stored_messages() == [("user", "Hi there"), ("aeon", "Hello world")]
+
+
+@pytest.mark.asyncio
+async def test_reply_is_persisted_when_client_disconnects(stream_setup):
+    start, stored_messages = stream_setup
+    rag_service = FakeRAGService(["Hello", " world"])
+
+    stream = await start(rag_service)
+    assert _parse(await stream.__anext__())[0] == "start"
+    assert _parse(await stream.__anext__()) == ("delta", {"content": "Hello"})
+    await stream.aclose()
+    await _drain_background()
+
+    assert rag_service.finalized == ["Hello"]
+    assert stored_messages() == [("user", "Hi there"), ("aeon", "Hello")]
+
+
+@pytest.mark.asyncio
+async def test_failed_stream_reports_error_and_stores_nothing(stream_setup):
+    start, stored_messages = stream_setup
+    rag_service = FakeRAGService(["Hel"], error=RuntimeError("upstream closed"))
+
+    events = [_parse(frame) async for frame in await start(rag_service)]
+    await _drain_background()
+
+    assert [name for name, _ in events] == ["start", "delta", "error"]
+    assert rag_service.finalized == []
+    assert stored_messages() == [("user", "Hi there")]
@@ -0,0 +1,87 @@
+"""
+Tests for conditional requests on the enhanced status endpoint
+"""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1.endpoints import aeon
+from app.core.security import get_current_active_user
+from app.database import get_db
+
+
+class FakeVectorService:
+    async def get_health_status(self):
+        return {"status": "healthy", "memory_count": 3, "conversation_count": 1}
+
+
+class FakeGraphService:
+    def __init__(self):
+        self.total_nodes = 10
+        self.error = None
+
+    async def get_health_status(self):
+        if self.error:
+            raise self.error
+        return {"status": "healthy", "total_nodes": self.total_nodes}
+
+    async def get_user_knowledge_graph(self, user_id):
+        return {"nodes": self.total_nodes, "relationships": 4}
+
+
+@pytest.fixture
+def graph_service():
+    return FakeGraphService()
+
+
+@pytest.fixture
+def client(db, make_user, graph_service):
+    user = make_user("dashboard")
+    app = FastAPI()
+    app.include_router(aeon.router, prefix="/aeon")
+    app.dependency_overrides[get_current_active_user] = lambda: user
+    app.dependency_overrides[get_db] = lambda: db
+    app.dependency_overrides[aeon.get_vector_service_dep] = lambda: FakeVectorService()
+    app.dependency_overrides[aeon.get_graph_service_dep] = lambda: graph_service
+    return TestClient(app)
+
+
+def test_matching_etag_round_trips_to_304(client):
+    first = client.get("/aeon/status/enhanced")
+    etag = first.headers["etag"]
+    assert first.status_code == 200
+    assert etag.startswith('W/"')
+
+    for if_none_match in (etag, etag[2:], f'W/"stale", {etag}', "*"):
+        revalidated = client.get("/aeon/status/enhanced", headers={"If-None-Match": if_none_match})
+        assert revalidated.status_code == 304
+        assert revalidated.headers["etag"] == etag
+
+    stale = client.get("/aeon/status/enhanced", headers={"If-None-Match": 'W/"stale"'})
+    assert stale.status_code == 200
+
+
+def test_backend_changes_invalidate_the_etag(client, graph_service):
+    etag = client.get("/aeon/status/enhanced").headers["etag"]
+
+    graph_service.total_nodes = 11
+    changed = client.get("/aeon/status/enhanced", headers={"If-None-Match": etag})
+
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+
+
+def test_degraded_fallback_is_never_tagged(client, graph_service):
+    etag = client.get("/aeon/status/enhanced").headers["etag"]
+
+    graph_service.error = RuntimeError("neo4j down")
+    for if_none_match in (etag, "*"):
+        degraded = client.get("/aeon/status/enhanced", headers={"If-None-Match": if_none_match})
+        assert degraded.status_code == 200
+        assert "error" in degraded.json()["hybrid_memory"]
+        assert "etag" not in degraded.headers
+
+    graph_service.error = None
+    recovered = client.get("/aeon/status/enhanced", headers={"If-None-Match": etag})
+    assert recovered.status_code == 304
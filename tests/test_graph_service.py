@@ -0,0 +1,167 @@
+"""
+Tests for the graph service's initialization and transaction handling, against an in-memory stand-in for the Neo4j driver
+"""
+
+import asyncio
+
+import pytest
+
+from app.services import graph_service as graph_module
+from app.services.graph_service import GraphService
+
+
+class FakeResult:
+    def __init__(self, records):
+        self.records = records
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for record in self.records:
+            yield record
+
+    async def consume(self):
+        pass
+
+
+class FakeTransaction:
+    """Records queries; commits on a clean exit and rolls back when the block raises"""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.queries = []
+        self.committed = False
+        self.rolled_back = False
+
+    async def run(self, query, params=None):
+        self.queries.append(query)
+        if self.driver.fail_on and self.driver.fail_on in query:
+            raise RuntimeError(f"query failed: {self.driver.fail_on}")
+        return FakeResult([{"test": 1}] if "RETURN 1" in query else [])
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.committed = True
+        else:
+            self.rolled_back = True
+
+
+class FakeSession:
+    def __init__(self, driver):
+        self.driver = driver
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+    async def begin_transaction(self):
+        tx = FakeTransaction(self.driver)
+        self.driver.transactions.append(tx)
+        return tx
+
+    async def execute_read(self, work, *args):
+        if self.driver.gate is not None:
+            await self.driver.gate.wait()
+        return await work(await self.begin_transaction(), *args)
+
+    execute_write = execute_read
+
+
+class FakeDriver:
+    def __init__(self, fail_on=None, gate=None):
+        self.fail_on = fail_on
+        self.gate = gate
+        self.transactions = []
+        self.closed = False
+
+    def session(self, **config):
+        return FakeSession(self)
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.mark.asyncio
+async def test_transaction_commits_every_operation_together():
+    graph = GraphService()
+    graph.driver = FakeDriver()
+
+    async with graph.transaction() as tx:
+        await graph.create_user_node(user_id=1, username="graph", email="graph@example.com", tx=tx)
+        await graph.create_conversation_node(conversation_id=1, user_id=1, title="First", tx=tx)
+
+    assert graph.driver.transactions == [tx]
+    assert len(tx.queries) == 2
+    assert tx.committed and not tx.rolled_back
+
+
+@pytest.mark.asyncio
+async def test_transaction_rolls_back_when_an_operation_fails():
+    graph = GraphService()
+    graph.driver = FakeDriver(fail_on="CREATE (c:Conversation")
+
+    with pytest.raises(RuntimeError):
+        async with graph.transaction() as tx:
+            await graph.create_user_node(user_id=1, username="graph", email="graph@example.com", tx=tx)
+            await graph.create_conversation_node(conversation_id=1, user_id=1, title="First", tx=tx)
+
+    assert tx.rolled_back and not tx.committed
+
+
+@pytest.fixture
+def drivers(monkeypatch):
+    """Drivers handed out by the patched Neo4j factory, configured through the returned options"""
+    created = []
+    options = {}
+
+    def make_driver(*args, **kwargs):
+        created.append(FakeDriver(**options))
+        return created[-1]
+
+    monkeypatch.setattr(graph_module.AsyncGraphDatabase, "driver", make_driver)
+    monkeypatch.setattr(graph_module, "graph_service", GraphService())
+    monkeypatch.setattr(graph_module, "_init_lock", asyncio.Lock())
+    return created, options
+
+
+@pytest.mark.asyncio
+async def test_callers_wait_for_initialization_to_finish(drivers):
+    created, options = drivers
+    options["gate"] = asyncio.Event()
+
+    first = asyncio.create_task(graph_module.get_graph_service())
+    await asyncio.sleep(0)
+    second = asyncio.create_task(graph_module.get_graph_service())
+    await asyncio.sleep(0)
+
+    assert graph_module.graph_service.driver is None
+    assert not second.done()
+
+    options["gate"].set()
+    assert await first is await second
+    assert len(created) == 1
+    assert graph_module.graph_service.driver is created[0]
+
+
+@pytest.mark.asyncio
+async def test_failed_initialization_closes_the_driver_and_is_retried(drivers):
+    created, options = drivers
+    options["fail_on"] = "RETURN 1"
+
+    with pytest.raises(RuntimeError):
+        await graph_module.get_graph_service()
+
+    assert created[0].closed
+    assert graph_module.graph_service.driver is None
+
+    options["fail_on"] = None
+    service = await graph_module.get_graph_service()
+
+    assert service.driver is created[1]
+    assert not created[1].closed
@@ -0,0 +1,98 @@
+"""
+Tests for memory ingestion through the batched vector and graph writes
+"""
+
+from contextlib import asynccontextmanager
+
+import pytest
+
+from app.models.aeon import MemoryEntryCreate
+from app.services.enhanced_aeon_service import EnhancedAEONService
+from app.services.rag_service import RAGService
+
+
+class FakeVectorService:
+    def __init__(self):
+        self.embedded = []
+        self.stored = []
+
+    async def embed_batch(self, texts):
+        self.embedded.append(list(texts))
+        return [[float(len(text))] for text in texts]
+
+    async def store_memories_batch(self, user_id, memories, embeddings=None):
+        self.stored.append([memory["content"] for memory in memories])
+        start = sum(len(batch) for batch in self.stored[:-1])
+        return [f"memory_{user_id}_{start + index}" for index in range(len(memories))]
+
+    async def search_relevant_memories(self, **kwargs):
+        return []
+
+
+class FakeGraphService:
+    def __init__(self):
+        self.calls = []
+
+    @asynccontextmanager
+    async def transaction(self):
+        yield "tx"
+
+    async def create_memory_nodes_batch(self, user_id, memories, tx=None):
+        self.calls.append(("nodes", [memory["memory_id"] for memory in memories], tx))
+        return len(memories)
+
+    async def extract_and_link_concepts_batch(self, memory_concepts, tx=None):
+        self.calls.append(("concepts", memory_concepts, tx))
+        return sum(map(len, memory_concepts.values()))
+
+    async def create_user_node(self, user_id, username, email, metadata=None, tx=None):
+        self.calls.append(("user", user_id, tx))
+
+
+@pytest.fixture
+def services(monkeypatch):
+    rag_service = RAGService()
+    vector_service, graph_service = FakeVectorService(), FakeGraphService()
+    rag_service._vector_service, rag_service._graph_service = vector_service, graph_service
+
+    async def extract_concepts(content):
+        return content.lower().split()[:2]
+    monkeypatch.setattr(rag_service, "_extract_concepts", extract_concepts)
+    return rag_service, vector_service, graph_service
+
+
+@pytest.mark.asyncio
+async def test_memories_share_one_embedding_call_and_graph_transaction(services):
+    rag_service, vector_service, graph_service = services
+    memories = [
+        {"content": f"Likes hiking trip {index}", "memory_type": "preference", "importance": 5}
+        for index in range(3)
+    ]
+
+    results = await rag_service.store_memories_with_context(7, memories)
+
+    assert vector_service.embedded == [[memory["content"] for memory in memories]]
+    assert [name for name, *_ in graph_service.calls] == ["nodes", "concepts"]
+    memory_ids = [result["memory_id"] for result in results]
+    assert graph_service.calls[0] == ("nodes", memory_ids, "tx")
+    assert graph_service.calls[1] == ("concepts", {memory_id: ["likes", "hiking"] for memory_id in memory_ids}, "tx")
+
+
+@pytest.mark.asyncio
+async def test_enhanced_memory_creation_uses_the_batch_path(services, db, make_user):
+    rag_service, vector_service, graph_service = services
+    user = make_user("rememberer")
+
+    result = await EnhancedAEONService.create_memory_entry_enhanced(
+        db,
+        user.id,
+        MemoryEntryCreate(content="Prefers tea", memory_type="preference", importance=6, meta_data={"source": "chat"}),
+        rag_service=rag_service,
+        graph_service=graph_service
+    )
+
+    assert result["status"] == "success"
+    assert result["vector_id"] == f"memory_{user.id}_0"
+    assert result["memory"].meta_data == {"source": "chat"}
+    assert vector_service.embedded == [["Prefers tea"]]
+    assert [name for name, *_ in graph_service.calls] == ["nodes", "concepts", "user"]
@@ -0,0 +1,165 @@
+"""
+Tests for WebSocket connection management: framing, slow-client eviction and enhanced sends
+"""
+
+import asyncio
+
+import orjson
+import pytest
+
+from app.services import realtime_service
+from app.services.enhanced_realtime_service import EnhancedConnectionManager
+from app.services.realtime_service import (
+    SEND_FAILED_CLOSE_CODE,
+    SEND_QUEUE_SIZE,
+    SLOW_CLIENT_CLOSE_CODE,
+    ConnectionManager,
+    RealTimeService,
+    _encode
+)
+
+
+class FakeWebSocket:
+    """Records frames and close codes; sends block until released, like a stalled client"""
+
+    def __init__(self, stalled=False, send_error=None, incoming=()):
+        self.frames = []
+        self.close_code = None
+        self.send_error = send_error
+        self.released = asyncio.Event()
+        if not stalled:
+            self.released.set()
+        self.incoming = asyncio.Queue()
+        for message in incoming:
+            self.incoming.put_nowait(message)
+
+    async def accept(self):
+        pass
+
+    async def send_bytes(self, data):
+        if self.send_error:
+            raise self.send_error
+        await self.released.wait()
+        self.frames.append(orjson.loads(data))
+
+    async def receive(self):
+        return await self.incoming.get()
+
+    async def close(self, code=1000, reason=None):
+        self.close_code = code
+        self.incoming.put_nowait({"type": "websocket.disconnect", "code": code})
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+async def _shutdown(manager):
+    for user_id in list(manager.active_connections):
+        manager.disconnect(user_id)
+    await _settle()
+
+
+@pytest.mark.asyncio
+async def test_queued_messages_are_coalesced_into_one_binary_frame():
+    manager = ConnectionManager()
+    websocket = FakeWebSocket()
+    await manager.connect(websocket, 1, "reader")
+
+    for index in range(3):
+        await manager.send_personal_message(_encode({"type": "tick", "data": index}), 1)
+    await _settle()
+
+    assert websocket.frames == [{
+        "type": "batch",
+        "data": [{"type": "tick", "data": index} for index in range(3)]
+    }]
+    await _shutdown(manager)
+
+
+@pytest.mark.asyncio
+async def test_slow_client_is_closed_and_dropped():
+    manager = ConnectionManager()
+    slow_socket, fast_socket = FakeWebSocket(stalled=True), FakeWebSocket()
+    slow = await manager.connect(slow_socket, 1, "slow")
+    fast = await manager.connect(fast_socket, 2, "fast")
+    manager.join_room("lobby", 1)
+    manager.join_room("lobby", 2)
+    await _settle()
+
+    # One message is stuck in the stalled send, the rest fill the queue; the
+    # fast client's writer gets a turn after every broadcast
+    for index in range(SEND_QUEUE_SIZE + 2):
+        await manager.broadcast_to_room(_encode({"type": "chat", "data": index}), "lobby")
+        await asyncio.sleep(0)
+    await _settle()
+
+    assert slow_socket.close_code == SLOW_CLIENT_CLOSE_CODE
+    assert not manager.is_current(1, slow)
+    assert 1 not in manager.active_connections
+    assert manager.room_connections["lobby"] == {2}
+    assert fast_socket.close_code is None
+    assert manager.is_current(2, fast)
+    slow_socket.released.set()
+    await _shutdown(manager)
+
+
+@pytest.mark.asyncio
+async def test_failed_send_closes_the_socket():
+    manager = ConnectionManager()
+    websocket = FakeWebSocket(send_error=RuntimeError("connection reset"))
+    connection = await manager.connect(websocket, 1, "broken")
+
+    await manager.send_personal_message(_encode({"type": "ping"}), 1)
+    await _settle()
+
+    assert websocket.close_code == SEND_FAILED_CLOSE_CODE
+    assert not manager.is_current(1, connection)
+
+
+@pytest.mark.asyncio
+async def test_evicted_socket_does_not_reregister(session_factory, monkeypatch):
+    monkeypatch.setattr(realtime_service, "SessionLocal", session_factory)
+    service = RealTimeService()
+    handled = []
+
+    async def record_message(message_data, user_id, username, db):
+        handled.append(message_data)
+    monkeypatch.setattr(service, "handle_message", record_message)
+
+    join = {"type": "websocket.receive", "text": '{"type": "join_room", "data": {"room_id": "lobby"}}'}
+    websocket = FakeWebSocket()
+    session = asyncio.create_task(service.handle_websocket_connection(websocket, 1, "evicted"))
+    await _settle()
+
+    manager = service.connection_manager
+    manager._evict(1, manager.active_connections[1], SLOW_CLIENT_CLOSE_CODE, "Client too slow")
+    websocket.incoming.put_nowait(join)
+    await asyncio.wait_for(session, timeout=1)
+
+    assert handled == []
+    assert websocket.close_code == SLOW_CLIENT_CLOSE_CODE
+    assert 1 not in manager.active_connections
+    assert 1 not in manager.user_rooms
+
+
+@pytest.mark.asyncio
+async def test_enhanced_messages_share_the_connection_writer(monkeypatch):
+    manager = EnhancedConnectionManager()
+
+    async def no_monitoring(user_id):
+        pass
+    monkeypatch.setattr(manager, "start_activity_monitoring", no_monitoring)
+
+    websocket = FakeWebSocket()
+    await manager.connect(websocket, 1, "enhanced")
+    manager.emit(1, "email_summary", {"unread": 2})
+    await manager.send_personal_message(_encode({"type": "chat", "data": "hi"}), 1)
+    await _settle()
+
+    assert websocket.frames == [{
+        "type": "batch",
+        "data": [{"type": "email_summary", "data": {"unread": 2}}, {"type": "chat", "data": "hi"}]
+    }]
+    await _shutdown(manager)
@@ -0,0 +1,48 @@
+"""
+Tests for background persistence of real-time chat messages
+"""
+
+import pytest
+
+from app.database.models import RealTimeMessage
+from app.services import realtime_service
+from app.services.realtime_service import RealTimeService
+
+
+@pytest.fixture
+def service(session_factory, monkeypatch):
+    monkeypatch.setattr(realtime_service, "SessionLocal", session_factory)
+    return RealTimeService()
+
+
+def _message(message_id, sender_id, content="Hello"):
+    return RealTimeMessage(id=message_id, sender_id=sender_id, content=content, message_type="text")
+
+
+def _stored_ids(session_factory):
+    with session_factory() as session:
+        return sorted(message.id for message in session.query(RealTimeMessage))
+
+
+@pytest.mark.asyncio
+async def test_shutdown_flush_writes_queued_messages(service, session_factory, make_user):
+    user = make_user("chatter")
+
+    for index in range(3):
+        service._queue_persist(_message(f"msg-{index}", user.id))
+    await service.flush_pending_messages()
+
+    assert _stored_ids(session_factory) == ["msg-0", "msg-1", "msg-2"]
+    assert service._persist_task.done()
+
+
+@pytest.mark.asyncio
+async def test_bad_row_only_loses_itself(service, session_factory, make_user):
+    user = make_user("chatter")
+
+    service._queue_persist(_message("msg-0", user.id))
+    service._queue_persist(_message("msg-bad", user.id, content=None))
+    service._queue_persist(_message("msg-2", user.id))
+    await service.flush_pending_messages()
+
+    assert _stored_ids(session_factory) == ["msg-0", "msg-2"]
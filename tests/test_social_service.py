@@ -0,0 +1,125 @@
+"""
+Tests for the social service's database paths
+"""
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+from app.database.models import AEONInteraction, Base, SharedKnowledge, User, UserRelationship
+from app.database.session import ensure_user_relationship_pair_index
+from app.models.aeon import UserRelationshipCreate
+from app.services.social_service import SocialService
+
+
+@pytest.fixture
+def network(db, make_user):
+    """A user with two relationships, two knowledge items and interactions on both sides"""
+    user, friend, other = make_user("owner"), make_user("friend"), make_user("other")
+    db.add_all([
+        UserRelationship(user_id=user.id, related_user_id=friend.id, relationship_type="friend", strength=0.8),
+        UserRelationship(user_id=user.id, related_user_id=other.id, relationship_type="acquaintance", strength=0.4),
+        SharedKnowledge(creator_id=user.id, content="Fact one", knowledge_type="fact", upvotes=3),
+        SharedKnowledge(creator_id=user.id, content="Fact two", knowledge_type="fact", upvotes=2),
+        SharedKnowledge(creator_id=friend.id, content="Not mine", knowledge_type="fact", upvotes=50),
+        AEONInteraction(aeon_user_id=user.id, target_aeon_user_id=friend.id, interaction_type="chat", content="Hi"),
+        AEONInteraction(aeon_user_id=other.id, target_aeon_user_id=user.id, interaction_type="chat", content="Hey"),
+        AEONInteraction(aeon_user_id=friend.id, target_aeon_user_id=other.id, interaction_type="chat", content="Yo")
+    ])
+    db.commit()
+    return user
+
+
+def test_social_network_scores_come_from_sql_by_default(db, network):
+    summary = SocialService.get_social_network(db, network.id)
+
+    assert summary.network_strength == pytest.approx(0.6)
+    assert summary.influence_score == pytest.approx(5 * 0.7 + 2 * 0.3)
+    assert summary.connections == []
+    assert summary.shared_knowledge == []
+    assert summary.aeon_interactions == []
+
+
+def test_social_network_details_match_the_sql_scores(db, network):
+    summary = SocialService.get_social_network(db, network.id)
+    detailed = SocialService.get_social_network(db, network.id, include_details=True)
+
+    assert detailed.network_strength == pytest.approx(summary.network_strength)
+    assert detailed.influence_score == pytest.approx(summary.influence_score)
+    assert len(detailed.connections) == 2
+    assert len(detailed.shared_knowledge) == 2
+    assert len(detailed.aeon_interactions) == 2
+
+
+def test_social_network_without_activity_scores_zero(db, make_user):
+    loner = make_user("loner")
+
+    summary = SocialService.get_social_network(db, loner.id)
+
+    assert summary.network_strength == 0.0
+    assert summary.influence_score == 0.0
+
+
+def test_relationship_upsert_inserts_then_updates_the_pair(db, make_user):
+    user, friend = make_user("owner"), make_user("friend")
+
+    created = SocialService.create_user_relationship(
+        db, user.id, UserRelationshipCreate(related_user_id=friend.id, relationship_type="acquaintance", strength=0.3)
+    )
+    updated = SocialService.create_user_relationship(
+        db, user.id, UserRelationshipCreate(related_user_id=friend.id, relationship_type="friend", strength=0.9)
+    )
+
+    assert updated.id == created.id
+    assert created.interaction_count == 0
+    assert (updated.relationship_type, updated.strength, updated.interaction_count) == ("friend", 0.9, 1)
+    assert db.query(UserRelationship).count() == 1
+
+
+def test_pair_index_is_added_to_an_existing_database(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        # Rebuild the table as it was before the pair index, with a duplicated pair
+        conn.execute(text("DROP INDEX uq_user_relationships_pair"))
+        for username in ("owner", "friend"):
+            conn.execute(User.__table__.insert().values(
+                username=username, email=f"{username}@example.com", hashed_password="hashed"
+            ))
+        for relationship_type in ("acquaintance", "friend"):
+            conn.execute(UserRelationship.__table__.insert().values(
+                user_id=1, related_user_id=2, relationship_type=relationship_type, strength=0.5
+            ))
+
+    ensure_user_relationship_pair_index(engine)
+    ensure_user_relationship_pair_index(engine)
+
+    index_names = {index["name"] for index in inspect(engine).get_indexes("user_relationships")}
+    assert "uq_user_relationships_pair" in index_names
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT relationship_type FROM user_relationships")).all()
+    assert rows == [("friend",)]
+    engine.dispose()
+
+
+def test_votes_report_missing_knowledge(db, network):
+    knowledge = db.query(SharedKnowledge).filter(SharedKnowledge.content == "Fact one").one()
+
+    assert SocialService.upvote_knowledge(db, knowledge.id, network.id)
+    assert SocialService.downvote_knowledge(db, knowledge.id, network.id)
+    assert not SocialService.upvote_knowledge(db, 9999, network.id)
+    assert not SocialService.downvote_knowledge(db, 9999, network.id)
+
+    db.refresh(knowledge)
+    assert (knowledge.upvotes, knowledge.downvotes) == (4, 1)
+
+
+def test_only_the_first_response_to_an_interaction_wins(db, network):
+    interaction = db.query(AEONInteraction).filter(AEONInteraction.content == "Hey").one()
+
+    assert SocialService.respond_to_aeon_interaction(db, interaction.id, "First")
+    assert not SocialService.respond_to_aeon_interaction(db, interaction.id, "Second")
+    assert not SocialService.respond_to_aeon_interaction(db, 9999, "Nobody")
+
+    db.refresh(interaction)
+    assert interaction.response_content == "First"
+    assert interaction.response_at is not None
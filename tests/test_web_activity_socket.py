@@ -0,0 +1,74 @@
+"""
+Tests for browser extension web activity frames on the socket the extension connects to
+"""
+
+import re
+from pathlib import Path
+
+import orjson
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1.api import api_router
+from app.api.v1.endpoints import aeon_enhanced
+from app.services.enhanced_realtime_service import EnhancedRealTimeService
+
+CONTENT_SCRIPT = Path(__file__).resolve().parents[1] / "browser_extension" / "content.js"
+
+
+def _extension_socket_path(user_id: int) -> str:
+    """The WebSocket path content.js connects to, for the given user"""
+    url = re.search(r"new WebSocket\(`ws://[^/]+(/[^`]+)`\)", CONTENT_SCRIPT.read_text()).group(1)
+    return url.replace("${this.userId}", str(user_id))
+
+
+def _messages(frame: bytes):
+    message = orjson.loads(frame)
+    return message["data"] if message["type"] == "batch" else [message]
+
+
+@pytest.fixture
+def service(session_factory, monkeypatch):
+    service = EnhancedRealTimeService()
+    manager = service.connection_manager
+    tracked = []
+
+    async def track(user_id, activity_data):
+        tracked.append((user_id, activity_data["type"]))
+        return activity_data
+
+    async def no_monitoring(user_id):
+        pass
+
+    async def empty_summary(user_id, days=1):
+        return {}
+
+    monkeypatch.setattr(manager, "_track_web_activity", track)
+    monkeypatch.setattr(manager, "start_activity_monitoring", no_monitoring)
+    monkeypatch.setattr(manager, "get_activity_summary", empty_summary)
+    monkeypatch.setattr(aeon_enhanced, "enhanced_realtime_service", service)
+    monkeypatch.setattr(aeon_enhanced, "SessionLocal", session_factory)
+    service.tracked = tracked
+    return service
+
+
+def test_extension_batch_frames_are_tracked_and_acknowledged(service, make_user):
+    user = make_user("browser")
+    app = FastAPI()
+    app.include_router(api_router, prefix="/api/v1")
+    batch = {"type": "web_activity_batch", "data": {"events": [
+        {"type": "page_view", "url": "https://example.com", "title": "Example"},
+        {"type": "click", "url": "https://example.com", "element_type": "a"}
+    ]}}
+
+    with TestClient(app).websocket_connect(_extension_socket_path(user.id)) as websocket:
+        websocket.send_text(orjson.dumps(batch).decode())
+        received = []
+        while not any(message["type"] == "activity_batch_tracked" for message in received):
+            received.extend(_messages(websocket.receive_bytes()))
+
+    acknowledgement = next(message for message in received if message["type"] == "activity_batch_tracked")
+    assert acknowledgement["data"]["received"] == 2
+    assert acknowledgement["data"]["tracked"] == 2
+    assert service.tracked == [(user.id, "page_view"), (user.id, "click")]